@@ -8,35 +8,17 @@ from PyQt6.QtCore import Qt
 import pandas as pd
 import random
 
+from icon_atlas import shared_icons
+
 class RegionIcon(QLabel):
     def __init__(self, region_name):
         super().__init__()
-        self.region_colors = {
-            'Misthalin': '#1E3A8A',
-            'Karamja': '#15803D',
-            'Asgarnia': '#1D4ED8',
-            'Fremenik': '#1F2937',
-            'Kandarin': '#991B1B',
-            'Desert': '#A16207',
-            'Mortyania': '#312E81',
-            'Tirannwn': '#065F46',
-            'Wilderness': '#111827',
-            'Kourend': '#0F766E',
-            'Varlamore': '#C2410C'
-        }
-        
+        # Pixmaps are shared through the icon atlas, so rows don't each
+        # parse a stylesheet or read icon files
         self.setFixedSize(32, 32)
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setStyleSheet(f"""
-            QLabel {{
-                background-color: {self.region_colors.get(region_name, '#666666')};
-                color: white;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 14px;
-            }}
-        """)
-        self.setText(region_name[0])
+        self.setPixmap(shared_icons().region(region_name))
+        self.setToolTip(region_name)
 
 class HunterAssignment:
     def __init__(self, monster=None, is_active=False, is_blocked=False):
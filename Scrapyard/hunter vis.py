@@ -7,36 +7,17 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt6.QtGui import QPixmap, QIcon, QColor
 from PyQt6.QtCore import Qt
 
+from icon_atlas import shared_icons
+
 class RegionIcon(QLabel):
     def __init__(self, region_name):
         super().__init__()
-        # Define region colors (based on the game's color scheme)
-        self.region_colors = {
-            'Misthalin': '#1E3A8A',  # blue-800
-            'Karamja': '#15803D',    # green-700
-            'Asgarnia': '#1D4ED8',   # blue-700
-            'Fremenik': '#1F2937',   # gray-800
-            'Kandarin': '#991B1B',   # red-800
-            'Desert': '#A16207',      # yellow-700
-            'Mortyania': '#312E81',  # indigo-900
-            'Tirannwn': '#065F46',   # emerald-700
-            'Wilderness': '#111827',  # gray-900
-            'Kourend': '#0F766E',    # teal-700
-            'Varlamore': '#C2410C'   # orange-700
-        }
-        
+        # Pixmaps are shared through the icon atlas, so rows don't each
+        # parse a stylesheet or read icon files
         self.setFixedSize(32, 32)  # Increased from 24x24 to 32x32
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setStyleSheet(f"""
-            QLabel {{
-                background-color: {self.region_colors.get(region_name, '#666666')};
-                color: white;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 14px;
-            }}
-        """)
-        self.setText(region_name[0])  # First letter of region name
+        self.setPixmap(shared_icons().region(region_name))
+        self.setToolTip(region_name)
 
 def capitalize_monster_name(name):
     """Properly capitalize monster names treating them as proper nouns"""
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+ATLAS_MAGIC = b'HICO'
+ATLAS_VERSION = 1
+# magic, version, width, height, source digest
+ATLAS_HEADER = struct.Struct('<4sHII32s')
+ATLAS_FILE = 'icon_atlas.bin'
+CATEGORIES = ('creatures', 'methods', 'regions')
+PADDING = 1  # Transparent gap so scaled icons don't bleed into neighbours
+
+# Badge colours for regions that have no extracted shield yet
+REGION_COLORS = {
+    'Misthalin': '#1E3A8A',  # blue-800
+    'Karamja': '#15803D',    # green-700
+    'Asgarnia': '#1D4ED8',   # blue-700
+    'Fremenik': '#1F2937',   # gray-800
+    'Kandarin': '#991B1B',   # red-800
+    'Desert': '#A16207',     # yellow-700
+    'Mortyania': '#312E81',  # indigo-900
+    'Tirannwn': '#065F46',   # emerald-700
+    'Wilderness': '#111827', # gray-900
+    'Kourend': '#0F766E',    # teal-700
+    'Varlamore': '#C2410C'   # orange-700
+}
+
+DEFAULT_ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extracted_icons')
+
+
+def index_path_for(atlas_path: str) -> str:
+    """Location of the offset index that belongs to an atlas file"""
+    return os.path.splitext(atlas_path)[0] + '.json'
+
+
+def icon_files(icon_dir: str = DEFAULT_ICON_DIR) -> List[Tuple[str, str]]:
+    """(name, path) of every extracted icon, named '<category>/<file stem>'"""
+    files = []
+    for category in CATEGORIES:
+        directory = os.path.join(icon_dir, category)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() == '.png':
+                files.append((f"{category}/{stem}", os.path.join(directory, filename)))
+    return files
+
+
+def sources_digest(files: List[Tuple[str, str]]) -> bytes:
+    """Digest of the icon files' names, sizes and modification times"""
+    digest = hashlib.sha256()
+    for name, path in files:
+        stat = os.stat(path)
+        digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.digest()
+
+
+def pack(sizes: Dict[str, Tuple[int, int]]) -> Tuple[int, int, Dict[str, Tuple[int, int, int, int]]]:
+    """Shelf-pack (width, height) boxes into one sheet.
+
+    Returns (sheet width, sheet height, name -> (x, y, w, h)).
+    """
+    if not sizes:
+        return 0, 0, {}
+    area = sum((w + PADDING) * (h + PADDING) for w, h in sizes.values())
+    sheet_width = max(max(w for w, _ in sizes.values()) + PADDING, int(area ** 0.5) + 1)
+
+    # Tallest first, so each shelf wastes little height
+    order = sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name))
+    offsets = {}
+    x = y = shelf_height = 0
+    for name in order:
+        w, h = sizes[name]
+        if x + w > sheet_width:
+            x, y = 0, y + shelf_height + PADDING
+            shelf_height = 0
+        offsets[name] = (x, y, w, h)
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+    return sheet_width, y + shelf_height, offsets
+
+
+def build_atlas(icon_dir: str = DEFAULT_ICON_DIR, atlas_path: Optional[str] = None,
+                force: bool = False) -> str:
+    """Pack every extracted icon into one RGBA sheet plus an offset index.
+
+    The sheet is stored as raw pixels after a fixed header so it can be
+    memory-mapped instead of decoded.  Nothing is rewritten if the icons
+    have not changed since the last build.
+
+    Returns:
+        Path of the atlas file
+    """
+    atlas_path = atlas_path or os.path.join(icon_dir, ATLAS_FILE)
+    files = icon_files(icon_dir)
+    digest = sources_digest(files)
+    if not force and IconAtlas.stored_digest(atlas_path) == digest:
+        return atlas_path
+
+    images = {}
+    for name, path in files:
+        with Image.open(path) as img:
+            images[name] = img.convert('RGBA')
+    width, height, offsets = pack({name: img.size for name, img in images.items()})
+
+    sheet = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    for name, (x, y, _, _) in offsets.items():
+        sheet.paste(images[name], (x, y))
+
+    index_path = index_path_for(atlas_path)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': ATLAS_VERSION, 'digest': digest.hex(), 'icons': offsets},
+                  f, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+    # The sheet goes last: its header digest is what marks the pair as current
+    tmp_path = f"{atlas_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, width, height, digest))
+        f.write(sheet.tobytes())
+    os.replace(tmp_path, atlas_path)
+    return atlas_path
+
+
+class IconAtlas:
+    """Read-only view of a packed icon atlas.
+
+    The pixel data is memory-mapped where the platform allows it, so
+    opening the atlas costs one header read and icons are paged in as
+    they are used.  Sub-images are numpy views into the sheet, cached by
+    name.
+    """
+
+    def __init__(self, atlas_path: str):
+        self.path = atlas_path
+        with open(index_path_for(atlas_path), encoding='utf-8') as f:
+            index = json.load(f)
+        self.offsets = {name: tuple(box) for name, box in index['icons'].items()}
+
+        with open(atlas_path, 'rb') as f:
+            header = f.read(ATLAS_HEADER.size)
+            magic, version, width, height, digest = ATLAS_HEADER.unpack(header)
+            if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+                raise ValueError(f"Not a version {ATLAS_VERSION} icon atlas: {atlas_path}")
+            if digest.hex() != index.get('digest'):
+                raise ValueError(f"Icon atlas and its index are out of step: {atlas_path}")
+            self.width, self.height = width, height
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Empty sheet, or no mmap on this file system
+                f.seek(0)
+                self._buffer = f.read()
+        self.sheet = np.frombuffer(self._buffer, dtype=np.uint8, count=width * height * 4,
+                                   offset=ATLAS_HEADER.size).reshape(height, width, 4)
+        self._cache = {}
+
+    @classmethod
+    def load(cls, icon_dir: str = DEFAULT_ICON_DIR, atlas_path: Optional[str] = None,
+             build: bool = True) -> Optional['IconAtlas']:
+        """Open the atlas for an icon directory, rebuilding it first if the
+        icons changed; None if there is no usable atlas"""
+        atlas_path = atlas_path or os.path.join(icon_dir, ATLAS_FILE)
+        try:
+            if build:
+                build_atlas(icon_dir, atlas_path)
+            return cls(atlas_path)
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+    @staticmethod
+    def stored_digest(atlas_path: str) -> Optional[bytes]:
+        """Source digest recorded in an atlas file, if it is readable"""
+        try:
+            with open(atlas_path, 'rb') as f:
+                magic, version, _, _, digest = ATLAS_HEADER.unpack(f.read(ATLAS_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            return None
+        return digest
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.offsets
+
+    def names(self, category: Optional[str] = None) -> List[str]:
+        """Icon names, optionally only those of one category"""
+        if category is None:
+            return sorted(self.offsets)
+        return sorted(name for name in self.offsets if name.startswith(f"{category}/"))
+
+    def image(self, name: str) -> Optional[np.ndarray]:
+        """RGBA pixels of one icon as a read-only array, or None if missing"""
+        icon = self._cache.get(name)
+        if icon is None:
+            box = self.offsets.get(name)
+            if box is None:
+                return None
+            x, y, w, h = box
+            icon = self.sheet[y:y + h, x:x + w]
+            self._cache[name] = icon
+        return icon
+
+
+class QtIconCache:
+    """Shared QPixmaps for the PyQt prototypes.
+
+    Icons come from the atlas when one has been built; regions without an
+    extracted shield fall back to a lettered badge that is painted once and
+    then reused, instead of every widget parsing its own stylesheet.
+    Create it after the QApplication.
+    """
+
+    def __init__(self, atlas: Optional[IconAtlas] = None, badge_size: int = 32):
+        self.atlas = atlas
+        self.badge_size = badge_size
+        self._pixmaps = {}
+
+    def pixmap(self, name: str):
+        """Pixmap for an atlas icon name, or None if the atlas lacks it"""
+        if name in self._pixmaps:
+            return self._pixmaps[name]
+        pixmap = None
+        icon = self.atlas.image(name) if self.atlas is not None else None
+        if icon is not None:
+            from PyQt6.QtGui import QImage, QPixmap
+
+            data = np.ascontiguousarray(icon)
+            h, w = data.shape[:2]
+            image = QImage(data.data, w, h, 4 * w, QImage.Format.Format_RGBA8888)
+            pixmap = QPixmap.fromImage(image.copy())  # copy() detaches from the numpy buffer
+        self._pixmaps[name] = pixmap
+        return pixmap
+
+    def region(self, region_name: str):
+        """Pixmap for a region: its extracted shield, else a badge"""
+        key = region_name.lower().replace(' ', '_')
+        pixmap = self.pixmap(f"regions/{key}")
+        if pixmap is None:
+            pixmap = self._pixmaps.get(f"badge/{region_name}")
+            if pixmap is None:
+                pixmap = self._badge(region_name)
+                self._pixmaps[f"badge/{region_name}"] = pixmap
+        return pixmap
+
+    def _badge(self, region_name: str):
+        from PyQt6.QtCore import QRectF, Qt
+        from PyQt6.QtGui import QColor, QFont, QPainter, QPixmap
+
+        size = self.badge_size
+        pixmap = QPixmap(size, size)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(REGION_COLORS.get(region_name, '#666666')))
+        painter.drawRoundedRect(QRectF(0, 0, size, size), 4, 4)
+        font = QFont()
+        font.setBold(True)
+        font.setPixelSize(14)
+        painter.setFont(font)
+        painter.setPen(QColor('white'))
+        painter.drawText(QRectF(0, 0, size, size), Qt.AlignmentFlag.AlignCenter, region_name[:1])
+        painter.end()
+        return pixmap
+
+
+_shared_cache = None
+
+
+def shared_icons() -> QtIconCache:
+    """The process-wide QtIconCache, loading the atlas on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = QtIconCache(IconAtlas.load())
+    return _shared_cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    icon_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ICON_DIR
+    path = build_atlas(icon_dir, force=True)
+    atlas = IconAtlas(path)
+    print(f"Packed {len(atlas.offsets)} icons into {atlas.width}x{atlas.height} {path}")
@@ -3,23 +3,36 @@ import numpy as np
 from PIL import Image
 import os
 import pytesseract
-from typing import Tuple, List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, Dict, Optional
 import re
 
+from icon_atlas import IconAtlas, build_atlas
+from icon_recognizer import MIN_CONFIDENCE, IconRecognizer
+from name_matcher import NameMatcher
+from segmentation import row_bands, shield_boxes
+from ocr_cache import OCR_CACHE_FILE, OcrCache, StageTimer, crop_key, ocr_batch, plan_batches
+
 class IconExtractor:
     def __init__(self):
         # Define expected icon sizes and positions
         self.creature_icon_size = (24, 24)  # Approximate size for creature icons
         self.method_icon_size = (20, 20)    # Approximate size for method icons
-        self.region_icon_size = (30, 20)    # Approximate size for region shields
+        self.region_icon_size = (22, 33)    # Approximate size for region shields
+        self.shield_ink_threshold = 128     # Darker than the light card borders around shields
         
         # Column positions (approximate x-coordinates)
         self.creature_col_x = 50  # X coordinate where creature icons typically appear
         self.method_col_x = 400   # X coordinate where method icons typically appear
+
+        # Row and shield detection: 'profile' (projection profiles, in strips)
+        # or 'morphology' (erode/dilate and contour tracing)
+        self.segmentation = 'profile'
         
         # OCR configuration
         self.tesseract_config = '--psm 6'  # Assume uniform text block
         self.min_confidence = 60  # Minimum confidence score for OCR results
+        self.max_text_distance = 80  # Farthest a shield's label can be, in pixels
         
         # Create output directories
         self.base_dir = "extracted_icons"
@@ -29,6 +42,14 @@ class IconExtractor:
             "regions": os.path.join(self.base_dir, "regions")
         }
         self._create_directories()
+
+        # Row OCR results survive between runs, keyed by the preprocessed crop
+        self.ocr_cache = OcrCache(os.path.join(self.base_dir, OCR_CACHE_FILE))
+        self.timer = StageTimer()
+
+        # Known icons are matched by hash and template before falling back to OCR
+        self.min_match_confidence = MIN_CONFIDENCE
+        self._recognizer = None
         
         # Initialize mappings for consistent naming and text correction
         self.known_creatures = {
@@ -49,31 +70,52 @@ class IconExtractor:
             "tracking": ["tracking", "traking"],
             "bird_snare": ["bird snare", "birdsnare", "bird-snare"]
         }
+        self._name_matcher = None
 
     def extract_icons(self, image_path: str):
         """Main method to extract icons from the game interface."""
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Could not load image: {image_path}")
-            
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        rows = self._extract_table_rows(img_rgb)
-        
-        for row in rows:
-            # Extract text from the entire row first
-            row_text = self._extract_text_from_row(row)
-            
-            # Extract and save creature icon
-            creature_icon = self._extract_creature_icon(row)
-            creature_name = self._get_creature_name(row_text)
-            if creature_icon is not None and creature_name:
-                self._save_icon(creature_icon, "creatures", creature_name)
-            
-            # Extract and save method icon
-            method_icon = self._extract_method_icon(row)
-            method_name = self._get_method_name(row_text)
-            if method_icon is not None and method_name:
-                self._save_icon(method_icon, "methods", method_name)
+        self.extract_many([image_path], workers=1)
+
+    def extract_many(self, image_paths: List[str], workers: Optional[int] = None):
+        """Extract icons from many table screenshots in one pass.
+
+        Every row is preprocessed and hashed first.  Rows already in the OCR
+        cache are not read again; the rest are stitched into batches of one
+        tesseract call each, spread over a process pool when there is more
+        than one batch.  Per-stage times accumulate in self.timer.
+
+        Args:
+            image_paths: screenshots of the hunting table
+            workers: OCR processes; 1 keeps everything in this process
+        """
+        rows = []
+        for image_path in image_paths:
+            with self.timer.stage('load'):
+                img = cv2.imread(image_path)
+                if img is None:
+                    raise ValueError(f"Could not load image: {image_path}")
+                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            with self.timer.stage('segment'):
+                rows.extend(self._extract_table_rows(img_rgb))
+
+        # Rows whose icons are all known already need no OCR and add nothing
+        with self.timer.stage('recognize'):
+            unknown = [row for row in rows if not self._icons_known(row)]
+
+        texts = self._ocr_rows(unknown, workers) if unknown else []
+
+        with self.timer.stage('icons'):
+            for row, row_text in zip(unknown, texts):
+                # Extract and save creature icon
+                creature_icon = self._extract_creature_icon(row)
+                creature_name, method_name = self._get_names(row_text)
+                if creature_icon is not None and creature_name:
+                    self._save_icon(creature_icon, "creatures", creature_name)
+                
+                # Extract and save method icon
+                method_icon = self._extract_method_icon(row)
+                if method_icon is not None and method_name:
+                    self._save_icon(method_icon, "methods", method_name)
 
     def extract_region_icons(self, image_path: str):
         """Extract region shield icons from the regions interface."""
@@ -87,17 +129,28 @@ class IconExtractor:
         gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
         text_blocks = self._extract_text_blocks(gray)
         
-        # Detect shield-shaped regions
-        _, thresh = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+        # Detect shield-shaped regions, then label them all in one lookup
+        shields = self._find_shields(gray)
+        centres = [(x + w//2, y + h//2) for x, y, w, h in shields]
+        names = self._get_nearest_texts(text_blocks, centres)
+        for (x, y, w, h), region_name in zip(shields, names):
+            if region_name:
+                self._save_icon(img_rgb[y:y+h, x:x+w], "regions", region_name)
+
+    def _find_shields(self, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes of shield-shaped blobs in a grayscale screenshot."""
+        if self.segmentation == 'profile':
+            return shield_boxes(gray, self.region_icon_size,
+                                ink_threshold=self.shield_ink_threshold)
+
+        _, thresh = cv2.threshold(gray, self.shield_ink_threshold, 255, cv2.THRESH_BINARY_INV)
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
+        boxes = []
         for contour in contours:
             x, y, w, h = cv2.boundingRect(contour)
             if self._is_shield_shaped(w, h):
-                region_icon = img_rgb[y:y+h, x:x+w]
-                region_name = self._get_nearest_text(text_blocks, (x + w//2, y + h//2))
-                if region_name:
-                    self._save_icon(region_icon, "regions", region_name)
+                boxes.append((x, y, w, h))
+        return boxes
 
     def _create_directories(self):
         """Create necessary directories for icon storage."""
@@ -106,6 +159,13 @@ class IconExtractor:
 
     def _extract_table_rows(self, img_rgb: np.ndarray) -> List[np.ndarray]:
         """Extract individual rows from the table."""
+        if self.segmentation == 'profile':
+            # Same rows as below, from one pass of row profiles
+            return [img_rgb[y1:y2, :] for y1, y2 in row_bands(img_rgb)]
+        return self._extract_table_rows_morphology(img_rgb)
+
+    def _extract_table_rows_morphology(self, img_rgb: np.ndarray) -> List[np.ndarray]:
+        """Extract individual rows from the table with erode/dilate line detection."""
         # Convert to grayscale
         gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
         
@@ -235,8 +295,40 @@ class IconExtractor:
             
         return True
 
-    def _extract_text_from_row(self, row: np.ndarray) -> str:
-        """Extract all text from a table row using OCR."""
+    @property
+    def recognizer(self) -> IconRecognizer:
+        """Hash and template index over the extracted icons, built on first use."""
+        if self._recognizer is None:
+            self._recognizer = IconRecognizer.from_atlas(IconAtlas.load(self.base_dir))
+        return self._recognizer
+
+    def _icons_known(self, row: np.ndarray) -> bool:
+        """Check if every icon found in a row matches a known icon."""
+        for icon, category in ((self._extract_creature_icon(row), "creatures"),
+                               (self._extract_method_icon(row), "methods")):
+            if icon is not None and \
+                    self.recognizer.match(icon, category, self.min_match_confidence)[0] is None:
+                return False
+        return True
+
+    def recognize_row(self, row: np.ndarray) -> Tuple[Optional[str], Optional[str]]:
+        """Creature and method names of a table row.
+
+        Icons are matched against the known icon set first; tesseract only
+        runs when one of them has no confident match.
+        """
+        creature, _ = self.recognizer.match(self._extract_creature_icon(row), "creatures",
+                                            self.min_match_confidence)
+        method, _ = self.recognizer.match(self._extract_method_icon(row), "methods",
+                                          self.min_match_confidence)
+        if creature is None or method is None:
+            ocr_creature, ocr_method = self._get_names(self._extract_text_from_row(row))
+            creature = creature or ocr_creature
+            method = method or ocr_method
+        return creature, method
+
+    def _preprocess_row(self, row: np.ndarray) -> np.ndarray:
+        """Binarize and pad a table row for OCR."""
         # Convert to grayscale
         gray = cv2.cvtColor(row, cv2.COLOR_RGB2GRAY)
         
@@ -244,31 +336,73 @@ class IconExtractor:
         _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
         # Add padding around text for better OCR
-        padded = cv2.copyMakeBorder(thresh, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=255)
-        
-        # Extract text using Tesseract
-        text = pytesseract.image_to_string(padded, config=self.tesseract_config)
-        return text.strip().lower()
+        return cv2.copyMakeBorder(thresh, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=255)
+
+    def _extract_text_from_row(self, row: np.ndarray) -> str:
+        """Extract all text from a table row using OCR."""
+        return self._ocr_rows([row], workers=1)[0]
+
+    def _ocr_rows(self, rows: List[np.ndarray], workers: Optional[int] = None) -> List[str]:
+        """OCR text of many rows, through the cache and in batches."""
+        with self.timer.stage('preprocess'):
+            crops = [self._preprocess_row(row) for row in rows]
+            keys = [crop_key(crop, self.tesseract_config) for crop in crops]
+
+        with self.timer.stage('cache'):
+            texts = {}
+            misses = {}  # Pixel-identical rows are only read once
+            for key, crop in zip(keys, crops):
+                text = self.ocr_cache.get(key)
+                if text is None:
+                    misses.setdefault(key, crop)
+                else:
+                    texts[key] = text
+
+        if misses:
+            with self.timer.stage('ocr'):
+                miss_keys = list(misses)
+                images = list(misses.values())
+                batches = [[images[i] for i in batch] for batch in plan_batches(images)]
+                if len(batches) > 1 and workers != 1:
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        results = executor.map(ocr_batch, batches,
+                                               [self.tesseract_config] * len(batches))
+                        results = list(results)
+                else:
+                    results = [ocr_batch(batch, self.tesseract_config) for batch in batches]
+            for key, text in zip(miss_keys, (text for batch in results for text in batch)):
+                texts[key] = text
+                self.ocr_cache.put(key, text)
+            self.ocr_cache.save()
+
+        return [texts[key] for key in keys]
+
+    def report_timings(self) -> str:
+        """Per-stage timings and OCR cache hit rate since the last reset."""
+        cache = self.ocr_cache
+        lookups = cache.hits + cache.misses
+        rate = cache.hits / lookups if lookups else 0.0
+        return f"{self.timer.report()}\nOCR cache: {cache.hits}/{lookups} hits ({rate:.0%})"
     
+    @property
+    def name_matcher(self) -> NameMatcher:
+        """Matcher compiled from hunter_data.csv and the variant lists, on first use."""
+        if self._name_matcher is None:
+            self._name_matcher = NameMatcher.from_data(self.known_creatures, self.known_methods)
+        return self._name_matcher
+
+    def _get_names(self, row_text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Creature and method file names in row text, from one matcher pass."""
+        match = self.name_matcher.match(row_text)
+        return self._clean_filename(match.creature), match.method
+
     def _get_creature_name(self, row_text: str) -> str:
         """Extract and normalize creature name from row text."""
-        for normalized_name, variants in self.known_creatures.items():
-            for variant in variants:
-                if variant in row_text:
-                    # Extract the full creature name using surrounding context
-                    pattern = fr'\b\w+\s*{variant}\b'
-                    match = re.search(pattern, row_text)
-                    if match:
-                        return match.group(0).replace(' ', '_')
-        return None    
+        return self._get_names(row_text)[0]
     
     def _get_method_name(self, row_text: str) -> str:
         """Extract and normalize method name from row text."""
-        for normalized_name, variants in self.known_methods.items():
-            for variant in variants:
-                if variant in row_text:
-                    return normalized_name
-        return None    
+        return self.name_matcher.match(row_text).method
     
     def _extract_text_blocks(self, gray_img: np.ndarray) -> List[Dict]:
         """Extract text blocks with their positions."""
@@ -290,19 +424,33 @@ class IconExtractor:
 
     def _get_nearest_text(self, text_blocks: List[Dict], point: Tuple[int, int]) -> str:
         """Find the nearest text block to a given point."""
-        min_dist = float('inf')
-        nearest_text = None
-        
-        for block in text_blocks:
-            # Calculate distance to center of text block
-            block_center = (block['x'] + block['w']//2, block['y'] + block['h']//2)
-            dist = np.sqrt((point[0] - block_center[0])**2 + (point[1] - block_center[1])**2)
-            
-            if dist < min_dist:
-                min_dist = dist
-                nearest_text = block['text']
-        
-        return self._clean_filename(nearest_text) if nearest_text else None
+        return self._get_nearest_texts(text_blocks, [point])[0]
+
+    def _get_nearest_texts(self, text_blocks: List[Dict],
+                           points: List[Tuple[int, int]]) -> List[Optional[str]]:
+        """Find the nearest text block to each of many points at once.
+
+        Distances from every point to every block centre are computed as
+        one array per chunk of points; blocks farther than
+        max_text_distance count as no match.
+        """
+        if not text_blocks or not points:
+            return [None] * len(points)
+        centres = np.array([(b['x'] + b['w']//2, b['y'] + b['h']//2) for b in text_blocks],
+                           dtype=np.int64)
+        points = np.asarray(points, dtype=np.int64)
+        limit = self.max_text_distance ** 2
+        # Bound the distance matrix to about a million entries
+        chunk = max(1, 1_000_000 // len(centres))
+        names = []
+        for start in range(0, len(points), chunk):
+            diff = points[start:start + chunk, None, :] - centres[None, :, :]
+            dist = np.einsum('ijk,ijk->ij', diff, diff)
+            nearest = dist.argmin(axis=1)
+            for block, d in zip(nearest.tolist(), dist[np.arange(len(nearest)), nearest].tolist()):
+                text = text_blocks[block]['text'] if d <= limit else None
+                names.append(self._clean_filename(text) if text else None)
+        return names
 
     def _is_shield_shaped(self, width: int, height: int) -> bool:
         """Check if the detected contour matches shield icon dimensions."""
@@ -377,15 +525,27 @@ class IconExtractor:
             icon_pil = icon_pil.resize(size, Image.Resampling.LANCZOS)
         
         # Save the image
-        icon_pil.save(output_path)   
+        icon_pil.save(output_path)
+        self._recognizer = None  # Pick up the new icon on next use
+
+    def build_icon_atlas(self, force: bool = False) -> str:
+        """Pack the extracted icons into the atlas the GUI loads.
+
+        Returns:
+            Path of the atlas file
+        """
+        return build_atlas(self.base_dir, force=force)
 
 # Example usage
 if __name__ == "__main__":
     extractor = IconExtractor()
     
     # Extract from hunting table
-    extractor.extract_icons("creature1.png")
-    extractor.extract_icons("creature2.png")
+    extractor.extract_many(["creature1.png", "creature2.png"])
     
     # Extract region shields
-    extractor.extract_region_icons("regions.png")
\ No newline at end of file
+    extractor.extract_region_icons(os.path.join("..", "region.png"))
+
+    # Pack everything into one sheet for the GUI
+    extractor.build_icon_atlas()
+    print(extractor.report_timings())
\ No newline at end of file
@@ -0,0 +1,101 @@
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from icon_atlas import IconAtlas
+
+HASH_SIZE = 8         # 8x8 low-frequency DCT block -> 64-bit hash
+DCT_SIZE = 32
+TEMPLATE_SIZE = 16    # Side of the normalized template compared after hashing
+MAX_DISTANCE = 12     # Hamming distance still considered a candidate
+MIN_CONFIDENCE = 0.85 # Normalized correlation needed to trust a match
+
+
+def _gray(icon: np.ndarray) -> np.ndarray:
+    if icon.ndim == 2:
+        return icon.astype(np.float32)
+    if icon.shape[2] == 4:
+        # Flatten transparency onto white, like the table background
+        alpha = icon[..., 3:4].astype(np.float32) / 255
+        rgb = icon[..., :3].astype(np.float32) * alpha + 255 * (1 - alpha)
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    return cv2.cvtColor(icon, cv2.COLOR_RGB2GRAY).astype(np.float32)
+
+
+def perceptual_hash(icon: np.ndarray) -> np.uint64:
+    """64-bit DCT hash: which low frequencies are above their median"""
+    small = cv2.resize(_gray(icon), (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:HASH_SIZE, :HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])
+    return np.packbits(bits).view('>u8')[0].astype(np.uint64)
+
+
+def template(icon: np.ndarray) -> np.ndarray:
+    """Zero-mean, unit-length vector of a downscaled icon, so a dot product
+    of two templates is their normalized correlation"""
+    small = cv2.resize(_gray(icon), (TEMPLATE_SIZE, TEMPLATE_SIZE),
+                       interpolation=cv2.INTER_AREA).flatten()
+    small -= small.mean()
+    norm = np.linalg.norm(small)
+    return small / norm if norm else small
+
+
+def hamming(hashes: np.ndarray, query: np.uint64) -> np.ndarray:
+    """Bit distance from query to every hash in an array"""
+    diff = np.bitwise_xor(hashes, query)
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class IconRecognizer:
+    """Recognizes known creature and method icons without OCR.
+
+    Built from the icon atlas: each icon gets a perceptual hash and a
+    normalized template.  A query is hashed, compared against every known
+    hash of its category in one vectorized Hamming pass, and the closest
+    candidates are confirmed by template correlation.
+    """
+
+    def __init__(self, icons: Dict[str, np.ndarray]):
+        self.categories = {}
+        by_category = {}
+        for name, icon in sorted(icons.items()):
+            category, _, stem = name.partition('/')
+            by_category.setdefault(category, []).append((stem, icon))
+        for category, entries in by_category.items():
+            names = [stem for stem, _ in entries]
+            hashes = np.array([perceptual_hash(icon) for _, icon in entries], dtype=np.uint64)
+            templates = np.stack([template(icon) for _, icon in entries])
+            self.categories[category] = (names, hashes, templates)
+
+    @classmethod
+    def from_atlas(cls, atlas: Optional[IconAtlas]) -> 'IconRecognizer':
+        if atlas is None:
+            return cls({})
+        names = atlas.names('creatures') + atlas.names('methods')
+        return cls({name: atlas.image(name) for name in names})
+
+    def __len__(self) -> int:
+        return sum(len(names) for names, _, _ in self.categories.values())
+
+    def match(self, icon: Optional[np.ndarray], category: str,
+              min_confidence: float = MIN_CONFIDENCE) -> Tuple[Optional[str], float]:
+        """Best known icon of a category for a crop.
+
+        Returns:
+            (name, confidence), with name None if nothing clears min_confidence
+        """
+        entry = self.categories.get(category)
+        if icon is None or entry is None or icon.size == 0:
+            return None, 0.0
+        names, hashes, templates = entry
+        distances = hamming(hashes, perceptual_hash(icon))
+        candidates = np.flatnonzero(distances <= MAX_DISTANCE)
+        if candidates.size == 0:
+            return None, 0.0
+        scores = templates[candidates] @ template(icon)
+        best = int(np.argmax(scores))
+        confidence = float(scores[best])
+        if confidence < min_confidence:
+            return None, confidence
+        return names[candidates[best]], confidence
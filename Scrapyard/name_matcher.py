@@ -0,0 +1,210 @@
+import csv
+import os
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'hunter_data.csv')
+MIN_SCORE = 0.75     # Similarity a near miss needs to be accepted
+MAX_CANDIDATES = 8   # Trigram candidates verified by edit distance per window
+
+NameMatch = namedtuple('NameMatch', [
+    'creature',        # Canonical creature name, or None
+    'creature_score',  # 1.0 for an exact variant, else edit-distance similarity
+    'method',          # Canonical method key, or None
+    'method_score',
+])
+
+WORD = re.compile(r'[a-z0-9]+(?:[\'-][a-z0-9]+)*')
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 once it is certain to exceed limit.
+
+    Only the diagonal band of width 2 * limit + 1 is filled in.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+class _Automaton:
+    """Aho-Corasick automaton over the exact variants.
+
+    A single scan of the text reports every variant occurring in it, no
+    matter how many variants there are.
+    """
+
+    def __init__(self, patterns: Dict[str, Tuple[str, str]]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((len(pattern), value))
+
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def scan(self, text: str):
+        """Yield (start, end, value) of every pattern occurrence"""
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                yield i + 1 - length, i + 1, value
+
+
+class NameMatcher:
+    """Finds the creature and method named in a line of OCR text.
+
+    Compiled once from canonical names and their known misspellings: exact
+    variants go into an Aho-Corasick automaton, and every variant into a
+    trigram index.  A query scans the text with the automaton; a kind with
+    no exact hit falls back to windows of OCR words looked up in the
+    trigram index and verified by edit distance.
+    """
+
+    def __init__(self, creatures: Dict[str, Iterable[str]], methods: Dict[str, Iterable[str]],
+                 min_score: float = MIN_SCORE):
+        self.min_score = min_score
+        variants = {}
+        for kind, names in (('creature', creatures), ('method', methods)):
+            for canonical, spellings in names.items():
+                for spelling in [canonical, *spellings]:
+                    variants.setdefault(_normalize(spelling), (kind, canonical))
+        self.automaton = _Automaton(variants)
+
+        # Trigram postings per kind, over variant ids
+        self.variants = list(variants.items())
+        self.index = {'creature': {}, 'method': {}}
+        self.max_words = {'creature': 1, 'method': 1}
+        for i, (spelling, (kind, _)) in enumerate(self.variants):
+            for gram in trigrams(spelling):
+                self.index[kind].setdefault(gram, []).append(i)
+            self.max_words[kind] = max(self.max_words[kind], spelling.count(' ') + 1)
+
+    @classmethod
+    def from_data(cls, known_creatures: Dict[str, List[str]], known_methods: Dict[str, List[str]],
+                  data_path: str = DEFAULT_DATA_PATH, min_score: float = MIN_SCORE) -> 'NameMatcher':
+        """Matcher over the creature names in hunter_data.csv.
+
+        known_creatures maps a name word such as 'kebbit' to its OCR
+        misspellings; each misspelling is expanded into every full creature
+        name containing the word.  Without the CSV, the words themselves are
+        the creature names.
+        """
+        try:
+            with open(data_path, newline='', encoding='utf-8') as f:
+                names = [row['Name'].strip() for row in csv.DictReader(f) if row.get('Name')]
+        except (OSError, KeyError):
+            names = list(known_creatures)
+
+        creatures = {}
+        for name in names:
+            spellings = set()
+            for word, misspellings in known_creatures.items():
+                pattern = re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE)
+                if pattern.search(name):
+                    spellings.update(pattern.sub(m, name) for m in misspellings)
+            creatures[name] = spellings
+        return cls(creatures, known_methods, min_score)
+
+    def match(self, text: str) -> NameMatch:
+        """Best creature and method in the text, each with a score"""
+        text = _normalize(text)
+        best = {'creature': (None, 0.0, 0), 'method': (None, 0.0, 0)}
+        for start, end, (kind, canonical) in self.automaton.scan(text):
+            # Whole words only, longest variant wins
+            if (start and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                continue
+            if end - start > best[kind][2]:
+                best[kind] = (canonical, 1.0, end - start)
+
+        words = WORD.findall(text)
+        for kind in best:
+            if best[kind][0] is None:
+                best[kind] = self._fuzzy(kind, words) + (0,)
+        return NameMatch(best['creature'][0], best['creature'][1],
+                         best['method'][0], best['method'][1])
+
+    def _fuzzy(self, kind: str, words: List[str]) -> Tuple[Optional[str], float]:
+        index = self.index[kind]
+        best_name, best_score = None, 0.0
+        seen = set()
+        for size in range(1, self.max_words[kind] + 1):
+            for i in range(len(words) - size + 1):
+                window = ' '.join(words[i:i + size])
+                if window in seen:
+                    continue
+                seen.add(window)
+                grams = trigrams(window)
+                shared = {}
+                for gram in grams:
+                    for variant in index.get(gram, ()):
+                        shared[variant] = shared.get(variant, 0) + 1
+                # Dice coefficient on trigrams picks the few worth verifying
+                ranked = sorted(shared, key=lambda v: -2 * shared[v] /
+                                (len(grams) + len(self.variants[v][0]) + 1))
+                for variant in ranked[:MAX_CANDIDATES]:
+                    spelling, (_, canonical) = self.variants[variant]
+                    longest = max(len(spelling), len(window))
+                    # No need to look past what would still beat the best so far
+                    limit = int(longest * (1 - max(self.min_score, best_score)))
+                    # Each edit breaks at most three trigrams
+                    if shared[variant] < longest + 1 - 3 * limit:
+                        continue
+                    distance = edit_distance(window, spelling, limit)
+                    if distance > limit:
+                        continue
+                    score = 1 - distance / longest
+                    if score > best_score:
+                        best_name, best_score = canonical, score
+        return best_name, best_score
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pytesseract
+
+OCR_CACHE_VERSION = 1
+OCR_CACHE_FILE = 'ocr_cache.json'
+
+# Stitched batches stay well under tesseract's 32767 px image limit
+MAX_BATCH_HEIGHT = 8000
+MAX_BATCH_ROWS = 64
+BATCH_GAP = 24  # White rows between stitched crops, so lines never merge
+
+
+def crop_key(image: np.ndarray, config: str) -> str:
+    """Digest of a preprocessed crop and the tesseract settings it is read with"""
+    digest = hashlib.sha256()
+    digest.update(f"{config}\0{image.shape}\0{image.dtype}\0".encode('utf-8'))
+    digest.update(np.ascontiguousarray(image).tobytes())
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """Persistent crop digest -> OCR text cache.
+
+    Lives as one JSON file next to the extracted icons.  Lookups are in
+    memory; save() writes the file back atomically, and only if something
+    was added.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = self._read()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != OCR_CACHE_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def get(self, key: str) -> Optional[str]:
+        text = self.entries.get(key)
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        self.entries[key] = text
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': OCR_CACHE_VERSION, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError:
+            pass  # Only costs a re-read next time
+
+
+def plan_batches(images: List[np.ndarray]) -> List[List[int]]:
+    """Group crop indices into batches that fit one stitched image"""
+    batches = []
+    current = []
+    height = 0
+    for i, image in enumerate(images):
+        h = image.shape[0] + BATCH_GAP
+        if current and (height + h > MAX_BATCH_HEIGHT or len(current) >= MAX_BATCH_ROWS):
+            batches.append(current)
+            current, height = [], 0
+        current.append(i)
+        height += h
+    if current:
+        batches.append(current)
+    return batches
+
+
+def stitch(images: List[np.ndarray]) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Stack grayscale crops on a white sheet, one above the other.
+
+    Returns the sheet and the (top, bottom) band of each crop.
+    """
+    width = max(image.shape[1] for image in images)
+    height = sum(image.shape[0] + BATCH_GAP for image in images)
+    sheet = np.full((height, width), 255, dtype=np.uint8)
+    bands = []
+    y = 0
+    for image in images:
+        h, w = image.shape[:2]
+        sheet[y:y + h, :w] = image
+        bands.append((y, y + h))
+        y += h + BATCH_GAP
+    return sheet, bands
+
+
+def split_words(data: Dict[str, list], bands: List[Tuple[int, int]]) -> List[str]:
+    """Text of each band from one image_to_data result.
+
+    Words are assigned to the band holding their vertical centre and
+    rejoined line by line, as image_to_string would print them.
+    """
+    lines = [dict() for _ in bands]
+    tops = np.array([top for top, _ in bands])
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        if not word:
+            continue
+        centre = data['top'][i] + data['height'][i] // 2
+        band = int(np.searchsorted(tops, centre, side='right')) - 1
+        if band < 0 or centre >= bands[band][1]:
+            continue  # In a gap between crops
+        line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines[band].setdefault(line, []).append((data['left'][i], word))
+    return ['\n'.join(' '.join(word for _, word in sorted(words))
+                      for _, words in sorted(band_lines.items())).strip().lower()
+            for band_lines in lines]
+
+
+def ocr_batch(images: List[np.ndarray], config: str) -> List[str]:
+    """OCR many preprocessed crops with a single tesseract call"""
+    sheet, bands = stitch(images)
+    data = pytesseract.image_to_data(sheet, config=config, output_type=pytesseract.Output.DICT)
+    return split_words(data, bands)
+
+
+class StageTimer:
+    """Accumulated wall time and call counts per pipeline stage"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+
+    def report(self) -> str:
+        total = sum(self.seconds.values()) or 1.0
+        lines = [f"{'stage':<12}{'calls':>7}{'seconds':>10}{'share':>8}"]
+        for name, seconds in self.seconds.items():
+            lines.append(f"{name:<12}{self.calls[name]:>7}{seconds:>10.3f}{seconds / total:>8.0%}")
+        return '\n'.join(lines)
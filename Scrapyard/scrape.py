@@ -1,81 +1,274 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import asyncio
+import csv
+import hashlib
+import json
 import os
+import shutil
+import sys
+from collections import Counter
 from pathlib import Path
+from urllib.parse import unquote, urlsplit, urlunsplit
 
-def download_images(url, output_dir='downloaded_images'):
+import aiohttp
+
+# rumours.csv cells holding asset URLs: creature icon and page, both
+# location pages, method page and method icon
+URL_COLUMNS = (1, 2, 4, 6, 8, 9)
+
+
+def asset_urls(csv_path='rumours.csv'):
+    """Stream the URL columns of rumours.csv into a deduplicated list"""
+    urls = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            for col in URL_COLUMNS:
+                url = row[col].strip() if col < len(row) else ''
+                if url.startswith(('http://', 'https://')):
+                    urls[url] = None
+    return list(urls)
+
+
+def rebase_url(url, base_url):
+    """Point a URL at another host, e.g. a local fixture server"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path,
+                       parts.query, ''))
+
+
+def asset_filename(url):
+    """File name to materialize an asset under, from its URL path"""
+    path = unquote(urlsplit(url).path)
+    name = os.path.basename(path) or 'index'
+    if '/images/' not in path and not os.path.splitext(name)[1]:
+        name += '.html'  # Wiki pages
+    return name
+
+
+def output_names(urls):
+    """Readable file name for each URL.
+
+    URLs whose names would clash, also when compared case-insensitively
+    as on Windows, get a short hash of the URL added to the name, so the
+    choice depends only on the URLs and not on which download ends first.
     """
-    Download all images from a webpage, particularly focusing on webp images in hyperlinks.
-    
-    Args:
-        url (str): The webpage URL to scrape
-        output_dir (str): Directory to save the downloaded images
+    names = {url: asset_filename(url) for url in urls}
+    counts = Counter(name.lower() for name in names.values())
+    for url, name in names.items():
+        if counts[name.lower()] > 1:
+            stem, ext = os.path.splitext(name)
+            names[url] = f"{stem}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:8]}{ext}"
+    return names
+
+
+class AssetFetcher:
+    """Concurrent, resumable downloader for the wiki assets in rumours.csv.
+
+    All requests share one pooled aiohttp session, and at most `concurrency`
+    run at once.  Downloads land in a content-addressed cache
+    (objects/<sha256>) with an index of URL -> digest and validators, so
+    unchanged assets cost one conditional request (ETag/Last-Modified) and
+    a 304.  Bytes are streamed to partial/ first; an interrupted run
+    resumes them with a Range request guarded by If-Range.
+
+    The index is written once per fetch_all, after every download has
+    finished or failed, rather than rewritten after each asset.  Each
+    asset is also linked into output_dir under the name output_names
+    gives it.
+
+    For testing, base_url (or HUNTER_ASSET_BASE_URL) redirects every
+    request to a local server laid out like the wiki's paths, such as the
+    ETag and Range capable tests/asset_server.py.
     """
-    # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    
-    # Fetch the webpage
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print(f"Error fetching the webpage: {e}")
-        return
-    
-    # Parse HTML
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Find all images, both direct and within links
-    images = []
-    
-    # Direct img tags
-    images.extend(soup.find_all('img'))
-    
-    # Images within links
-    for link in soup.find_all('a'):
-        images.extend(link.find_all('img'))
-    
-    # Download each image
-    for i, img in enumerate(images, 1):
-        # Get image URL
-        img_url = img.get('src')
-        if not img_url:
-            continue
-            
-        # Convert relative URLs to absolute URLs
-        img_url = urljoin(url, img_url)
-        
+
+    def __init__(self, cache_dir='asset_cache', output_dir='downloaded_images', concurrency=8,
+                 base_url=None, retries=3, timeout=30):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.partial_dir = self.cache_dir / 'partial'
+        self.index_path = self.cache_dir / 'index.json'
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.concurrency = concurrency
+        self.base_url = base_url or os.environ.get('HUNTER_ASSET_BASE_URL')
+        self.retries = retries
+        self.timeout = timeout
+        self.index = self._read_index()
+        self.stats = {'downloaded': 0, 'resumed': 0, 'not_modified': 0, 'failed': 0}
+
+        for directory in (self.objects_dir, self.partial_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def _read_index(self):
         try:
-            # Fetch image
-            img_response = requests.get(img_url)
-            img_response.raise_for_status()
-            
-            # Generate filename
-            parsed_url = urlparse(img_url)
-            filename = os.path.basename(parsed_url.path)
-            if not filename:
-                filename = f'image_{i}.webp'
-            elif not os.path.splitext(filename)[1]:
-                filename += '.webp'
-                
-            # Save image
-            filepath = os.path.join(output_dir, filename)
-            with open(filepath, 'wb') as f:
-                f.write(img_response.content)
-            
-            print(f"Downloaded: {filename}")
-            
-        except requests.RequestException as e:
-            print(f"Error downloading {img_url}: {e}")
-            continue
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        tmp_path = self.index_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest
+
+    def path_for(self, url):
+        """Cached file for a URL, if it has been fetched"""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        path = self.object_path(entry['sha256'])
+        return path if path.exists() else None
+
+    def fetch_all(self, urls):
+        """Fetch every URL; returns URL -> cached path (None on failure)"""
+        return asyncio.run(self._fetch_all(urls))
+
+    async def _fetch_all(self, urls):
+        names = output_names(urls)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout, sock_connect=self.timeout)
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                results = await asyncio.gather(*(self._fetch(session, semaphore, url, names[url])
+                                                 for url in urls))
+        finally:
+            # Also on interruption, so finished objects are not fetched again
+            self._write_index()
+        return dict(zip(urls, results))
+
+    async def _fetch(self, session, semaphore, url, name):
+        async with semaphore:
+            for attempt in range(self.retries):
+                try:
+                    path = await self._fetch_once(session, url)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == self.retries - 1:
+                        print(f"Error downloading {url}: {e}")
+                        self.stats['failed'] += 1
+                        return None
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        if path is not None and self.output_dir:
+            self._materialize(path, self.output_dir / name)
+        return path
+
+    async def _fetch_once(self, session, url):
+        entry = self.index.get(url)
+        cached = self.path_for(url)
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        part_path = self.partial_dir / f'{key}.part'
+        meta_path = self.partial_dir / f'{key}.json'
+
+        headers = {}
+        if cached is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        else:
+            offset, validator = self._partial_state(part_path, meta_path)
+            if offset and validator:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+
+        async with session.get(rebase_url(url, self.base_url), headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                self.stats['not_modified'] += 1
+                return cached
+            response.raise_for_status()
+
+            validators = {'etag': response.headers.get('ETag'),
+                          'last_modified': response.headers.get('Last-Modified')}
+            if response.status == 206 and 'Range' in headers:
+                mode = 'ab'
+                self.stats['resumed'] += 1
+            else:
+                mode = 'wb'
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(validators, f)
+            with open(part_path, mode) as f:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    f.write(chunk)
+
+        digest = self._file_digest(part_path)
+        path = self.object_path(digest)
+        path.parent.mkdir(exist_ok=True)
+        os.replace(part_path, path)
+        meta_path.unlink(missing_ok=True)
+
+        self.index[url] = dict(validators, sha256=digest, size=path.stat().st_size)
+        self.stats['downloaded'] += 1
+        return path
+
+    @staticmethod
+    def _partial_state(part_path, meta_path):
+        """Bytes already on disk for an interrupted download, and the
+        validator to resume them with"""
+        try:
+            offset = part_path.stat().st_size
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return 0, None
+        # A weak ETag can't guard a range request
+        etag = meta.get('etag')
+        if etag and not etag.startswith('W/'):
+            return offset, etag
+        return offset, meta.get('last_modified')
+
+    @staticmethod
+    def _file_digest(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _materialize(source, target):
+        """Put a cached object at its readable name, sharing the bytes if possible"""
+        if target.exists():
+            if target.stat().st_ino == source.stat().st_ino:
+                return
+            target.unlink()
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+
+
+def download_assets(csv_path='rumours.csv', output_dir='downloaded_images', **kwargs):
+    """Fetch every asset referenced by rumours.csv"""
+    fetcher = AssetFetcher(output_dir=output_dir, **kwargs)
+    results = fetcher.fetch_all(asset_urls(csv_path))
+    stats = fetcher.stats
+    print(f"{stats['downloaded']} downloaded ({stats['resumed']} resumed), "
+          f"{stats['not_modified']} not modified, {stats['failed']} failed")
+    return results
+
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <url>")
-        sys.exit(1)
-        
-    url = sys.argv[1]
-    download_images(url)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Download the wiki assets listed in rumours.csv")
+    parser.add_argument('csv', nargs='?', default='rumours.csv')
+    parser.add_argument('--output', default='downloaded_images')
+    parser.add_argument('--cache', default='asset_cache')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--base-url', default=None,
+                        help="serve every request from this host instead, e.g. a fixture server")
+    args = parser.parse_args()
+
+    results = download_assets(args.csv, args.output, cache_dir=args.cache,
+                              concurrency=args.concurrency, base_url=args.base_url)
+    sys.exit(0 if all(results.values()) else 1)
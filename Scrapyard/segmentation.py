@@ -0,0 +1,151 @@
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+STRIP_HEIGHT = 1024  # Rows of the screenshot converted and profiled at a time
+
+
+def erosion_extents(kernel_len: int, iterations: int = 3) -> Tuple[int, int]:
+    """How far a horizontal erosion of the given length, repeated, reaches
+    left and right of each pixel"""
+    kernel_len = max(kernel_len, 1)
+    anchor = kernel_len // 2
+    return iterations * anchor, iterations * (kernel_len - 1 - anchor)
+
+
+def _sliding_all(padded: np.ndarray, n: int, width: int) -> np.ndarray:
+    """For each of the first `width` columns, whether the n columns
+    starting there are all set; O(log n) shifted ANDs"""
+    size = 1
+    while size * 2 <= n:
+        padded = padded[:, :-size] & padded[:, size:]
+        size *= 2
+    if size < n:
+        padded = padded[:, :-(n - size)] & padded[:, n - size:]
+    return padded[:, :width]
+
+
+def line_mask(ink: np.ndarray, left: int, right: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows of a binary strip holding a horizontal run that survives an
+    erosion reaching `left` and `right` pixels, and those runs as a mask.
+
+    Same result as eroding and dilating with a horizontal kernel, built
+    from shifted ANDs and ORs instead.  Past the image edge counts as ink
+    for the erosion, as in cv2.erode.
+    """
+    h, w = ink.shape
+    n = left + right + 1
+    window = np.ones((h, w + n - 1), dtype=bool)
+    window[:, left:left + w] = ink
+    eroded = _sliding_all(window, n, w)
+    rows = np.flatnonzero(eroded.any(axis=1))
+
+    # Grow what survived back over its runs: x is kept if any eroded pixel
+    # in [x - right, x + left] survived, i.e. not all of them are missing
+    window = np.ones((rows.size, w + n - 1), dtype=bool)
+    window[:, right:right + w] = ~eroded[rows]
+    return rows, ~_sliding_all(window, n, w)
+
+
+def component_tops(rows: np.ndarray, mask: np.ndarray) -> List[int]:
+    """Top row of each 8-connected blob of a line mask given only for the
+    listed rows, as contour tracing of the full mask would find them"""
+    if rows.size == 0:
+        return []
+    # Keep rows that were not adjacent apart with a blank row
+    gaps = np.concatenate(([0], np.cumsum(np.diff(rows) > 1)))
+    compact = np.zeros((rows.size + gaps[-1], mask.shape[1]), dtype=np.uint8)
+    positions = np.arange(rows.size) + gaps
+    compact[positions] = mask
+    real_row = np.zeros(compact.shape[0], dtype=np.int64)
+    real_row[positions] = rows
+    contours, _ = cv2.findContours(compact, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return sorted(int(real_row[contour[:, 0, 1].min()]) for contour in contours)
+
+
+def row_profiles(img_rgb: np.ndarray, ink_threshold: int, kernel_len: int,
+                 strip_height: int = STRIP_HEIGHT) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """Separator line tops, and gray sum and sum of squares of every row.
+
+    The image is converted and profiled in strips, so the temporaries
+    never grow past one strip whatever the screenshot height.
+    """
+    height = img_rgb.shape[0]
+    left, right = erosion_extents(kernel_len)
+    lines = []
+    sums = np.zeros(height, dtype=np.int64)
+    squares = np.zeros(height, dtype=np.int64)
+    for top in range(0, height, strip_height):
+        gray = cv2.cvtColor(img_rgb[top:top + strip_height], cv2.COLOR_RGB2GRAY)
+        bottom = top + gray.shape[0]
+        rows, mask = line_mask(gray <= ink_threshold, left, right)
+        lines.append((rows + top, mask))
+        # Squares fit float32 exactly and their row sums fit float64 exactly
+        sums[top:bottom] = cv2.reduce(gray, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+        squares[top:bottom] = cv2.reduce(cv2.multiply(gray, gray, dtype=cv2.CV_32F), 1,
+                                         cv2.REDUCE_SUM, dtype=cv2.CV_64F).ravel()
+    if not lines:
+        return [], sums, squares
+    rows, masks = zip(*lines)
+    return component_tops(np.concatenate(rows), np.concatenate(masks)), sums, squares
+
+
+def row_bands(img_rgb: np.ndarray, ink_threshold: int = 240, min_row_height: int = 20,
+              min_std: float = 5, strip_height: int = STRIP_HEIGHT) -> List[Tuple[int, int]]:
+    """(top, bottom) of each table row, between horizontal separator lines.
+
+    A separator starts at the top of each connected group of long
+    horizontal ink runs.  Bands shorter than min_row_height or whose gray
+    standard deviation is under min_std (empty space) are dropped.
+    """
+    height, width = img_rgb.shape[:2]
+    tops, sums, squares = row_profiles(img_rgb, ink_threshold, width // 100, strip_height)
+    boundaries = [0] + tops + [height]
+
+    # Prefix sums give any band's variance without touching pixels; kept in
+    # integers, n^2 * variance = n * sum(x^2) - sum(x)^2 is exact
+    total = [0] + np.cumsum(sums).tolist()
+    total_sq = [0] + np.cumsum(squares).tolist()
+    bands = []
+    for y1, y2 in zip(boundaries[:-1], boundaries[1:]):
+        if y2 - y1 < min_row_height:
+            continue
+        n = (y2 - y1) * width
+        s, sq = total[y2] - total[y1], total_sq[y2] - total_sq[y1]
+        if n * sq - s * s >= (min_std * n) ** 2:
+            bands.append((y1, y2))
+    return bands
+
+
+def ink_bands(ink: np.ndarray) -> List[Tuple[int, int]]:
+    """(top, bottom) of each run of rows holding ink, from the row profile"""
+    has_ink = ink.any(axis=1).view(np.int8)
+    edges = np.diff(np.concatenate(([0], has_ink, [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def shield_boxes(gray: np.ndarray, size: Tuple[int, int], tolerance: int = 5,
+                 ink_threshold: int = 200) -> List[Tuple[int, int, int, int]]:
+    """(x, y, w, h) of every blob whose bounding box is within tolerance of size.
+
+    Blank rows split the screenshot into bands that cannot share a blob.
+    Bands too short to hold a shield, such as lines of text, are skipped
+    without tracing a contour; the rest are traced one band at a time and
+    their boxes size-tested together.
+    """
+    ink = gray <= ink_threshold
+    boxes = []
+    for top, bottom in ink_bands(ink):
+        if bottom - top <= size[1] - tolerance:
+            continue
+        band = ink[top:bottom].view(np.uint8)
+        contours, _ = cv2.findContours(band, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            continue
+        rects = np.array([cv2.boundingRect(contour) for contour in contours])
+        keep = (np.abs(rects[:, 2] - size[0]) < tolerance) & \
+               (np.abs(rects[:, 3] - size[1]) < tolerance)
+        rects[:, 1] += top
+        boxes.extend(map(tuple, rects[keep].tolist()))
+    return boxes
@@ -0,0 +1,12 @@
+"""Benchmarks for the app's hot paths, on synthetic data of any size.
+
+    python -m bench generate data.csv --creatures 100000 --regions 16 --givers 40
+    python -m bench run --sizes 1000,10000,100000 --out results.json
+    python -m bench compare baseline.json results.json
+
+run times app startup (import plus data load), the query and results
+formatting paths behind the Get New dialog and Find Available Monsters,
+and the IconExtractor stages on the bundled screenshots, and writes
+the results as JSON.  compare exits non-zero when a result is slower than
+its baseline by more than the threshold.
+"""
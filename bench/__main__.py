@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+
+from bench import cases
+from bench.results import (THRESHOLD, compare, format_comparison, format_results,
+                           make_report, read_report, write_report)
+from bench.synthetic import generate, read_metadata
+from hunter_index import cache_dir
+
+CASES = ['startup', 'available', 'find_monsters', 'icons']
+SIZES = [1000, 10000, 100000, 1000000]
+BUDGET = 600.0  # Safety net: seconds a case may take at one size before larger ones are skipped
+
+
+def dataset(data_dir, creatures, regions, givers, seed):
+    """Path and metadata of a synthetic CSV, generated on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{creatures}_{regions}r_{givers}g_{seed}.csv")
+    metadata = read_metadata(path)
+    if metadata is None or not os.path.exists(path):
+        print(f"Generating {creatures} creatures...", file=sys.stderr)
+        metadata = generate(path, creatures, regions, givers, seed)
+    return path, metadata
+
+
+def run(sizes, regions, givers, selected, queries, repeat, budget, data_dir, seed=0):
+    """Run the selected cases over synthetic data of each size.
+
+    Every size up to 10^6 creatures runs well within the default budget,
+    which is only a safety net for slow machines or larger sizes: once a
+    case takes longer than budget seconds at one size it is marked skipped
+    at every larger size.
+    """
+    results = []
+    over_budget = {}
+    snapshot_dir = os.path.join(data_dir, 'cache')
+    os.environ['HUNTER_CACHE_DIR'] = snapshot_dir
+
+    def measure(case, labels, fn):
+        """Run one case and record its result; returns it, or None"""
+        if case in over_budget:
+            results.append(dict(labels, case=case, skipped=over_budget[case]))
+            return None
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except cases.CaseSkipped as e:
+            over_budget[case] = str(e)
+            results.append(dict(labels, case=case, skipped=str(e)))
+            return None
+        except Exception as e:
+            results.append(dict(labels, case=case, error=f"{type(e).__name__}: {e}"))
+            return None
+        if time.perf_counter() - start > budget:
+            over_budget[case] = f"over {budget:.0f}s at {labels.get('creatures')} creatures"
+        return result
+
+    if 'icons' in selected:
+        stages = measure('icons', {}, cases.bench_icon_extractor)
+        for stage, stats in (stages or {}).items():
+            results.append(dict(stats, case=f"icons.{stage}"))
+
+    for size in sizes:
+        labels = {'creatures': size, 'regions': regions, 'givers': givers}
+        pending = [case for case in selected if case != 'icons']
+        if pending and all(case in over_budget or 'load' in over_budget for case in pending):
+            # Not worth generating data nothing will run on
+            for case in pending:
+                results.append(dict(labels, case=case,
+                                    skipped=over_budget.get(case, over_budget.get('load'))))
+            continue
+        path, metadata = dataset(data_dir, size, regions, givers, seed)
+        rumor_givers = metadata['rumor_givers']
+
+        if 'startup' in selected:
+            timings = measure('startup', labels, lambda: cases.bench_startup(
+                path, rumor_givers, regions, snapshot_dir, repeat, timeout=budget))
+            if timings is None:
+                # Loading in this process would take at least as long
+                over_budget.setdefault('load', results[-1].get('skipped', 'startup failed'))
+            else:
+                results.append(dict(timings[0], case='startup.cold', **labels))
+                results.append(dict(timings[1], case='startup.warm', **labels))
+
+        query_cases = [case for case in ('available', 'find_monsters') if case in selected]
+        if not query_cases:
+            continue
+
+        def load():
+            from hunter_engine import HunterQueryEngine
+            return HunterQueryEngine.load(path, rumor_givers, regions)
+
+        engine = None if 'load' in over_budget else measure('load', labels, load)
+        if engine is None:
+            for case in query_cases:
+                results.append(dict(labels, case=case, skipped=over_budget.get('load', 'no data')))
+            continue
+        app = cases.headless_app(engine, path)
+        inputs = cases.make_queries(engine.index, list(rumor_givers), queries, seed)
+        for case in query_cases:
+            fn = getattr(cases, f"bench_{case}")
+            stats = measure(case, labels, lambda: fn(app, inputs, repeat))
+            if stats is not None:
+                results.append(dict(stats, case=case, **labels))
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m bench',
+                                     description="Benchmarks for the hunter app's hot paths")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="write a synthetic hunter_data.csv")
+    gen.add_argument('out')
+    gen.add_argument('--creatures', type=int, default=1000)
+    gen.add_argument('--regions', type=int, default=10)
+    gen.add_argument('--givers', type=int, default=6)
+    gen.add_argument('--seed', type=int, default=0)
+
+    run_cmd = commands.add_parser('run', help="run benchmarks and write JSON results")
+    run_cmd.add_argument('--out', default='bench_results.json')
+    run_cmd.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                         help="comma-separated creature counts")
+    run_cmd.add_argument('--regions', type=int, default=10)
+    run_cmd.add_argument('--givers', type=int, default=6)
+    run_cmd.add_argument('--cases', default=','.join(CASES),
+                         help=f"comma-separated subset of {', '.join(CASES)}")
+    run_cmd.add_argument('--queries', type=int, default=50, help="inputs per query case")
+    run_cmd.add_argument('--repeat', type=int, default=3)
+    run_cmd.add_argument('--budget', type=float, default=BUDGET,
+                         help="safety net: seconds per case before larger sizes are skipped")
+    run_cmd.add_argument('--data-dir', default=os.path.join(cache_dir(), 'bench'),
+                         help="where synthetic datasets are kept between runs")
+    run_cmd.add_argument('--seed', type=int, default=0)
+
+    cmp_cmd = commands.add_parser('compare', help="compare results against a baseline")
+    cmp_cmd.add_argument('baseline')
+    cmp_cmd.add_argument('current')
+    cmp_cmd.add_argument('--threshold', type=float, default=THRESHOLD,
+                         help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        generate(args.out, args.creatures, args.regions, args.givers, args.seed)
+        print(f"Wrote {args.out}")
+        return 0
+
+    if args.command == 'run':
+        selected = [case for case in args.cases.split(',') if case]
+        unknown = set(selected) - set(CASES)
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        results = run(sizes, args.regions, args.givers, selected, args.queries,
+                      args.repeat, args.budget, args.data_dir, args.seed)
+        settings = {key: value for key, value in vars(args).items() if key != 'command'}
+        write_report(make_report(results, settings, cases.REPO_DIR), args.out)
+        print(format_results(results))
+        print(f"Wrote {args.out}")
+        return 0
+
+    rows, regressions = compare(read_report(args.baseline), read_report(args.current),
+                                args.threshold)
+    print(format_comparison(rows, regressions))
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from hunter_engine import ALWAYS_ON_REGIONS, BACK_TO_BACK_OFF, MAX_LEVEL, MIN_LEVEL
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPYARD_DIR = os.path.join(REPO_DIR, 'Scrapyard')
+SCREENSHOTS = ['creature1.png', 'creature2.png']
+MIN_CALLS = 3
+QUERY_SECONDS = 10.0  # Query cases stop repeating after this, once MIN_CALLS are in
+
+# Run in a fresh interpreter, so imports are timed cold
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import hunter
+imported = time.perf_counter()
+from hunter_engine import HunterQueryEngine
+from hunter_markov import RumorChain
+engine = HunterQueryEngine.load(sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3]))
+RumorChain(engine)
+loaded = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'load_ms': (loaded - imported) * 1000}))
+'''
+
+
+class CaseSkipped(Exception):
+    """A case could not run here, or not within the time budget"""
+
+
+def summarize(times):
+    """Statistics of a list of per-call times in milliseconds"""
+    times = sorted(times)
+    return {
+        'calls': len(times),
+        'min_ms': times[0],
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': times[-1],
+    }
+
+
+class _Var:
+    """Stand-in for a Tk variable"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def headless_app(engine, data_path):
+    """A HunterApp holding the data but no widgets, so its own query and
+    formatting methods run without a display"""
+    from hunter import HunterApp
+    from hunter_markov import RumorChain
+
+    app = HunterApp.__new__(HunterApp)
+    app.data_path = data_path
+    app.engine = engine
+    app.index = engine.index
+    app.chain = RumorChain(engine)
+    app.rumor_givers = engine.rumor_givers
+    app._df = None
+    app._atlas = None
+    app.level_var = _Var('')
+    app.checkbox_vars = {region: _Var(region in ALWAYS_ON_REGIONS) for region in app.index.regions}
+    app.quest_vars = {quest: _Var(True) for quest in app.index.quests}
+    app.back_to_back_var = _Var(False)
+    app.current_assignments = {giver: {'task': None} for giver in engine.rumor_givers}
+    app.active_giver = None
+    return app
+
+
+def make_queries(index, givers, count, seed=0):
+    """Random (level, regions, assignments) inputs, as a player would set them.
+
+    Regions always include the always-on ones plus a random half of the
+    rest; each giver holds one of its own creatures half the time.
+    """
+    rng = random.Random(seed)
+    optional = [region for region in index.regions if region not in ALWAYS_ON_REGIONS]
+    pools = {giver: index.names_of(index.giver_masks[giver]) for giver in givers}
+    queries = []
+    for _ in range(count):
+        level = rng.randint(MIN_LEVEL, MAX_LEVEL)
+        regions = [r for r in index.regions if r in ALWAYS_ON_REGIONS] + \
+                  [r for r in optional if rng.random() < 0.5]
+        assignments = {giver: rng.choice(pool) for giver, pool in pools.items()
+                       if pool and rng.random() < 0.5}
+        queries.append((level, regions, assignments))
+    return queries
+
+
+def _set_inputs(app, level, regions, assignments):
+    app.level_var.set(str(level))
+    selected = set(regions)
+    for region, var in app.checkbox_vars.items():
+        var.set(region in selected)
+    for giver, info in app.current_assignments.items():
+        info['task'] = assignments.get(giver)
+    app.active_giver = next(iter(assignments), None)
+
+
+def _timed_queries(queries, repeat, max_seconds):
+    """Queries to run, repeated, until max_seconds have been spent once at
+    least MIN_CALLS ran; large datasets get fewer calls, not longer runs"""
+    deadline = time.perf_counter() + max_seconds
+    for i, query in enumerate(query for _ in range(repeat) for query in queries):
+        if i >= MIN_CALLS and time.perf_counter() > deadline:
+            return
+        yield query
+
+
+def bench_available(app, queries, repeat=3, max_seconds=QUERY_SECONDS):
+    """HunterApp.get_available_assignments for every giver, per query"""
+    times = []
+    for query in _timed_queries(queries, repeat, max_seconds):
+        _set_inputs(app, *query)
+        start = time.perf_counter()
+        for giver in app.rumor_givers:
+            app.get_available_assignments(giver)
+        times.append((time.perf_counter() - start) * 1000)
+    return summarize(times)
+
+
+def bench_find_monsters(app, queries, repeat=3, max_seconds=QUERY_SECONDS):
+    """The results pane lines find_monsters shows, built uncached per query"""
+    times = []
+    lines = 0
+    quests = app.completed_quests()
+    for level, regions, assignments in _timed_queries(queries, repeat, max_seconds):
+        active = next(iter(assignments), None)
+        start = time.perf_counter()
+        _, result = app.build_results(level, regions, assignments, BACK_TO_BACK_OFF,
+                                      active, quests)
+        times.append((time.perf_counter() - start) * 1000)
+        lines += len(result)
+    stats = summarize(times)
+    stats['lines'] = lines // len(times)
+    return stats
+
+
+def bench_startup(data_path, rumor_givers, region_count, cache_dir, repeat=3, timeout=None):
+    """Import of the app plus data load, in fresh interpreters.
+
+    The first run starts without an index snapshot (a first launch);
+    the rest load the snapshot it wrote.
+
+    Returns:
+        (cold, warm) statistics
+    """
+    env = dict(os.environ, HUNTER_CACHE_DIR=cache_dir)
+    args = [sys.executable, '-c', STARTUP_SCRIPT, data_path, json.dumps(rumor_givers),
+            str(region_count)]
+    runs = []
+    for _ in range(1 + repeat):
+        start = time.perf_counter()
+        try:
+            output = subprocess.run(args, cwd=REPO_DIR, env=env, capture_output=True,
+                                    text=True, timeout=timeout, check=True).stdout
+        except subprocess.TimeoutExpired:
+            raise CaseSkipped(f"startup took over {timeout:.0f}s")
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(e.stderr.strip().splitlines()[-1] if e.stderr else str(e))
+        result = json.loads(output.strip().splitlines()[-1])
+        result['process_ms'] = (time.perf_counter() - start) * 1000
+        runs.append(result)
+
+    def stats(runs):
+        result = summarize([run['import_ms'] + run['load_ms'] for run in runs])
+        for key in ('import_ms', 'load_ms', 'process_ms'):
+            result[key] = statistics.median(run[key] for run in runs)
+        return result
+
+    return stats(runs[:1]), stats(runs[1:])
+
+
+def bench_icon_extractor(screenshots=None):
+    """IconExtractor stage times on the bundled table screenshots.
+
+    Runs in a scratch directory, so the OCR cache and icon folders start
+    empty.  Needs the tesseract binary.
+
+    Returns:
+        statistics per stage, keyed by stage name
+    """
+    screenshots = [os.path.join(SCRAPYARD_DIR, name) for name in (screenshots or SCREENSHOTS)]
+    if SCRAPYARD_DIR not in sys.path:
+        sys.path.insert(0, SCRAPYARD_DIR)
+    try:
+        import pytesseract
+        from icon_extractor import IconExtractor
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        raise CaseSkipped(f"IconExtractor unavailable: {e}")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            extractor = IconExtractor()
+            start = time.perf_counter()
+            extractor.extract_many(screenshots, workers=1)
+            total = (time.perf_counter() - start) * 1000
+        finally:
+            os.chdir(cwd)
+
+    stages = {name: {'calls': extractor.timer.calls[name],
+                     'median_ms': seconds * 1000 / extractor.timer.calls[name],
+                     'total_ms': seconds * 1000}
+              for name, seconds in extractor.timer.seconds.items()}
+    stages['total'] = {'calls': 1, 'median_ms': total, 'total_ms': total}
+    return stages
@@ -0,0 +1,96 @@
+import json
+import os
+import platform
+import subprocess
+import time
+
+RESULTS_VERSION = 1
+METRIC = 'median_ms'
+THRESHOLD = 0.10  # Slowdown reported as a regression
+
+
+def result_key(result):
+    """What a result is compared on between runs"""
+    return (result['case'], result.get('creatures'), result.get('regions'), result.get('givers'))
+
+
+def _commit(repo_dir):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(results, settings, repo_dir):
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit(repo_dir),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'settings': settings,
+        'results': results,
+    }
+
+
+def write_report(report, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_report(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    if report.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {report.get('version')}")
+    return report
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Match the results of two reports and rate each change.
+
+    Returns:
+        (rows, regressions): rows of (key, baseline ms, current ms, ratio)
+        for every result measured in both, and the keys of those slower
+        than the baseline by more than threshold
+    """
+    before = {result_key(r): r for r in baseline['results'] if METRIC in r}
+    rows = []
+    regressions = []
+    for result in current['results']:
+        key = result_key(result)
+        if METRIC not in result or key not in before:
+            continue
+        old, new = before[key][METRIC], result[METRIC]
+        ratio = new / old if old else float('inf')
+        rows.append((key, old, new, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def format_comparison(rows, regressions):
+    lines = [f"{'case':<28}{'creatures':>10}{'regions':>8}{'givers':>7}"
+             f"{'base ms':>12}{'new ms':>12}{'change':>9}"]
+    for key, old, new, ratio in rows:
+        case, creatures, regions, givers = key
+        flag = '  REGRESSION' if key in regressions else ''
+        lines.append(f"{case:<28}{creatures or '-':>10}{regions or '-':>8}{givers or '-':>7}"
+                     f"{old:>12.3f}{new:>12.3f}{ratio - 1:>+9.1%}{flag}")
+    return '\n'.join(lines)
+
+
+def format_results(results):
+    lines = [f"{'case':<28}{'creatures':>10}{'median ms':>12}{'mean ms':>12}{'calls':>7}"]
+    for r in results:
+        if 'skipped' in r or 'error' in r:
+            lines.append(f"{r['case']:<28}{r.get('creatures') or '-':>10}  "
+                         f"{'skipped: ' + r['skipped'] if 'skipped' in r else 'error: ' + r['error']}")
+            continue
+        lines.append(f"{r['case']:<28}{r.get('creatures') or '-':>10}{r['median_ms']:>12.3f}"
+                     f"{r.get('mean_ms', r['median_ms']):>12.3f}{r['calls']:>7}")
+    return '\n'.join(lines)
@@ -0,0 +1,97 @@
+import csv
+import json
+import os
+import random
+
+from hunter_engine import ALWAYS_ON_REGIONS, MAX_LEVEL, MIN_LEVEL, RUMOR_GIVERS
+
+# Column names of the bundled hunter_data.csv, used first so the synthetic
+# files work with the app's fixed region and giver settings
+REGIONS = ['Misthalin/Karamja', 'Asgarnia', 'Kandarin', 'Mortyania', 'Wilderness',
+           'Desert', 'Fremenik', 'Tirannwn', 'Zeah', 'Varlamore']
+GIVERS = list(RUMOR_GIVERS)
+
+ADJECTIVES = ['Tropical', 'Wild', 'Sapphire', 'Swamp', 'Spined', 'Desert', 'Polar',
+              'Barb-tailed', 'Crimson', 'Golden', 'Pyre', 'Snowy', 'Dashing',
+              'Sabre-toothed', 'Horned', 'Moonlight', 'Sunlight', 'Copper', 'Feldip',
+              'Embertailed']
+NOUNS = ['Wagtail', 'Kebbit', 'Glacialis', 'Lizard', 'Larupia', 'Graahk', 'Kyatt',
+         'Swift', 'Chinchompa', 'Jerboa', 'Antelope', 'Moth', 'Salamander', 'Longtail',
+         'Weasel', 'Sapsucker', 'Butterfly', 'Herbiboar', 'Implings', 'Ferret']
+
+
+def metadata_path_for(csv_path):
+    """Location of the generator's description of a synthetic CSV"""
+    return os.path.splitext(csv_path)[0] + '.synthetic.json'
+
+
+def column_names(regions, givers):
+    """Region and giver column names: the real ones first, then numbered"""
+    region_names = REGIONS[:regions] + [f"Region {i + 1}" for i in range(len(REGIONS), regions)]
+    giver_names = GIVERS[:givers] + [f"Giver {i + 1}" for i in range(len(GIVERS), givers)]
+    return region_names, giver_names
+
+
+def giver_levels(giver_names):
+    """Hunter level requirement of each giver; the real givers keep theirs
+    and the numbered ones are spread over the level range"""
+    levels = {}
+    for i, giver in enumerate(giver_names):
+        levels[giver] = RUMOR_GIVERS.get(giver, MIN_LEVEL + i * 7 % (MAX_LEVEL - MIN_LEVEL + 1))
+    return levels
+
+
+def creature_name(i):
+    """Unique creature name for an index, readable for the first 400"""
+    name = f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[i // len(ADJECTIVES) % len(NOUNS)]}"
+    block = i // (len(ADJECTIVES) * len(NOUNS))
+    return f"{name} {block + 1}" if block else name
+
+
+def generate(path, creatures, regions=10, givers=6, seed=0):
+    """Write a hunter_data.csv shaped file of synthetic creatures.
+
+    Every creature lives in one to three regions and is assigned by one
+    giver whose level requirement is at least the creature's level where
+    possible, as in the real data.  The output is deterministic for a
+    seed.  A JSON file next to the CSV records the region count and the
+    giver levels, which the CSV itself cannot express.
+
+    Returns:
+        the metadata written next to the CSV
+    """
+    if regions < len(ALWAYS_ON_REGIONS):
+        raise ValueError(f"Need at least {len(ALWAYS_ON_REGIONS)} regions")
+    rng = random.Random(seed)
+    region_names, giver_names = column_names(regions, givers)
+    levels = giver_levels(giver_names)
+    by_level = sorted(giver_names, key=levels.get)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Level'] + region_names + giver_names)
+        for i in range(creatures):
+            level = rng.randint(1, MAX_LEVEL)
+            found = set(rng.sample(range(regions), rng.randint(1, min(3, regions))))
+            eligible = [g for g in by_level if levels[g] >= level] or by_level[-1:]
+            giver = rng.choice(eligible)
+            writer.writerow([creature_name(i), level]
+                            + ['TRUE' if r in found else 'FALSE' for r in range(regions)]
+                            + ['TRUE' if g == giver else '' for g in giver_names])
+    os.replace(tmp_path, path)
+
+    metadata = {'creatures': creatures, 'regions': regions, 'seed': seed,
+                'rumor_givers': levels}
+    with open(metadata_path_for(path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=1)
+    return metadata
+
+
+def read_metadata(csv_path):
+    """Generator metadata for a CSV, or None for a file it did not write"""
+    try:
+        with open(metadata_path_for(csv_path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
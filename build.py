@@ -2,6 +2,9 @@ import os
 import sys
 from pathlib import Path
 
+from hunter_atlas import build_atlas
+from hunter_table import build_table
+
 def create_build_script():
     """
     Creates a build script that includes the full HunterApp class
@@ -16,12 +19,21 @@ def create_build_script():
     end_index = original_code.find('if __name__ == "__main__":')
     hunter_app_code = original_code[start_index:end_index].strip()
 
-    script_content = '''import os
+    script_content = '''import time
+START_TIME = time.perf_counter()
+
+import os
 import sys
-import pandas as pd
 import tkinter as tk
+from contextlib import nullcontext
 from tkinter import ttk
 from tkinter import messagebox
+from hunter_engine import (ALWAYS_ON_REGIONS, BACK_TO_BACK_OFF, BACK_TO_BACK_ON, MAX_LEVEL,
+                           MIN_LEVEL, HunterQueryEngine, ResultCache)
+from hunter_atlas import BlockAtlas, atlas_digest, atlas_path_for, quest_state_of
+from hunter_index import iter_ids
+from hunter_markov import RumorChain
+from hunter_view import ResultsView, UpdateScheduler
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
@@ -36,10 +48,19 @@ def resource_path(relative_path):
 ''' + hunter_app_code + '''
 
 def main():
+    options = parse_args()
     try:
+        profiler = make_profiler(options)
         root = tk.Tk()
-        app = HunterApp(root)
+        app = HunterApp(root, profiler)
+        track_first_paint(root, app)
+        if options.get('watch'):
+            app.start_watch(options['watch'])
+        if profiler is not None:
+            profiler.attach(root)
         root.mainloop()
+        if profiler is not None:
+            profiler.save()
     except Exception as e:
         messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
 
@@ -47,10 +68,10 @@ if __name__ == "__main__":
     main()
 '''
 
-    # Modify the CSV loading line to use resource_path
+    # Modify the CSV path to use resource_path
     script_content = script_content.replace(
-        "self.df = pd.read_csv('hunter_data.csv')",
-        "self.df = pd.read_csv(resource_path('hunter_data.csv'))"
+        "self.data_path = 'hunter_data.csv'",
+        "self.data_path = resource_path('hunter_data.csv')"
     )
 
     # Write the modified script to a new file
@@ -65,10 +86,10 @@ block_cipher = None
 
 a = Analysis(
     ['hunter_build.py'],
-    pathex=[],
+    pathex=['Scrapyard'],
     binaries=[],
-    datas=[('hunter_data.csv', '.')],
-    hiddenimports=['pandas', 'tkinter'],
+    datas=[('hunter_data.csv', '.'), ('hunter_table.bin', '.'), ('hunter_atlas.bin', '.')],
+    hiddenimports=['tkinter'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -119,6 +140,14 @@ def main():
     if not os.path.exists('build'):
         os.makedirs('build')
 
+    # Regenerate the availability table if hunter_data.csv has changed
+    if build_table('hunter_data.csv', 'hunter_table.bin'):
+        print("Rebuilt hunter_table.bin from hunter_data.csv")
+
+    # Likewise the block atlas, recomputing only the shards that changed
+    if build_atlas('hunter_data.csv', 'hunter_atlas.bin', processes=os.cpu_count() or 1):
+        print("Rebuilt hunter_atlas.bin from hunter_data.csv")
+
     # Create the modified Python script and spec file
     print("Creating build files...")
     create_build_script()
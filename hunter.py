@@ -1,15 +1,39 @@
+import time
+START_TIME = time.perf_counter()
+
+import os
+import sys
 import tkinter as tk
+from contextlib import nullcontext
 from tkinter import ttk
-import pandas as pd
 from tkinter import messagebox
+from hunter_engine import (ALWAYS_ON_REGIONS, BACK_TO_BACK_OFF, BACK_TO_BACK_ON, MAX_LEVEL,
+                           MIN_LEVEL, HunterQueryEngine, ResultCache)
+from hunter_atlas import BlockAtlas, atlas_digest, atlas_path_for, quest_state_of
+from hunter_index import iter_ids
+from hunter_markov import RumorChain
+from hunter_view import ResultsView, UpdateScheduler
 
 class HunterApp:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
         self.root.title("Hunter Monster & Rumor Finder")
         
-        # Read CSV data
-        self.df = pd.read_csv('hunter_data.csv')
+        # In --profile mode handlers are swapped for traced ones before
+        # any widget is given them
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self)
+        
+        # Read CSV data into the bitmask index
+        self.data_path = 'hunter_data.csv'
+        self._atlas = None
+        load_start = time.perf_counter()
+        with profiler.span('load data') if profiler is not None else nullcontext():
+            self.engine = HunterQueryEngine.load(self.data_path)
+            self.index = self.engine.index
+            self.chain = RumorChain(self.engine)
+        self.load_ms = (time.perf_counter() - load_start) * 1000
         
         # Create main frame with scrollbar
         main_frame = ttk.Frame(root)
@@ -24,7 +48,7 @@ class HunterApp:
         input_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5, pady=5)
         
         # Level input
-        ttk.Label(input_frame, text="Enter your level (19-99):").grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(input_frame, text=f"Enter your level ({MIN_LEVEL}-{MAX_LEVEL}):").grid(row=0, column=0, sticky=tk.W)
         self.level_var = tk.StringVar()
         level_entry = ttk.Entry(input_frame, textvariable=self.level_var, width=10)
         level_entry.grid(row=0, column=1, sticky=tk.W)
@@ -34,7 +58,7 @@ class HunterApp:
         ttk.Label(input_frame, text="Select regions:").grid(row=1, column=0, sticky=tk.W, pady=(10,0))
         
         # Get region names (excluding Name, Level and rumor giver columns)
-        self.regions = list(self.df.columns[2:12])  # Columns 2-11 are regions
+        self.regions = self.index.regions  # Columns 2-11 are regions
         self.checkbox_vars = {}
         
         # Create region checkboxes
@@ -42,22 +66,33 @@ class HunterApp:
         region_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
         
         for i, region in enumerate(self.regions):
-            var = tk.BooleanVar(value=(region in ['Misthalin/Karamja', 'Varlamore']))
+            var = tk.BooleanVar(value=(region in ALWAYS_ON_REGIONS))
             self.checkbox_vars[region] = var
             checkbox = ttk.Checkbutton(region_frame, text=region, variable=var)
             checkbox.grid(row=i//2, column=i%2, sticky=tk.W, padx=5)
-            if region in ['Misthalin/Karamja', 'Varlamore']:
+            if region in ALWAYS_ON_REGIONS:
                 checkbox.state(['disabled'])
         
-        # Define rumor givers and their level requirements
-        self.rumor_givers = {
-            'Novice': 46,
-            'Adept(cervus)': 57,
-            'Adept(ornus)': 57,
-            'Expert(aco)': 72,
-            'xpert(teco)': 72,
-            'Master(wolf)': 91
-        }
+        # Quests that gate rumors, next to the regions; all done by default
+        ttk.Label(input_frame, text="Completed quests:").grid(
+            row=1, column=2, sticky=tk.W, padx=(20,0), pady=(10,0))
+        quest_frame = ttk.Frame(input_frame)
+        quest_frame.grid(row=2, column=2, sticky=(tk.W, tk.N), padx=(20,0))
+        self.quest_vars = {}
+        for i, quest in enumerate(self.index.quests):
+            var = tk.BooleanVar(value=True)
+            self.quest_vars[quest] = var
+            ttk.Checkbutton(quest_frame, text=quest, variable=var,
+                            command=self.on_quest_change).grid(row=i, column=0, sticky=tk.W, padx=5)
+        
+        # Back-to-back rumors are off by default in game (Guild Scribe Verity)
+        self.back_to_back_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text="Back-to-back rumors enabled",
+                        variable=self.back_to_back_var).grid(
+            row=3, column=0, columnspan=2, sticky=tk.W, pady=(10,0))
+        
+        # Rumor givers and their level requirements
+        self.rumor_givers = self.engine.rumor_givers
         
         # Current assignments frame
         self.assignments_frame = ttk.LabelFrame(main_frame, text="Current Rumor Assignments", padding="10")
@@ -68,6 +103,12 @@ class HunterApp:
         self.active_giver = None
         self.active_rumor = None
         
+        # Handlers mark givers dirty; their widgets are redrawn once per
+        # idle cycle, and only where the shown text or state changed
+        self.scheduler = UpdateScheduler(root, self.flush_updates)
+        self.watcher = None  # Screenshot watcher, in --watch mode
+        self.last_level = None
+        
         # Create assignment displays and controls for each giver
         row = 0
         for giver, req_level in self.rumor_givers.items():
@@ -101,19 +142,25 @@ class HunterApp:
             clear_btn.grid(row=row, column=5, padx=5)
             clear_btn.state(['disabled'])
             
-            # Store UI elements for this giver
+            # Store UI elements for this giver, with what they last showed
             self.current_assignments[giver] = {
                 'task': None,
                 'display': display,
                 'new_btn': new_btn,
                 'active_btn': active_btn,
                 'complete_btn': complete_btn,
-                'clear_btn': clear_btn
+                'clear_btn': clear_btn,
+                'shown_text': '',
+                'shown_states': dict.fromkeys(
+                    ('new_btn', 'active_btn', 'complete_btn', 'clear_btn'), False)
             }
             
             row += 1
             
         # Results section
+        self.results_cache = ResultCache(maxsize=128)
+        if profiler is not None:
+            profiler.add_stats("Results cache", self.results_cache.info)
         ttk.Button(main_frame, text="Find Available Monsters", 
                   command=self.find_monsters).grid(row=2, column=0, pady=10)
         
@@ -130,48 +177,83 @@ class HunterApp:
         
         results_frame.grid_columnconfigure(0, weight=1)
         results_frame.grid_rowconfigure(0, weight=1)
+        
+        # Results are patched in place rather than redrawn on every search
+        self.results_view = ResultsView(self.results_text, scrollbar)
+
+    @property
+    def atlas(self):
+        """The precomputed block atlas, or None if it is missing or stale"""
+        if self._atlas is None:
+            digest = atlas_digest(self.index.digest, self.rumor_givers)
+            self._atlas = BlockAtlas.read(atlas_path_for(self.data_path), digest) or False
+        return self._atlas or None
+
+    def completed_quests(self):
+        """Quests ticked as completed"""
+        return frozenset(quest for quest, var in self.quest_vars.items() if var.get())
 
     def update_all_displays(self):
-        """Update all giver displays"""
-        for giver in self.rumor_givers:
+        """Schedule an update of all giver displays"""
+        self.scheduler.mark(*self.rumor_givers)
+
+    def flush_updates(self, givers):
+        """Redraw the widgets of the givers marked dirty since the last flush"""
+        for giver in givers:
             self.update_display(giver)
+            self.update_buttons(giver)
 
     def update_display(self, giver):
         """Update the display for a giver's assignment"""
-        display = self.current_assignments[giver]['display']
-        task = self.current_assignments[giver]['task']
+        info = self.current_assignments[giver]
+        task = info['task']
+        if not task:
+            text = ""
+        elif giver == self.active_giver:
+            text = f"{task} (ACTIVE)"
+        else:
+            text = task
+        if text == info['shown_text']:
+            return
         
+        display = info['display']
         display.config(state='normal')
         display.delete(1.0, tk.END)
-        if task:
-            if giver == self.active_giver:
-                display.insert(tk.END, f"{task} (ACTIVE)")
-            else:
-                display.insert(tk.END, task)
+        display.insert(tk.END, text)
         display.config(state='disabled')
+        info['shown_text'] = text
+
+    def update_buttons(self, giver):
+        """Enable or disable a giver's buttons to match the current state"""
+        info = self.current_assignments[giver]
+        has_task = info['task'] is not None
+        wanted = {
+            'new_btn': (self.last_level is not None and self.last_level >= self.rumor_givers[giver]
+                        and not self.index.missing_quests(giver, self.completed_quests())),
+            'active_btn': has_task,
+            'complete_btn': has_task,
+            'clear_btn': has_task
+        }
+        for name, enabled in wanted.items():
+            if info['shown_states'][name] != enabled:
+                info[name].state(['!disabled' if enabled else 'disabled'])
+                info['shown_states'][name] = enabled
 
     def get_available_assignments(self, giver):
         """Get available assignments for a giver based on level and current assignments"""
         try:
             level = int(self.level_var.get())
-            if level < self.rumor_givers[giver]:
-                return []
             
             # Get selected regions
             selected_regions = [region for region, var in self.checkbox_vars.items() 
                               if var.get()]
             
-            # Get all possible assignments for this giver
-            giver_mask = self.df[giver] == True
-            level_mask = self.df['Level'] <= level
-            region_mask = self.df[selected_regions].any(axis=1)
-            possible = self.df[giver_mask & level_mask & region_mask]['Name'].tolist()
-            
-            # Remove assignments currently given by any giver
+            # Get all possible assignments for this giver, minus the
+            # assignments currently given by any giver
             current_tasks = {info['task'] for info in self.current_assignments.values() 
                            if info['task'] is not None}
-            
-            return [task for task in possible if task not in current_tasks]
+            return self.engine.available(giver, level, selected_regions, current_tasks,
+                                         self.completed_quests())
             
         except ValueError:
             return []
@@ -199,9 +281,9 @@ class HunterApp:
         # Populate listbox with available tasks
         task_info = {}
         for task in available:
-            monster = self.df[self.df['Name'] == task].iloc[0]
-            regions = [region for region in self.regions if monster[region]]
-            info = f"{task} (Level {int(monster['Level'])}) - {', '.join(regions)}"
+            monster_id = self.index.ids[task]
+            regions = self.index.creature_regions[monster_id]
+            info = f"{task} (Level {self.index.levels[monster_id]}) - {', '.join(regions)}"
             task_info[info] = task
             listbox.insert(tk.END, info)
         
@@ -212,12 +294,7 @@ class HunterApp:
                 task = task_info[info]
                 
                 self.current_assignments[giver]['task'] = task
-                self.update_display(giver)
-                
-                # Enable buttons
-                self.current_assignments[giver]['active_btn'].state(['!disabled'])
-                self.current_assignments[giver]['complete_btn'].state(['!disabled'])
-                self.current_assignments[giver]['clear_btn'].state(['!disabled'])
+                self.scheduler.mark(giver)
                 
                 if not self.active_giver:
                     self.make_active(giver)
@@ -242,6 +319,56 @@ class HunterApp:
         y = self.root.winfo_rooty() + (self.root.winfo_height() - dialog.winfo_height()) // 2
         dialog.geometry(f"+{x}+{y}")
 
+    def apply_detected_assignment(self, giver, task):
+        """Take an assignment read from a screenshot, as if picked in the
+        Get New dialog.  Only creatures the dialog would offer are taken:
+        misreads and creatures outside the giver's pool at the current
+        level, regions and quests, or already assigned, are ignored."""
+        info = self.current_assignments.get(giver)
+        if info is None or task not in self.get_available_assignments(giver):
+            return False
+        
+        info['task'] = task
+        self.scheduler.mark(giver)
+        
+        if not self.active_giver:
+            self.make_active(giver)
+        return True
+
+    def start_watch(self, directory, poll_ms=250):
+        """Follow a screenshot directory for rumour dialogs.
+
+        Recognition runs on the watcher's thread; detections are queued and
+        applied from a Tk timer, since widgets may only be touched from the
+        main thread.
+        """
+        import queue
+        from hunter_watch import DialogRecognizer, ScreenshotWatcher
+
+        # What the watcher last did, under the main window
+        self.watch_status = tk.StringVar(value=f"Watching {directory} for rumour dialogs")
+        ttk.Label(self.root, textvariable=self.watch_status).grid(
+            row=1, column=0, sticky=tk.W, padx=10, pady=(0, 5))
+        
+        detections = queue.SimpleQueue()
+        self.watcher = ScreenshotWatcher(
+            directory, DialogRecognizer(self.index.names), detections.put,
+            on_skip=lambda path, e: detections.put(f"Skipped {os.path.basename(path)}: {e}")).start()
+        
+        def drain():
+            while not detections.empty():
+                detection = detections.get()
+                if isinstance(detection, str):
+                    self.watch_status.set(detection)
+                elif self.apply_detected_assignment(detection.giver, detection.creature):
+                    self.watch_status.set(f"{detection.giver}: {detection.creature}")
+                else:
+                    self.watch_status.set(f"Ignored {detection.creature} from {detection.giver}: "
+                                          "not available at your level, regions and quests")
+            self.root.after(poll_ms, drain)
+        
+        self.root.after(poll_ms, drain)
+
     def make_active(self, giver):
         """Toggle a giver's assignment as the active rumor"""
         if self.active_giver == giver:
@@ -249,11 +376,11 @@ class HunterApp:
             self.active_rumor = None
         else:
             if self.active_giver:
-                self.update_display(self.active_giver)
+                self.scheduler.mark(self.active_giver)
             self.active_giver = giver
             self.active_rumor = self.current_assignments[giver]['task']
         
-        self.update_all_displays()
+        self.scheduler.mark(giver)
 
     def complete_assignment(self, giver):
         """Complete the current assignment from a giver"""
@@ -262,13 +389,7 @@ class HunterApp:
             self.active_rumor = None
         
         self.current_assignments[giver]['task'] = None
-        self.update_display(giver)
-        
-        # Update button states
-        self.current_assignments[giver]['new_btn'].state(['!disabled'])
-        self.current_assignments[giver]['active_btn'].state(['disabled'])
-        self.current_assignments[giver]['complete_btn'].state(['disabled'])
-        self.current_assignments[giver]['clear_btn'].state(['disabled'])
+        self.scheduler.mark(giver)
 
     def clear_assignment(self, giver):
         """Clear the current assignment without completing it"""
@@ -277,41 +398,50 @@ class HunterApp:
             self.active_rumor = None
         
         self.current_assignments[giver]['task'] = None
-        self.update_display(giver)
-        
-        # Update button states
-        self.current_assignments[giver]['new_btn'].state(['!disabled'])
-        self.current_assignments[giver]['active_btn'].state(['disabled'])
-        self.current_assignments[giver]['complete_btn'].state(['disabled'])
-        self.current_assignments[giver]['clear_btn'].state(['disabled'])
+        self.scheduler.mark(giver)
 
     def on_level_change(self, event=None):
         """Handle level changes"""
         try:
             level = int(self.level_var.get())
-            for giver, req_level in self.rumor_givers.items():
-                if level >= req_level:
-                    self.current_assignments[giver]['new_btn'].state(['!disabled'])
-                else:
-                    # Disable and clear assignments for givers above current level
-                    self.current_assignments[giver]['new_btn'].state(['disabled'])
-                    if self.current_assignments[giver]['task']:
-                        self.clear_assignment(giver)
         except ValueError:
-            # Invalid level - disable all new assignment buttons
-            for giver in self.rumor_givers:
-                self.current_assignments[giver]['new_btn'].state(['disabled'])
+            # Invalid level - new assignment buttons get disabled
+            level = None
+        
+        # Keys that don't change the level (arrows, shift...) need no work
+        if level == self.last_level:
+            return
+        self.last_level = level
+        
+        if level is not None:
+            # Clear assignments for givers above current level
+            for giver, req_level in self.rumor_givers.items():
+                if level < req_level and self.current_assignments[giver]['task']:
+                    self.clear_assignment(giver)
+        
+        self.scheduler.mark(*self.rumor_givers)
+
+    def on_quest_change(self):
+        """Handle quest checkbox changes"""
+        # Givers gated by a quest that is no longer done lose their rumor
+        quests = self.completed_quests()
+        for giver in self.rumor_givers:
+            if self.index.missing_quests(giver, quests) and self.current_assignments[giver]['task']:
+                self.clear_assignment(giver)
+        
+        self.scheduler.mark(*self.rumor_givers)
 
     def find_monsters(self):
             """Display all available monsters grouped by giver"""
-            self.results_text.delete(1.0, tk.END)
-            
             try:
                 level = int(self.level_var.get())
-                if level < 19 or level > 99:
-                    messagebox.showwarning("Invalid Level", "Level must be between 19 and 99")
+                if level < MIN_LEVEL or level > MAX_LEVEL:
+                    self.results_view.clear()
+                    messagebox.showwarning("Invalid Level",
+                                           f"Level must be between {MIN_LEVEL} and {MAX_LEVEL}")
                     return
             except ValueError:
+                self.results_view.clear()
                 messagebox.showwarning("Invalid Input", "Please enter a valid level")
                 return
             
@@ -319,60 +449,168 @@ class HunterApp:
                             if var.get()]
             
             if not selected_regions:
+                self.results_view.clear()
                 messagebox.showwarning("No Regions", "Please select at least one region")
                 return
             
-            # Get currently assigned tasks
-            assigned_tasks = {info['task'] for info in self.current_assignments.values() 
-                            if info['task'] is not None}
+            # Get currently assigned tasks and who holds them
+            assignments = {giver: info['task'] for giver, info in self.current_assignments.items()
+                           if info['task'] is not None}
+            back_to_back = BACK_TO_BACK_ON if self.back_to_back_var.get() else BACK_TO_BACK_OFF
+            quests = self.completed_quests()
             
-            # Display available tasks by giver
-            self.results_text.insert(tk.END, "=== Available Assignments by Giver ===\n\n")
+            # Repeated presses with the same inputs are served from the cache
+            self.results_cache.sync(self.index.digest)
+            key = (level, frozenset(selected_regions), frozenset(assignments.items()),
+                   back_to_back, self.active_giver, quests)
+            entry = self.results_cache.get(key)
+            if entry is None:
+                entry = self.build_results(level, selected_regions, assignments, back_to_back,
+                                           self.active_giver, quests)
+                self.results_cache.put(key, entry)
             
-            for giver, req_level in self.rumor_givers.items():
-                if level >= req_level:
-                    self.results_text.insert(tk.END, f"{giver} (Level {req_level}):\n")
-                    
-                    # Get monsters this giver can assign
-                    giver_mask = self.df[giver] == True
-                    level_mask = self.df['Level'] <= level
-                    region_mask = self.df[selected_regions].any(axis=1)
-                    available = self.df[giver_mask & level_mask & region_mask]
+            self.results_view.update(entry[1])
+
+    def build_results(self, level, selected_regions, assignments, back_to_back=BACK_TO_BACK_OFF,
+                      active_giver=None, quests=None):
+        """Query every giver and format the results pane lines.
+
+        assignments maps each giver to the task it currently holds.  Each
+        creature a giver could hand out next is shown with its exact chance
+        of being the next rumor, given the blocks held by the other givers.
+        If there is an active giver, the best blocks for taking new rumors
+        from it are looked up in the block atlas.  quests is the set of
+        completed quests, or None for all of them.
+
+        Returns a (results, lines) pair, where results maps each giver the
+        player has the level for to its mask of available creatures, and
+        lines is a tuple of (text, tag) pairs for the ResultsView.
+        """
+        assigned_mask = self.index.mask_of(assignments.values())
+        selected_set = set(selected_regions)
+        results = {}
+        lines = [("=== Available Assignments by Giver ===", 'giver'), ("", None)]
+        
+        for giver, req_level in self.rumor_givers.items():
+            missing = self.index.missing_quests(giver, quests)
+            if missing:
+                lines.append((f"{giver} - Requires {', '.join(missing)}", 'notice'))
+                lines.append(("", None))
+            elif level >= req_level:
+                lines.append((f"{giver} (Level {req_level}):", 'giver'))
+                
+                # Get monsters this giver can assign
+                available = self.engine.available_mask(giver, level, selected_regions,
+                                                       quests=quests)
+                results[giver] = available
+                next_odds = self.chain.next_probabilities(
+                    giver, level, selected_regions, assignments,
+                    back_to_back=back_to_back, quests=quests)
+                
+                if not available:
+                    lines.append(("  No available assignments in selected regions", 'notice'))
+                else:
+                    # Track if any unassigned tasks exist
+                    has_unassigned = bool(available & ~assigned_mask)
                     
-                    if len(available) == 0:
-                        self.results_text.insert(tk.END, "  No available assignments in selected regions\n")
-                    else:
-                        # Track if any unassigned tasks exist
-                        has_unassigned = False
+                    for monster_id in iter_ids(available):
+                        monster_regions = [region for region in self.index.creature_regions[monster_id]
+                                           if region in selected_set]
+                        name = self.index.names[monster_id]
                         
-                        for _, monster in available.iterrows():
-                            monster_regions = [region for region in selected_regions if monster[region]]
-                            name = monster['Name']
+                        # Check if task is currently assigned
+                        if assigned_mask >> monster_id & 1:
+                            status, tag = " (Currently Assigned)", 'assigned'
+                        elif next_odds.get(name):
+                            status, tag = f" [{next_odds[name]:.1%} next]", None
+                        else:
+                            status, tag = "", None
                             
-                            # Check if task is currently assigned
-                            if name in assigned_tasks:
-                                status = " (Currently Assigned)"
-                            else:
-                                status = ""
-                                has_unassigned = True
-                                
-                            result_text = (f"  {name} (Level {int(monster['Level'])})"
-                                        f" - {', '.join(monster_regions)}{status}\n")
-                            self.results_text.insert(tk.END, result_text)
-                        
-                        if not has_unassigned:
-                            self.results_text.insert(tk.END, 
-                                "  (All available tasks are currently assigned)\n")
+                        lines.append((f"  {name} (Level {self.index.levels[monster_id]})"
+                                      f" - {', '.join(monster_regions)}{status}", tag))
                     
-                    self.results_text.insert(tk.END, "\n")
-                else:
-                    self.results_text.insert(tk.END, 
-                        f"{giver} - Requires level {req_level}\n\n")
+                    if not has_unassigned:
+                        lines.append(("  (All available tasks are currently assigned)", 'notice'))
+                
+                lines.append(("", None))
+            else:
+                lines.append((f"{giver} - Requires level {req_level}", 'notice'))
+                lines.append(("", None))
+        
+        quest_state = quest_state_of(self.index, quests)
+        suggestion = None
+        if active_giver and self.atlas and quest_state is not None:
+            suggestion = self.atlas.lookup(active_giver, level, *quest_state)
+        if suggestion is not None:
+            blocks, share = suggestion
+            lines.append((f"=== Suggested Blocks for {active_giver} ===", 'giver'))
+            for blocker, task in blocks.items():
+                held = " (Held)" if assignments.get(blocker) == task else ""
+                lines.append((f"  {blocker}: {task}{held}", None))
+            if not blocks:
+                lines.append(("  No useful blocks at this level", 'notice'))
+            lines.append((f"  Undesirable rumors left: {share:.1%}", 'notice'))
+        
+        return results, tuple(lines)
+
+def track_first_paint(root, app):
+    """Measure the time from launch until the main window is first drawn.
+
+    The result is stored on the app as first_paint_ms.  If the
+    HUNTER_TIMING_LOG environment variable names a file, one CSV line of
+    timestamp, data load and first paint times (ms) is appended to it.
+    """
+    def on_map(event):
+        if event.widget is root and app.first_paint_ms is None:
+            # Redraws are idle callbacks, so this runs once they are done
+            root.after_idle(record)
+
+    def record():
+        if app.first_paint_ms is not None:
+            return
+        app.first_paint_ms = (time.perf_counter() - START_TIME) * 1000
+        log_path = os.environ.get('HUNTER_TIMING_LOG')
+        if log_path:
+            with open(log_path, 'a') as f:
+                f.write(f"{time.time():.0f},{app.load_ms:.2f},{app.first_paint_ms:.2f}\n")
+
+    app.first_paint_ms = None
+    root.bind('<Map>', on_map, add='+')
+
+def parse_args(argv=None):
+    """Command line options; argparse is only imported when there are any"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return {}
+    import argparse
+    parser = argparse.ArgumentParser(description="Hunter Monster & Rumor Finder")
+    parser.add_argument('--watch', metavar='DIR',
+                        help="fill in assignments from rumour dialogs in game screenshots saved to DIR")
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help="trace handler latency in a diagnostics window (F12), and write "
+                             "a Chrome trace to TRACE on exit if given")
+    return vars(parser.parse_args(argv))
+
+def make_profiler(options):
+    """The Profiler asked for on the command line, or None"""
+    if options.get('profile') is None:
+        return None
+    from hunter_profile import Profiler
+    return Profiler(trace_path=options['profile'] or None)
 
 def main():
+    options = parse_args()
+    profiler = make_profiler(options)
     root = tk.Tk()
-    app = HunterApp(root)
+    app = HunterApp(root, profiler)
+    track_first_paint(root, app)
+    if options.get('watch'):
+        app.start_watch(options['watch'])
+    if profiler is not None:
+        profiler.attach(root)
     root.mainloop()
+    if profiler is not None:
+        profiler.save()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,10 +4,10 @@ block_cipher = None
 
 a = Analysis(
     ['hunter_build.py'],
-    pathex=[],
+    pathex=['Scrapyard'],
     binaries=[],
-    datas=[('hunter_data.csv', '.')],
-    hiddenimports=['pandas', 'tkinter'],
+    datas=[('hunter_data.csv', '.'), ('hunter_table.bin', '.'), ('hunter_atlas.bin', '.')],
+    hiddenimports=['tkinter'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
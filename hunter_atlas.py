@@ -0,0 +1,490 @@
+import csv
+import hashlib
+import json
+import math
+import os
+import secrets
+import socket
+import struct
+import sys
+import time
+
+from hunter_index import cache_dir, file_hash, quest_spec_hash
+
+ATLAS_FILE = 'hunter_atlas.bin'
+ATLAS_MAGIC = b'HATL'
+ATLAS_VERSION = 2
+# magic, version, input sha256 (see atlas_digest), ranking sha256,
+# min level, max level, quest states, givers, creature names
+ATLAS_HEADER = struct.Struct('<4sH32s32sHHBBH')
+NO_BLOCK = 0xFFFF  # Creature ids are stored in two bytes, so this is also the limit
+
+# Quest states in atlas order, as (skipped Eagles' Peak, skipped Bone Voyage).
+# Skipping Eagles' Peak also means no At First Light, so no Master rumors
+# and no block on Wolf.
+QUEST_STATES = [(False, False), (True, False), (False, True), (True, True)]
+
+# Default ranking of rumors worth blocking (higher blocks first), after the
+# rumours.txt advice: the quest-gated rumors, then tecu salamanders and
+# moonlight moths, then sunlight moths
+DEFAULT_UNDESIRABLE = {
+    'Embertailed Jerboa': 4,
+    'Grey Chinchompa': 4,
+    'Red Chinchompa': 4,
+    'Herbiboar': 4,
+    'Sabre-Toothed Kyatt': 3,
+    'Tecu Salamander': 2,
+    'Moonlight Moth': 2,
+    'Sunlight Moth': 1,
+}
+
+# Claims older than this are assumed to belong to a dead worker
+LEASE_SECONDS = 600
+
+
+def atlas_path_for(csv_path):
+    """Location of the block atlas that belongs to a CSV file"""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), ATLAS_FILE)
+
+
+def default_work_dir():
+    """Shard queue directory used when none is given"""
+    return os.path.join(cache_dir(), 'atlas')
+
+
+def atlas_digest(csv_digest, rumor_givers):
+    """Digest of what an atlas is computed from besides the ranking: the
+    CSV, the quest definitions in the code and the giver levels"""
+    levels = json.dumps(sorted(rumor_givers.items())).encode('utf-8')
+    return hashlib.sha256(csv_digest + quest_spec_hash() + levels).digest()
+
+
+def ranking_hash(undesirable):
+    """Stable digest of an undesirable ranking"""
+    data = json.dumps(sorted(undesirable.items())).encode('utf-8')
+    return hashlib.sha256(data).digest()
+
+
+def read_ranking(path):
+    """Read a name,weight CSV of undesirable creatures"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row[0].strip(): float(row[1]) if len(row) > 1 else 1
+                for row in csv.reader(f) if row and row[0].strip()}
+
+
+def completed_quests(index, skip_eagles_peak, skip_bone_voyage):
+    """Completed quests for a quest state; the index drops At First Light
+    when Eagles' Peak is skipped"""
+    skipped = {"Eagles' Peak"} if skip_eagles_peak else set()
+    if skip_bone_voyage:
+        skipped.add('Bone Voyage')
+    return [quest for quest in index.quests if quest not in skipped]
+
+
+def quest_state_of(index, quests):
+    """Atlas quest state (skipped Eagles' Peak, skipped Bone Voyage) for a
+    set of completed quests, or None if the atlas does not cover it"""
+    done = index.completed_quests(index.quests if quests is None else quests)
+    for state in QUEST_STATES:
+        if index.completed_quests(completed_quests(index, *state)) == done:
+            return state
+    return None
+
+
+class AtlasShard:
+    """One unit of atlas work: every level for one quest state and giver.
+
+    The input hash covers exactly the data the shard reads, so a re-run
+    only recomputes shards whose creatures, pools or ranking changed.
+    """
+
+    def __init__(self, engine, undesirable, quest_state, giver, min_level, max_level):
+        self.engine = engine
+        self.undesirable = undesirable
+        self.quest_state = quest_state
+        self.giver = giver
+        self.min_level = min_level
+        self.max_level = max_level
+        self.name = f"q{quest_state}-{list(engine.rumor_givers).index(giver)}"
+
+    def input_hash(self):
+        index = self.engine.index
+        inputs = [ATLAS_VERSION, self.quest_state, self.giver, self.min_level,
+                  self.max_level, index.names, index.levels,
+                  sorted(self.engine.rumor_givers.items()),
+                  sorted((g, hex(m)) for g, m in index.giver_masks.items()),
+                  sorted((q, hex(m), index.quest_givers[q]) for q, m in index.quest_masks.items()),
+                  sorted(self.undesirable.items())]
+        return hashlib.sha256(json.dumps(inputs).encode('utf-8')).hexdigest()
+
+    def compute(self):
+        """Optimize every level; returns {level: [blocks, undesirable share]}"""
+        from hunter_blocks import BlockOptimizer
+
+        index = self.engine.index
+        quests = completed_quests(index, *QUEST_STATES[self.quest_state])
+        optimizer = BlockOptimizer(self.engine, workers=1)
+        cells = {}
+        if index.missing_quests(self.giver, quests):
+            return cells
+        for level in range(self.min_level, self.max_level + 1):
+            if level < self.engine.rumor_givers[self.giver]:
+                continue
+            blockers = [g for g, req in self.engine.rumor_givers.items()
+                        if g != self.giver and level >= req
+                        and not index.missing_quests(g, quests)]
+            plan = optimizer.optimize(self.giver, level, self.undesirable,
+                                      blockers=blockers, quests=quests)
+            cells[level] = [plan.blocks, plan.undesirable_share]
+        return cells
+
+
+class AtlasQueue:
+    """File-based shard queue in a directory that several machines can share.
+
+    A worker claims a shard by creating its claim file with O_EXCL, writes
+    the result to a temporary file and renames it into place, then drops
+    the claim.  Claims left behind by dead workers expire after
+    LEASE_SECONDS and are broken with an atomic rename; a worker that finds
+    it renamed a fresh claim instead puts it back, so only one worker
+    takes them over.  Each claim file holds a random owner token, so a
+    worker whose lease was broken while it computed does not release the
+    claim of the worker that took over.
+    """
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.claim_dir = os.path.join(work_dir, 'claims')
+        self.shard_dir = os.path.join(work_dir, 'shards')
+        os.makedirs(self.claim_dir, exist_ok=True)
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    def result_path(self, shard):
+        return os.path.join(self.shard_dir, f"{shard.name}.json")
+
+    def read_result(self, shard, input_hash):
+        """Stored cells for a shard, or None if missing or stale"""
+        try:
+            with open(self.result_path(shard), encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if result.get('input_hash') != input_hash:
+            return None
+        return {int(level): cell for level, cell in result['cells'].items()}
+
+    def claim(self, shard, input_hash):
+        """Try to claim a shard; returns a (claim path, owner token) claim
+        or None"""
+        path = os.path.join(self.claim_dir, f"{shard.name}.{input_hash[:16]}")
+        token = secrets.token_hex(16)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._break_stale(path):
+                    return None
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"{token} {socket.gethostname()} {os.getpid()} {time.time():.0f}\n")
+            return path, token
+        return None
+
+    def release(self, claim):
+        """Drop a claim if it is still ours.
+
+        Returns False if the lease was broken meanwhile: the claim file is
+        gone, or now belongs to the worker that took the shard over.
+        """
+        path, token = claim
+        try:
+            with open(path, encoding='utf-8') as f:
+                owner = f.read().split(' ', 1)[0]
+            if owner != token:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @staticmethod
+    def _read_claim(path):
+        """Owner token and age of a claim file"""
+        with open(path, encoding='utf-8') as f:
+            owner = f.read().split(' ', 1)[0]
+        return owner, time.time() - os.path.getmtime(path)
+
+    def _break_stale(self, path):
+        try:
+            owner, age = self._read_claim(path)
+            if age < LEASE_SECONDS:
+                return False
+            stale = f"{path}.stale-{socket.gethostname()}-{os.getpid()}"
+            os.rename(path, stale)
+        except OSError:
+            return False  # Finished or taken over by someone else
+        try:
+            moved_owner, moved_age = self._read_claim(stale)
+        except OSError:
+            return False
+        if moved_owner != owner or moved_age < LEASE_SECONDS:
+            # Another worker broke the lease and claimed the shard between
+            # our check and the rename; put its claim back.  link fails if
+            # a third worker has claimed the path since, and then that one
+            # owns the shard.
+            try:
+                os.link(stale, path)
+            except OSError:
+                pass
+            os.remove(stale)
+            return False
+        os.remove(stale)
+        return True
+
+    def complete(self, shard, input_hash, cells, claim):
+        """Publish a shard's result and release its claim.
+
+        The result is published even if the lease was broken: any worker
+        computes the same cells for the same input hash.
+        """
+        path = self.result_path(shard)
+        tmp_path = f"{path}.{socket.gethostname()}-{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'input_hash': input_hash, 'cells': cells}, f)
+        os.replace(tmp_path, path)
+        self.release(claim)
+
+
+def plan_shards(engine, undesirable, min_level=None, max_level=None):
+    """Every shard of the atlas"""
+    from hunter_engine import MAX_LEVEL
+
+    min_level = min(engine.rumor_givers.values()) if min_level is None else min_level
+    max_level = MAX_LEVEL if max_level is None else max_level
+    return [AtlasShard(engine, undesirable, quest_state, giver, min_level, max_level)
+            for quest_state in range(len(QUEST_STATES))
+            for giver in engine.rumor_givers]
+
+
+def load_engine(csv_path):
+    from hunter_engine import HunterQueryEngine
+    return HunterQueryEngine.load(csv_path)
+
+
+def work(csv_path, work_dir, undesirable):
+    """Claim and compute shards until none are left; returns shards computed"""
+    engine = load_engine(csv_path)
+    queue = AtlasQueue(work_dir)
+    computed = 0
+    for shard in plan_shards(engine, undesirable):
+        input_hash = shard.input_hash()
+        if queue.read_result(shard, input_hash) is not None:
+            continue
+        claim = queue.claim(shard, input_hash)
+        if claim is None:
+            continue  # Another worker has it
+        queue.complete(shard, input_hash, shard.compute(), claim)
+        computed += 1
+    return computed
+
+
+def run_workers(csv_path, work_dir, undesirable, processes):
+    """Run several local worker processes against the shard queue"""
+    from multiprocessing import Process
+
+    workers = [Process(target=work, args=(csv_path, work_dir, undesirable))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def merge(csv_path, work_dir, undesirable, out_path=None):
+    """Merge finished shards into the atlas file.
+
+    Returns the names of shards that are still missing; the atlas is only
+    written when there are none.
+    """
+    engine = load_engine(csv_path)
+    queue = AtlasQueue(work_dir)
+    shards = plan_shards(engine, undesirable)
+    results = {}
+    missing = []
+    for shard in shards:
+        cells = queue.read_result(shard, shard.input_hash())
+        if cells is None:
+            missing.append(shard.name)
+        results[shard.quest_state, shard.giver] = cells
+    if missing:
+        return missing
+
+    atlas = BlockAtlas.from_results(engine, results, shards[0].min_level,
+                                    shards[0].max_level,
+                                    atlas_digest(file_hash(csv_path), engine.rumor_givers),
+                                    ranking_hash(undesirable))
+    atlas.write(out_path or atlas_path_for(csv_path))
+    return []
+
+
+class BlockAtlas:
+    """Precomputed best block lists for every quest state, assigning giver
+    and level.
+
+    Each cell is a fixed-size record of one creature id per blocking giver
+    and the undesirable share left in the pool, so a lookup is one offset
+    calculation into the file contents.
+    """
+
+    def __init__(self, digest, ranking, min_level, max_level, givers, names, records):
+        self.digest = digest
+        self.ranking = ranking
+        self.min_level = min_level
+        self.max_level = max_level
+        self.givers = list(givers)
+        self.names = list(names)
+        self.records = records
+        self.giver_ids = {giver: i for i, giver in enumerate(self.givers)}
+        self.record = struct.Struct(f'<{len(self.givers)}Hf')
+
+    def _offset(self, quest_state, giver_id, level):
+        n_levels = self.max_level - self.min_level + 1
+        cell = (quest_state * len(self.givers) + giver_id) * n_levels + level - self.min_level
+        return cell * self.record.size
+
+    @classmethod
+    def from_results(cls, engine, results, min_level, max_level, digest, ranking):
+        givers = list(engine.rumor_givers)
+        names = engine.index.names
+        ids = engine.index.ids
+        if len(names) > NO_BLOCK:
+            raise ValueError(f"Block atlas holds at most {NO_BLOCK} creatures, not {len(names)}")
+        atlas = cls(digest, ranking, min_level, max_level, givers, names, b'')
+        records = bytearray(atlas._offset(len(QUEST_STATES), 0, min_level))
+        for (quest_state, giver), cells in results.items():
+            for level in range(min_level, max_level + 1):
+                slots = [NO_BLOCK] * len(givers)
+                share = math.nan
+                if level in cells:
+                    blocks, share = cells[level]
+                    for blocker, creature in blocks.items():
+                        slots[givers.index(blocker)] = ids[creature]
+                atlas.record.pack_into(records, atlas._offset(quest_state, givers.index(giver), level),
+                                       *slots, share)
+        atlas.records = bytes(records)
+        return atlas
+
+    def lookup(self, giver, level, skip_eagles_peak=False, skip_bone_voyage=False):
+        """Best (blocks, undesirable share) for a query, or None if it is
+        outside the atlas or the giver is not available"""
+        giver_id = self.giver_ids.get(giver)
+        if giver_id is None or not self.min_level <= level <= self.max_level:
+            return None
+        quest_state = QUEST_STATES.index((bool(skip_eagles_peak), bool(skip_bone_voyage)))
+        *slots, share = self.record.unpack_from(self.records,
+                                                self._offset(quest_state, giver_id, level))
+        if math.isnan(share):
+            return None
+        blocks = {self.givers[i]: self.names[c] for i, c in enumerate(slots) if c != NO_BLOCK}
+        return blocks, share
+
+    @classmethod
+    def read(cls, path, digest):
+        """Read an atlas file, or return None if it is missing or was built
+        from inputs with a different atlas_digest"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return cls._parse(memoryview(data), digest)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    @classmethod
+    def _parse(cls, view, digest):
+        (magic, version, stored_digest, ranking, min_level, max_level, n_states,
+         n_givers, n_names) = ATLAS_HEADER.unpack_from(view)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION or stored_digest != digest:
+            return None
+        if n_states != len(QUEST_STATES):
+            return None
+        offset = ATLAS_HEADER.size
+
+        strings = []
+        for _ in range(n_givers + n_names):
+            (length,) = struct.unpack_from('<H', view, offset)
+            offset += 2
+            strings.append(str(view[offset:offset + length], 'utf-8'))
+            offset += length
+
+        atlas = cls(stored_digest, ranking, min_level, max_level,
+                    strings[:n_givers], strings[n_givers:], bytes(view[offset:]))
+        if len(atlas.records) != atlas._offset(n_states, 0, min_level):
+            raise ValueError("Truncated block atlas")
+        return atlas
+
+    def write(self, path):
+        """Write the atlas to a binary file"""
+        parts = [ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, self.digest, self.ranking,
+                                   self.min_level, self.max_level, len(QUEST_STATES),
+                                   len(self.givers), len(self.names))]
+        for text in self.givers + self.names:
+            data = text.encode('utf-8')
+            parts.append(struct.pack('<H', len(data)) + data)
+        parts.append(self.records)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, path)
+
+
+def build_atlas(csv_path, out_path=None, work_dir=None, undesirable=None, processes=1):
+    """Compute any stale shards locally and merge them into the atlas.
+
+    Returns True if the atlas was written.
+    """
+    out_path = out_path or atlas_path_for(csv_path)
+    work_dir = work_dir or default_work_dir()
+    from hunter_engine import RUMOR_GIVERS
+
+    undesirable = DEFAULT_UNDESIRABLE if undesirable is None else undesirable
+    atlas = BlockAtlas.read(out_path, atlas_digest(file_hash(csv_path), RUMOR_GIVERS))
+    if atlas is not None and atlas.ranking == ranking_hash(undesirable):
+        return False
+
+    if processes > 1:
+        run_workers(csv_path, work_dir, undesirable, processes)
+    else:
+        work(csv_path, work_dir, undesirable)
+    return not merge(csv_path, work_dir, undesirable, out_path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the block-list atlas")
+    parser.add_argument('command', choices=['work', 'merge', 'build'],
+                        help="work: compute shards; merge: write the atlas; build: both")
+    parser.add_argument('--csv', default='hunter_data.csv')
+    parser.add_argument('--dir', default=None, help="shared shard queue directory")
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--undesirable', default=None,
+                        help="name,weight CSV of creatures to block")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    work_dir = args.dir or default_work_dir()
+    undesirable = read_ranking(args.undesirable) if args.undesirable else DEFAULT_UNDESIRABLE
+    if args.command in ('work', 'build'):
+        run_workers(args.csv, work_dir, undesirable, args.processes)
+    if args.command in ('merge', 'build'):
+        missing = merge(args.csv, work_dir, undesirable, args.out)
+        if missing:
+            print(f"{len(missing)} shards not finished: {', '.join(missing)}")
+            return 1
+        print(f"Wrote {args.out or atlas_path_for(args.csv)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
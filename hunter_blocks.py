@@ -0,0 +1,169 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from hunter_index import iter_ids
+
+BlockPlan = namedtuple('BlockPlan', [
+    'giver',              # Assigning giver
+    'level',              # Player level
+    'blocks',             # dict of blocking giver -> creature to hold
+    'pool',               # Creatures the assigning giver can still assign
+    'undesirable_share',  # Share of that pool that is undesirable
+    'blocked_weight',     # Total undesirability removed by the blocks
+])
+
+# Search spaces smaller than this are not worth a process pool
+PARALLEL_THRESHOLD = 50_000
+
+
+def _search(options, weights):
+    """Best blocks for a list of per-blocker options.
+
+    options is a tuple with one tuple of candidate creature ids per
+    blocking giver, and weights maps creature id to undesirability.  Each
+    blocker holds at most one creature and no creature can be held twice.
+    Returns (blocked weight, tuple of chosen ids or None per blocker).
+    """
+    # Upper bound on what blockers k.. can still add, from the pool overlap
+    bounds = [0] * (len(options) + 1)
+    for k in range(len(options) - 1, -1, -1):
+        union = {c for opts in options[k:] for c in opts}
+        top = sorted((weights[c] for c in union), reverse=True)
+        bounds[k] = sum(top[:len(options) - k])
+
+    @lru_cache(maxsize=None)
+    def best(k, blocked):
+        if k == len(options) or bounds[k] == 0:
+            return 0, (None,) * (len(options) - k)
+        best_weight, best_choice = best(k + 1, blocked)
+        best_choice = (None,) + best_choice
+        for creature in options[k]:
+            if blocked >> creature & 1:
+                continue
+            weight, rest = best(k + 1, blocked | 1 << creature)
+            weight += weights[creature]
+            if weight > best_weight:
+                best_weight, best_choice = weight, (creature,) + rest
+                if best_weight == bounds[k]:
+                    break  # Nothing can beat the bound
+        return best_weight, best_choice
+
+    return best(0, 0)
+
+
+def _search_branch(first, options, weights):
+    """Search with the first blocker's choice fixed, for the process pool"""
+    if first is None:
+        weight, rest = _search(options[1:], weights)
+        return weight, (None,) + rest
+    rest_options = tuple(tuple(c for c in opts if c != first) for opts in options[1:])
+    weight, rest = _search(rest_options, weights)
+    return weight + weights[first], (first,) + rest
+
+
+class BlockOptimizer:
+    """Finds the block list that keeps undesirable rumors away from an
+    assigning giver.
+
+    Following rumours.txt, a block only works if the blocked creature is in
+    both the blocking giver's pool and the assigning giver's pool, and each
+    giver holds one rumor at a time.  The optimizer searches every feasible
+    assignment of blocks to the other givers, pruning with pool-overlap
+    bounds and memoizing on (blocker, blocked set).  Large searches are split
+    by the first blocker's choice across a process pool; workers receive the
+    candidate bitmask ids only, never the dataset.
+    """
+
+    def __init__(self, engine, regions=None, workers=None):
+        self.engine = engine
+        self.regions = list(engine.index.regions if regions is None else regions)
+        self.workers = workers
+
+    def pool_mask(self, giver, level, excluded=0, quests=None):
+        """Creatures a giver can assign with the given quests completed,
+        minus an excluded mask"""
+        return self.engine.available_mask(giver, level, self.regions, excluded, quests)
+
+    def blocker_options(self, giver, level, weights, excluded=0, blockers=None, quests=None):
+        """Candidate blocks per blocking giver: undesirable creatures in the
+        overlap of its pool and the assigning giver's pool"""
+        pool = self.pool_mask(giver, level, excluded, quests)
+        if blockers is None:
+            blockers = [g for g, req in self.engine.rumor_givers.items()
+                        if g != giver and level >= req]
+        options = []
+        for blocker in blockers:
+            overlap = pool & self.pool_mask(blocker, level, excluded, quests)
+            # Strongest candidates first so the bound is reached early
+            ids = sorted((c for c in iter_ids(overlap) if weights.get(c, 0) > 0),
+                         key=lambda c: -weights[c])
+            options.append(tuple(ids))
+        return pool, list(blockers), tuple(options)
+
+    def optimize(self, giver, level, undesirable, excluded=0, blockers=None, quests=None):
+        """Best block list for one assigning giver.
+
+        Args:
+            giver: the giver the player takes new rumors from
+            level: player level
+            undesirable: creature names, or a dict of name -> weight where a
+                higher weight means more worth blocking
+            excluded: mask of creatures nobody can assign
+            blockers: givers available to hold blocks; defaults to every
+                other giver the player has the level for
+            quests: completed quests, or None for all of them; givers
+                gated by a missing quest cannot hold blocks
+
+        Returns:
+            BlockPlan
+        """
+        problem = self._problem(giver, level, undesirable, excluded, blockers, quests)
+        options, weights = problem[-2:]
+
+        space = 1
+        for opts in options:
+            space *= len(opts) + 1
+        if self.workers != 1 and options and options[0] and space >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                branches = [None] + list(options[0])
+                futures = [executor.submit(_search_branch, first, options, weights)
+                           for first in branches]
+                result = max((f.result() for f in futures), key=lambda r: r[0])
+        else:
+            result = _search(options, weights)
+        return self._plan(problem, result)
+
+    def optimize_many(self, queries):
+        """Optimize many (giver, level, undesirable[, excluded[, blockers[,
+        quests]]]) queries, spread over a process pool"""
+        problems = [self._problem(*query) for query in queries]
+        searches = [(p[-2], p[-1]) for p in problems]
+        if self.workers == 1 or len(problems) < 2:
+            results = [_search(*search) for search in searches]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(_search, *zip(*searches), chunksize=16))
+        return [self._plan(problem, result) for problem, result in zip(problems, results)]
+
+    def _problem(self, giver, level, undesirable, excluded=0, blockers=None, quests=None):
+        index = self.engine.index
+        if not isinstance(undesirable, dict):
+            undesirable = dict.fromkeys(undesirable, 1)
+        weights = {index.ids[name]: weight for name, weight in undesirable.items()
+                   if name in index.ids}
+        pool, blockers, options = self.blocker_options(giver, level, weights, excluded,
+                                                       blockers, quests)
+        return giver, level, pool, blockers, options, weights
+
+    def _plan(self, problem, result):
+        giver, level, pool, blockers, _, weights = problem
+        weight, choice = result
+        index = self.engine.index
+        blocks = {blocker: index.names[c] for blocker, c in zip(blockers, choice)
+                  if c is not None}
+        remaining = pool & ~index.mask_of(blocks.values())
+        names = index.names_of(remaining)
+        bad = sum(1 for c in iter_ids(remaining) if weights.get(c, 0) > 0)
+        share = bad / len(names) if names else 0.0
+        return BlockPlan(giver, level, blocks, names, share, weight)
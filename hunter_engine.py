@@ -0,0 +1,229 @@
+from collections import OrderedDict, namedtuple
+
+from hunter_index import REGION_COUNT, HunterIndex, iter_ids
+from hunter_table import AvailabilityTable, table_path_for
+
+MIN_LEVEL = 19
+MAX_LEVEL = 99
+
+# Regions that are always searched and cannot be deselected
+ALWAYS_ON_REGIONS = ['Misthalin/Karamja', 'Varlamore']
+
+# Rumor givers and their Hunter level requirements, in display order
+RUMOR_GIVERS = {
+    'Novice': 46,
+    'Adept(cervus)': 57,
+    'Adept(ornus)': 57,
+    'Expert(aco)': 72,
+    'Expert(teco)': 72,
+    'Master(wolf)': 91
+}
+
+# Back-to-back settings: never repeat, always allow repeats, or the guide's
+# strategy of toggling repeats on after a desirable rumor and off after an
+# undesirable one
+BACK_TO_BACK_OFF = 'off'
+BACK_TO_BACK_ON = 'on'
+BACK_TO_BACK_TOGGLE = 'toggle'
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'evictions'])
+
+
+class HunterQueryEngine:
+    """Eligibility queries over a HunterIndex, with no dependency on tkinter.
+
+    Single queries are looked up in the precomputed AvailabilityTable when
+    one matching the data is available, and otherwise work on the integer
+    bitmasks of the index.  Many queries at once go through batch_available,
+    which answers them in one NumPy pass.
+    """
+
+    def __init__(self, index, rumor_givers=None, table=None):
+        self.index = index
+        self.rumor_givers = dict(RUMOR_GIVERS if rumor_givers is None else rumor_givers)
+        self.table = table
+        self._tables = None
+
+    @classmethod
+    def load(cls, path, rumor_givers=None, region_count=REGION_COUNT):
+        """Create an engine for a hunter_data.csv style file, picking up the
+        availability table next to it if it was built from the same data"""
+        index = HunterIndex.load(path, region_count=region_count)
+        table = AvailabilityTable.read(table_path_for(path), index.digest)
+        return cls(index, rumor_givers, table=table)
+
+    def available_mask(self, giver, level, regions, assigned_mask=0, quests=None):
+        """Mask of creatures a giver can assign, empty below the giver's level.
+
+        quests is the set of completed quests; None means all of them.
+        """
+        if self.table is not None:
+            mask = self.table.lookup(giver, level, regions)
+            if mask is not None:
+                return mask & self.index.quest_mask(quests, giver) & ~assigned_mask
+        if level < self.rumor_givers[giver]:
+            return 0
+        return self.index.available(giver, level, regions, assigned_mask, quests)
+
+    def available(self, giver, level, regions, assigned=(), quests=None):
+        """Names of creatures a giver can assign that are not already assigned"""
+        mask = self.available_mask(giver, level, regions, self.index.mask_of(assigned), quests)
+        return self.index.names_of(mask)
+
+    def pool(self, giver, level, regions, blocks, quests=None):
+        """Creature ids a giver can assign, with other givers' blocks removed.
+
+        blocks maps a giver to the creature it currently holds; the giver's
+        own entry is its previous rumor, not a block.  The rumor simulator
+        and the Markov chain both draw from this pool.
+        """
+        blocked = self.index.mask_of(task for holder, task in blocks.items()
+                                     if holder != giver and task)
+        return list(iter_ids(self.available_mask(giver, level, regions, blocked, quests)))
+
+    def _unpack(self, masks):
+        """Bool matrix with one row per mask, in index id order"""
+        import numpy as np
+
+        n_creatures = len(self.index.names)
+        n_bytes = (n_creatures + 7) // 8
+        data = b''.join(mask.to_bytes(n_bytes, 'little') for mask in masks)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+        return bits.reshape(len(masks), n_bytes * 8)[:, :n_creatures].astype(bool)
+
+    def _numpy_tables(self):
+        """Dense NumPy copies of the index, built on first batch query"""
+        if self._tables is None:
+            import numpy as np
+
+            index = self.index
+            unpack = self._unpack
+            self._tables = {
+                'levels': np.array(index.levels, dtype=np.int64),
+                'regions': unpack([index.region_masks[r] for r in index.regions]),
+                'givers': unpack([index.giver_masks[g] for g in self.rumor_givers]),
+                'giver_levels': np.array(list(self.rumor_givers.values()), dtype=np.int64),
+                'quests': {},
+            }
+        return self._tables
+
+    def _quest_table(self, quests):
+        """Per-giver rows of index.quest_mask for a set of completed quests"""
+        tables = self._numpy_tables()
+        key = frozenset(quests)
+        if key not in tables['quests']:
+            tables['quests'][key] = self._unpack([self.index.quest_mask(key, giver)
+                                                  for giver in self.rumor_givers])
+        return tables['quests'][key]
+
+    def _as_matrix(self, sets, labels):
+        """Turn a (queries, labels) bool array or a sequence of name sets
+        into a bool matrix over the given labels"""
+        import numpy as np
+
+        if isinstance(sets, np.ndarray):
+            return sets.astype(bool, copy=False)
+        position = {label: i for i, label in enumerate(labels)}
+        matrix = np.zeros((len(sets), len(labels)), dtype=bool)
+        for row, names in enumerate(sets):
+            cols = [position[name] for name in names if name in position]
+            matrix[row, cols] = True
+        return matrix
+
+    def batch_available(self, levels, region_sets, assigned_sets, givers, quests=None):
+        """Answer many availability queries in one vectorized pass.
+
+        Args:
+            levels: sequence of player levels, one per query
+            region_sets: bool array of shape (queries, regions) in
+                index.regions order, or a sequence of region name sets
+            assigned_sets: bool array of shape (queries, creatures) in id
+                order, or a sequence of assigned creature name sets
+            givers: sequence of giver names or of indices into rumor_givers
+            quests: completed quests, shared by every query; None means
+                all of them, as in available_mask
+
+        Returns:
+            bool array of shape (queries, creatures); row q marks the
+            creatures available for query q, in index id order
+        """
+        import numpy as np
+
+        tables = self._numpy_tables()
+        levels = np.asarray(levels, dtype=np.int64)
+        givers = np.asarray(givers)
+        if givers.dtype.kind in 'US':
+            giver_ids = {giver: i for i, giver in enumerate(self.rumor_givers)}
+            givers = np.array([giver_ids[g] for g in givers.tolist()], dtype=np.int64)
+
+        regions = self._as_matrix(region_sets, self.index.regions)
+        assigned = self._as_matrix(assigned_sets, self.index.names)
+
+        # Creature ids are level sorted, so "level <= L" is an id prefix
+        n_creatures = len(self.index.names)
+        cutoff = np.searchsorted(tables['levels'], levels, side='right')
+        result = np.arange(n_creatures)[None, :] < cutoff[:, None]
+
+        result &= tables['givers'][givers]
+        result &= regions @ tables['regions']
+        result &= ~assigned
+        result &= (levels >= tables['giver_levels'][givers])[:, None]
+        if quests is not None:
+            result &= self._quest_table(quests)[givers]
+        return result
+
+    def names_of_row(self, row):
+        """Names for one row of a batch_available result"""
+        return [self.index.names[i] for i in row.nonzero()[0]]
+
+
+class ResultCache:
+    """Bounded LRU cache for query results and their formatted text.
+
+    Entries are tied to a data version (the source CSV hash); calling sync
+    with a different version drops everything cached so far.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def sync(self, version):
+        """Invalidate the cache if the data version has changed"""
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def get(self, key):
+        """Cached entry for a key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry, evicting the least recently used one if full"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        """Hit/miss/eviction counters, in the style of functools.lru_cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries),
+                         self.evictions)
@@ -0,0 +1,404 @@
+import csv
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+SNAPSHOT_MAGIC = b'HIDX'
+SNAPSHOT_VERSION = 2
+# magic, version, data sha256, creatures, regions, givers, quests, bytes per mask
+SNAPSHOT_HEADER = struct.Struct('<4sH32sIHHHI')
+# Region columns between Level and the rumor givers in hunter_data.csv
+REGION_COUNT = 10
+
+# Quests that gate rumors, from rumours.txt.  hunter_data.csv has no columns
+# for these, so they are listed here and compiled into masks with the index.
+QUEST_CREATURES = {
+    "Eagles' Peak": ['Embertailed Jerboa', 'Grey Chinchompa', 'Red Chinchompa'],
+    'Bone Voyage': ['Herbiboar'],
+    'At First Light': [],
+}
+QUEST_GIVERS = {
+    "Eagles' Peak": [],
+    'Bone Voyage': [],
+    'At First Light': ['Master(wolf)'],
+}
+# A quest only counts as done if its prerequisites are done too
+QUEST_PREREQUISITES = {
+    'At First Light': ["Eagles' Peak"],
+}
+
+
+def parse_flag(value):
+    """Interpret a TRUE/FALSE/blank cell from hunter_data.csv"""
+    return str(value).strip().upper() in ('TRUE', 'YES', '1')
+
+
+def cache_dir():
+    """Per-user directory for compiled data snapshots"""
+    path = os.environ.get('HUNTER_CACHE_DIR')
+    if path:
+        return path
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+        return os.path.join(base, 'HunterApp', 'cache')
+    base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'hunter')
+
+
+def file_hash(path):
+    """SHA-256 digest of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def quest_spec_hash():
+    """SHA-256 digest of the quest definitions in the code, which snapshots
+    and the block atlas are built from"""
+    spec = repr((sorted(QUEST_CREATURES.items()), sorted(QUEST_GIVERS.items()),
+                 sorted(QUEST_PREREQUISITES.items())))
+    return hashlib.sha256(spec.encode('utf-8')).digest()
+
+
+def snapshot_location(path, snapshot_dir=None):
+    """Snapshot path, CSV digest and snapshot key for a CSV file"""
+    digest = file_hash(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    snapshot_path = os.path.join(snapshot_dir or cache_dir(), f"{name}.snapshot")
+    # The quest masks come from the code, so they are part of the key
+    snapshot_digest = hashlib.sha256(digest + quest_spec_hash()).digest()
+    return snapshot_path, digest, snapshot_digest
+
+
+def iter_ids(mask):
+    """Yield the ids of the set bits in a mask, lowest first"""
+    if mask.bit_length() <= 64:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+        return
+    # Clearing bits one by one copies a big mask every time; scanning its
+    # binary digits is linear
+    bits = bin(mask)[:1:-1]
+    i = bits.find('1')
+    while i >= 0:
+        yield i
+        i = bits.find('1', i + 1)
+
+
+def mask_from_ids(ids, size):
+    """Mask with the given ids set, built as a bitmap and converted once"""
+    bitmap = bytearray((size + 7) // 8)
+    for i in ids:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+class HunterIndex:
+    """Bitmask index over the creatures in hunter_data.csv.
+
+    Every creature gets an integer id, assigned in level order, so that
+    "level <= L" is a prefix of the id range.  Each region and each rumor
+    giver column becomes an integer bitmask over those ids, which turns
+    every eligibility question into a handful of integer ANDs.
+
+    Quest requirements are one more dimension: each quest has a mask of the
+    creatures it gates and a bitmask over the givers it gates.
+    """
+
+    def __init__(self, names, levels, regions, region_masks, giver_masks,
+                 quest_masks=None, quest_givers=None, creature_regions=None):
+        self.names = list(names)
+        self.levels = list(levels)
+        self.regions = list(regions)
+        self.region_masks = dict(region_masks)
+        self.giver_masks = dict(giver_masks)
+        self.givers = list(self.giver_masks)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        if quest_masks is None:
+            quest_masks, quest_givers = self._compile_quests()
+        self.quest_masks = dict(quest_masks)
+        self.quests = list(self.quest_masks)
+        self.quest_givers = dict(quest_givers)  # Bit i is self.givers[i]
+        self.all_mask = (1 << len(self.names)) - 1
+        self.digest = None  # Hash of the source CSV, when loaded from a file
+        self._regions_cache = {}
+        self._quests_cache = {}
+
+        # Regions of each creature, in column order, for display; rebuilt
+        # from the masks on first use when not given
+        self._creature_regions = creature_regions
+
+    @property
+    def creature_regions(self):
+        if self._creature_regions is None:
+            creature_regions = [[] for _ in self.names]
+            for region in self.regions:
+                for i in iter_ids(self.region_masks[region]):
+                    creature_regions[i].append(region)
+            self._creature_regions = creature_regions
+        return self._creature_regions
+
+    @classmethod
+    def load(cls, path, snapshot_dir=None, region_count=REGION_COUNT):
+        """Load the index for a CSV file, going through a binary snapshot.
+
+        The snapshot lives in the user cache dir and records the hash of the
+        CSV it was built from.  If it matches, it is memory-mapped and the
+        CSV is not parsed at all; otherwise the CSV is parsed and a fresh
+        snapshot is written for the next launch.
+        """
+        snapshot_path, digest, snapshot_digest = snapshot_location(path, snapshot_dir)
+        index = cls.read_snapshot(snapshot_path, snapshot_digest)
+        if index is not None and len(index.regions) != region_count:
+            index = None  # Same file read with other columns as regions
+        if index is None:
+            index = cls.from_csv(path, region_count)
+            try:
+                index.write_snapshot(snapshot_path, snapshot_digest)
+            except OSError:
+                # A read-only or missing cache dir only costs us the speedup
+                pass
+        index.digest = digest
+        return index
+
+    def save(self, path, snapshot_dir=None):
+        """Write the snapshot for a CSV file from this index, so the next
+        load skips parsing; the index must match the file's contents"""
+        snapshot_path, digest, snapshot_digest = snapshot_location(path, snapshot_dir)
+        self.write_snapshot(snapshot_path, snapshot_digest)
+        self.digest = digest
+
+    @classmethod
+    def read_snapshot(cls, snapshot_path, digest):
+        """Read a snapshot written by write_snapshot.
+
+        Returns None if the file is missing, unreadable or was built from a
+        CSV with a different hash.
+        """
+        try:
+            with open(snapshot_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    return cls._parse_snapshot(view, digest)
+                finally:
+                    view.release()
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    @classmethod
+    def _parse_snapshot(cls, view, digest):
+        magic, version, stored_digest, n_names, n_regions, n_givers, n_quests, mask_bytes = \
+            SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or stored_digest != digest:
+            return None
+        offset = SNAPSHOT_HEADER.size
+
+        levels = array('H')
+        levels.frombytes(view[offset:offset + 2 * n_names])
+        if sys.byteorder != 'little':
+            levels.byteswap()
+        offset += 2 * n_names
+
+        strings = []
+        for _ in range(n_names + n_regions + n_givers + n_quests):
+            (length,) = struct.unpack_from('<H', view, offset)
+            offset += 2
+            strings.append(str(view[offset:offset + length], 'utf-8'))
+            offset += length
+        names = strings[:n_names]
+        regions = strings[n_names:n_names + n_regions]
+        givers = strings[n_names + n_regions:n_names + n_regions + n_givers]
+        quests = strings[n_names + n_regions + n_givers:]
+
+        masks = []
+        for _ in range(n_regions + n_givers + n_quests):
+            masks.append(int.from_bytes(view[offset:offset + mask_bytes], 'little'))
+            offset += mask_bytes
+        quest_givers = struct.unpack_from(f'<{n_quests}I', view, offset)
+        offset += 4 * n_quests
+        if offset != len(view):
+            raise ValueError("Truncated or oversized snapshot")
+        return cls(names, levels, regions,
+                   zip(regions, masks[:n_regions]),
+                   zip(givers, masks[n_regions:n_regions + n_givers]),
+                   zip(quests, masks[n_regions + n_givers:]), zip(quests, quest_givers))
+
+    def write_snapshot(self, snapshot_path, digest):
+        """Write the index as a compact binary snapshot tagged with a CSV hash"""
+        mask_bytes = (len(self.names) + 7) // 8
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, digest,
+                                      len(self.names), len(self.regions),
+                                      len(self.givers), len(self.quests), mask_bytes)]
+        levels = array('H', self.levels)
+        if sys.byteorder != 'little':
+            levels.byteswap()
+        parts.append(levels.tobytes())
+        for text in self.names + self.regions + self.givers + self.quests:
+            data = text.encode('utf-8')
+            parts.append(struct.pack('<H', len(data)) + data)
+        for mask in [self.region_masks[r] for r in self.regions] + \
+                [self.giver_masks[g] for g in self.givers] + \
+                [self.quest_masks[q] for q in self.quests]:
+            parts.append(mask.to_bytes(mask_bytes, 'little'))
+        parts.append(struct.pack(f'<{len(self.quests)}I',
+                                 *[self.quest_givers[q] for q in self.quests]))
+
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, snapshot_path)
+
+    @classmethod
+    def from_csv(cls, path, region_count=REGION_COUNT):
+        """Build the index from a hunter_data.csv style file"""
+        # Rows are many small lists; the cyclic collector would rescan them
+        # over and over as they pile up, and none of them form cycles
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                rows = [row for row in reader if row]
+            return cls.from_rows(header, rows, region_count)
+        finally:
+            if collecting:
+                gc.enable()
+
+    @classmethod
+    def from_rows(cls, header, rows, region_count=REGION_COUNT):
+        """Build the index from a header and rows of raw CSV cells.
+
+        Columns are Name, Level, region_count region columns and then one
+        column per rumor giver, as in hunter_data.csv.
+        """
+        first_giver = 2 + region_count
+        regions = header[2:first_giver]
+        givers = header[first_giver:]
+
+        # Stable sort keeps the file order for creatures of equal level
+        rows = sorted(rows, key=lambda row: int(float(row[1])))
+
+        # Ids are gathered per column and turned into masks once at the
+        # end; OR-ing bits into a growing int would copy it for every row
+        region_ids = {region: [] for region in regions}
+        giver_ids = {giver: [] for giver in givers}
+        creature_regions = []
+        flags = {}  # Only a handful of distinct cell texts, each parsed once
+        for i, row in enumerate(rows):
+            cells = row[2:first_giver + len(givers)]
+            for cell in cells:
+                if cell not in flags:
+                    flags[cell] = parse_flag(cell)
+            found = []
+            for region, cell in zip(regions, cells):
+                if flags[cell]:
+                    region_ids[region].append(i)
+                    found.append(region)
+            creature_regions.append(found)
+            for giver, cell in zip(givers, cells[len(regions):]):
+                if flags[cell]:
+                    giver_ids[giver].append(i)
+
+        names = [row[0].strip() for row in rows]
+        levels = [int(float(row[1])) for row in rows]
+        if len(set(names)) != len(names):
+            raise ValueError("Duplicate creature names in hunter data")
+        return cls(names, levels, regions,
+                   {region: mask_from_ids(ids, len(rows)) for region, ids in region_ids.items()},
+                   {giver: mask_from_ids(ids, len(rows)) for giver, ids in giver_ids.items()},
+                   creature_regions=creature_regions)
+
+    def _compile_quests(self):
+        """Creature and giver masks for each quest in QUEST_CREATURES"""
+        quest_masks = {}
+        quest_givers = {}
+        for quest, creatures in QUEST_CREATURES.items():
+            quest_masks[quest] = self.mask_of(creatures)
+            quest_givers[quest] = sum(1 << i for i, giver in enumerate(self.givers)
+                                      if giver in QUEST_GIVERS.get(quest, ()))
+        return quest_masks, quest_givers
+
+    def completed_quests(self, quests):
+        """The given completed quests, minus any whose prerequisites are
+        not also completed"""
+        done = set(quests)
+        changed = True
+        while changed:
+            changed = False
+            for quest in list(done):
+                if any(req not in done for req in QUEST_PREREQUISITES.get(quest, ())):
+                    done.discard(quest)
+                    changed = True
+        return done
+
+    def missing_quests(self, giver, quests):
+        """Quests gating a giver that are not completed"""
+        if quests is None or giver not in self.givers:
+            return []
+        done = self.completed_quests(quests)
+        bit = 1 << self.givers.index(giver)
+        return [q for q in self.quests if self.quest_givers[q] & bit and q not in done]
+
+    def quest_mask(self, quests=None, giver=None):
+        """Mask of creatures that can be assigned with the given quests
+        completed, or 0 if the giver itself needs a missing quest.
+
+        quests=None means every quest is completed.
+        """
+        if quests is None:
+            return self.all_mask
+        key = (frozenset(quests), giver)
+        mask = self._quests_cache.get(key)
+        if mask is None:
+            done = self.completed_quests(quests)
+            mask = self.all_mask
+            for quest in self.quests:
+                if quest not in done:
+                    mask &= ~self.quest_masks[quest]
+            if giver is not None and self.missing_quests(giver, quests):
+                mask = 0
+            self._quests_cache[key] = mask
+        return mask
+
+    def level_mask(self, level):
+        """Mask of every creature at or below the given level"""
+        return (1 << bisect_right(self.levels, level)) - 1
+
+    def regions_mask(self, regions):
+        """Mask of every creature found in any of the given regions"""
+        key = tuple(regions)
+        mask = self._regions_cache.get(key)
+        if mask is None:
+            mask = 0
+            for region in key:
+                mask |= self.region_masks[region]
+            self._regions_cache[key] = mask
+        return mask
+
+    def mask_of(self, names):
+        """Mask of the named creatures, ignoring unknown names"""
+        mask = 0
+        for name in names:
+            i = self.ids.get(name)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def available(self, giver, level, regions, assigned=0, quests=None):
+        """Mask of creatures a giver can assign at a level in the given regions
+        with the given quests completed, minus the already assigned mask"""
+        return (self.giver_masks[giver] & self.level_mask(level)
+                & self.regions_mask(regions) & self.quest_mask(quests, giver) & ~assigned)
+
+    def names_of(self, mask):
+        """Names of the creatures in a mask, in level order"""
+        return [self.names[i] for i in iter_ids(mask)]
@@ -0,0 +1,365 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+
+from hunter_index import HunterIndex, file_hash
+
+MANIFEST_VERSION = 2
+
+# Columns of the hunter_data.csv schema
+REGION_COLUMNS = ['Misthalin/Karamja', 'Asgarnia', 'Kandarin', 'Mortyania', 'Wilderness',
+                  'Desert', 'Fremenik', 'Tirannwn', 'Zeah', 'Varlamore']
+GIVER_COLUMNS = ['Novice', 'Adept(cervus)', 'Adept(ornus)', 'Expert(aco)', 'Expert(teco)',
+                 'Master(wolf)']
+HEADER = ['Name', 'Level'] + REGION_COLUMNS + GIVER_COLUMNS
+
+# Cell positions in rumours.csv data rows.  The wiki export's header row is
+# one column out of step with its data, so the header names are not used.
+COL_LEVEL = 0
+COL_NAME = 3
+COL_LOCATIONS = (5, 7)
+COL_METHOD = 10
+COL_GIVERS = slice(11, 17)
+
+# Hunter areas named in rumours.csv and the region checkbox they belong to
+LOCATION_REGIONS = {
+    'Avium Savannah': 'Varlamore',
+    'Canifis Hunter area': 'Mortyania',
+    'Farming Guild': 'Zeah',
+    'Feldip Hunter area': 'Kandarin',
+    'Fossil Island': 'Misthalin/Karamja',
+    'Gwenith Hunter area': 'Tirannwn',
+    'Hunter Guild': 'Varlamore',
+    'Karamja Hunter area': 'Misthalin/Karamja',
+    'Kourend Woodland': 'Zeah',
+    'Locus Oasis': 'Varlamore',
+    'Mushroom Forest': 'Misthalin/Karamja',
+    'Necropolis Hunter area': 'Desert',
+    'Neypotzli': 'Varlamore',
+    'Ourania Hunter area': 'Kandarin',
+    'Piscatoris Hunter area': 'Kandarin',
+    'Piscatoris falconry area': 'Kandarin',
+    "Ralos' Rise": 'Varlamore',
+    'Red chinchompa hunting ground': 'Kandarin',
+    'Rellekka Hunter area': 'Fremenik',
+    'Slepe': 'Mortyania',
+    'The Burrow': 'Varlamore',
+    'Uzer Hunter area': 'Desert',
+    'Weiss': 'Fremenik',
+}
+
+# Hand-typed names in older copies of hunter_data.csv
+NAME_FIXES = {
+    'Sabe-Toothed Kyatt': 'Sabre-Toothed Kyatt',
+    'Terbiboar': 'Herbiboar',
+}
+
+IngestResult = namedtuple('IngestResult', [
+    'added',      # Creatures new in this ingest
+    'changed',    # Creatures whose source row changed
+    'removed',    # Creatures no longer in the source
+    'unchanged',  # Number of rows reused from the manifest
+    'written',    # Whether the output CSV was rewritten
+    'warnings',   # Problems found in the source, e.g. unknown locations
+])
+
+
+def manifest_path_for(out_path):
+    """Location of the ingest manifest that belongs to an output CSV"""
+    return os.path.splitext(out_path)[0] + '.manifest.json'
+
+
+def normalize_name(name):
+    """Title-case a creature name, including after hyphens"""
+    name = re.sub(r"(^|[ -])([a-z])", lambda m: m.group(1) + m.group(2).upper(),
+                  ' '.join(name.split()))
+    return NAME_FIXES.get(name, name)
+
+
+def normalize_level(value):
+    """Parse a padded level cell like ' 19 '"""
+    return int(float(value.strip()))
+
+
+def normalize_flag(value):
+    """Parse a Yes/No giver cell, which may carry a trailing newline"""
+    return value.strip().lower() in ('yes', 'true', '1')
+
+
+def normalize_method(value):
+    """Sentence-case a method like 'Box trap'"""
+    value = ' '.join(value.split())
+    return value[:1].upper() + value[1:].lower()
+
+
+def row_hash(cells):
+    """Digest of the raw cells of a source row"""
+    return hashlib.sha256('\x1f'.join(cells).encode('utf-8')).hexdigest()
+
+
+def iter_source_rows(path):
+    """Stream the data rows of rumours.csv, one list of raw cells at a time"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for cells in reader:
+            if len(cells) > COL_NAME and cells[COL_NAME].strip():
+                yield cells
+
+
+def location_regions(cells, warnings=None, extra_locations=()):
+    """Region columns the locations of a raw rumours.csv row, and any more
+    locations known for it, map to"""
+    name = normalize_name(cells[COL_NAME])
+    regions = set()
+    locations = [cells[col] for col in COL_LOCATIONS if col < len(cells)]
+    for location in locations + list(extra_locations):
+        location = ' '.join(location.split())
+        if not location:
+            continue
+        region = LOCATION_REGIONS.get(location)
+        if region is None:
+            if warnings is not None:
+                warnings.append(f"{name}: unknown location {location!r}")
+        else:
+            regions.add(region)
+    return regions
+
+
+def normalize_row(cells, extra_regions=(), warnings=None, extra_locations=()):
+    """Turn raw rumours.csv cells into (hunter_data row, method).
+
+    extra_regions are region columns to keep set on top of the ones the
+    locations map to, so regions added by hand are not lost.
+    extra_locations are more locations for the creature than the row's
+    two, e.g. from the wiki's creature tables.
+    """
+    name = normalize_name(cells[COL_NAME])
+    level = normalize_level(cells[COL_LEVEL])
+    regions = location_regions(cells, warnings, extra_locations) | set(extra_regions)
+    givers = [normalize_flag(cell) for cell in cells[COL_GIVERS]]
+    if len(givers) != len(GIVER_COLUMNS):
+        raise ValueError(f"{name}: expected {len(GIVER_COLUMNS)} giver columns")
+
+    row = [name, str(level)]
+    row += ['TRUE' if region in regions else 'FALSE' for region in REGION_COLUMNS]
+    row += ['TRUE' if flag else '' for flag in givers]
+    return row, normalize_method(cells[COL_METHOD]) if COL_METHOD < len(cells) else ''
+
+
+def read_output_regions(path):
+    """Region columns set per creature in an existing hunter_data.csv"""
+    regions = {}
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for row in reader:
+                if row:
+                    regions[normalize_name(row[0])] = {
+                        header[col] for col in range(2, 12)
+                        if col < len(row) and row[col].strip().upper() == 'TRUE'}
+    except (OSError, StopIteration):
+        pass
+    return regions
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get('version') == MANIFEST_VERSION else {}
+
+
+def read_manifest(path, output_digest):
+    """Rows from a previous ingest, or {} if the output has since changed"""
+    manifest = _load_manifest(path)
+    if manifest.get('output_hash') != output_digest:
+        return {}
+    return manifest.get('rows', {})
+
+
+def read_location_regions(path):
+    """Regions each row's locations gave in the previous ingest, kept even
+    if the output was edited by hand since"""
+    return {key: set(entry['regions'])
+            for key, entry in _load_manifest(path).get('rows', {}).items()}
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def ingest(source_path, out_path='hunter_data.csv', refresh=True):
+    """Normalize rumours.csv into the hunter_data.csv schema"""
+    return ingest_rows(iter_source_rows(source_path), out_path, refresh)
+
+
+def ingest_rows(source_rows, out_path='hunter_data.csv', refresh=True, extra_locations=None):
+    """Normalize rows of raw cells, laid out as in rumours.csv, into the
+    hunter_data.csv schema.
+
+    Source rows are streamed and hashed; rows whose hash matches the
+    manifest from the previous ingest are reused as they are, and only new
+    or changed rows are normalized.  The output and its derived indexes are
+    only rebuilt when something changed.  Repeats of a name are ignored
+    with a warning.
+
+    Region columns set by hand in the output are kept.  The manifest
+    records which regions each row's locations gave, even across hand
+    edits, so a region that came from a location the source no longer
+    lists is dropped.  For rows the manifest does not know, every region
+    set in the output is kept.  Regions that no location maps to are only
+    ever set by hand, so a region column left empty is reported in the
+    warnings.
+
+    extra_locations maps a normalized creature name to locations beyond
+    the two a rumours.csv row holds; they count as part of the source row.
+
+    Returns:
+        IngestResult
+    """
+    manifest_path = manifest_path_for(out_path)
+    output_digest = file_hash(out_path).hex() if os.path.exists(out_path) else None
+    previous = read_manifest(manifest_path, output_digest)
+    existing_regions = None
+    derived_regions = None
+    extra_locations = extra_locations or {}
+    warnings = []
+
+    rows = {}
+    added = []
+    changed = []
+    for cells in source_rows:
+        key = ' '.join(cells[COL_NAME].split())
+        if key in rows:
+            warnings.append(f"{key}: duplicate row ignored")
+            continue
+        more = extra_locations.get(normalize_name(key), [])
+        digest = row_hash(list(cells) + ['\x1e'] + more if more else cells)
+        entry = previous.get(key)
+        if entry is None or entry['hash'] != digest:
+            if existing_regions is None:
+                existing_regions = read_output_regions(out_path)
+                derived_regions = read_location_regions(manifest_path)
+            hand_set = existing_regions.get(normalize_name(key), set()) - \
+                derived_regions.get(key, set())
+            row, method = normalize_row(cells, hand_set, warnings, more)
+            entry = {'hash': digest, 'row': row, 'method': method,
+                     'regions': sorted(location_regions(cells, extra_locations=more))}
+            (changed if key in previous else added).append(row[0])
+        rows[key] = entry
+    removed = [previous[key]['row'][0] for key in previous if key not in rows]
+
+    if not (added or changed or removed) and output_digest is not None:
+        return IngestResult(added, changed, removed, len(rows), False, warnings)
+
+    # No location maps to some regions, so only hand edits set them
+    if existing_regions is None:
+        existing_regions = read_output_regions(out_path)
+    had = set().union(*existing_regions.values())
+    has = {region for entry in rows.values()
+           for region, cell in zip(REGION_COLUMNS, entry['row'][2:]) if cell == 'TRUE'}
+    for region in REGION_COLUMNS:
+        if region in has:
+            continue
+        if region in had:
+            warnings.append(f"{region}: no creature is left in this region")
+        elif output_digest is None:
+            warnings.append(f"{region}: no creature is in this region; regions set by "
+                            f"hand are only kept when ingesting over the previous output")
+
+    old_index = None
+    if refresh and output_digest is not None:
+        try:
+            old_index = HunterIndex.load(out_path)
+        except (OSError, ValueError, IndexError):
+            old_index = None
+
+    def write_csv(f):
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(HEADER)
+        for entry in rows.values():
+            writer.writerow(entry['row'])
+
+    _write_atomic(out_path, write_csv)
+    manifest = {'version': MANIFEST_VERSION, 'output_hash': file_hash(out_path).hex(),
+                'rows': rows}
+    _write_atomic(manifest_path, lambda f: json.dump(manifest, f, indent=1))
+
+    if refresh:
+        changed_names = set(changed)
+        refresh_indexes(out_path, old_index, [entry['row'] for entry in rows.values()
+                                              if entry['row'][0] in changed_names])
+    unchanged = len(rows) - len(added) - len(changed)
+    return IngestResult(added, changed, removed, unchanged, True, warnings)
+
+
+def patch_index(index, changed_rows, all_names, all_levels):
+    """A copy of index with only the changed rows' bits updated, or None if
+    the creatures or their levels moved and a full rebuild is needed"""
+    if index is None or index.names != all_names or index.levels != all_levels:
+        return None
+    region_masks = dict(index.region_masks)
+    giver_masks = dict(index.giver_masks)
+    for row in changed_rows:
+        bit = 1 << index.ids[row[0]]
+        for col, region in enumerate(index.regions, start=2):
+            region_masks[region] = (region_masks[region] & ~bit) | (bit if row[col] == 'TRUE' else 0)
+        for col, giver in enumerate(index.givers, start=12):
+            giver_masks[giver] = (giver_masks[giver] & ~bit) | (bit if row[col] == 'TRUE' else 0)
+    return HunterIndex(index.names, index.levels, index.regions, region_masks, giver_masks)
+
+
+def refresh_indexes(csv_path, old_index, changed_rows):
+    """Bring the snapshot, availability table and block atlas up to date
+    with a rewritten CSV.
+
+    When only changed_rows differ from old_index, the snapshot is patched
+    and only the availability table's level buckets at or above the
+    lowest changed level are recomputed; otherwise both are rebuilt.
+    """
+    from hunter_atlas import build_atlas
+    from hunter_table import build_table, update_table
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        ordered = sorted((row for row in reader if row), key=lambda row: int(row[1]))
+    index = patch_index(old_index, changed_rows, [row[0] for row in ordered],
+                        [int(row[1]) for row in ordered])
+    patched = index is not None
+    try:
+        if index is None:
+            index = HunterIndex.from_csv(csv_path)
+        index.save(csv_path)
+    except OSError:
+        pass  # The snapshot is only a cache
+    if patched and old_index.digest is not None:
+        from_level = min((int(row[1]) for row in changed_rows), default=sys.maxsize)
+        update_table(csv_path, index, old_index.digest, from_level)
+    else:
+        build_table(csv_path)
+    # Atlas shards are keyed by their inputs, so only changed ones are redone
+    build_atlas(csv_path)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else 'rumours.csv'
+    out = sys.argv[2] if len(sys.argv) > 2 else 'hunter_data.csv'
+    result = ingest(source, out)
+    for warning in result.warnings:
+        print(f"Warning: {warning}")
+    print(f"{len(result.added)} added, {len(result.changed)} changed, "
+          f"{len(result.removed)} removed, {result.unchanged} unchanged")
+    if result.written:
+        print(f"Wrote {out}")
@@ -0,0 +1,157 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from hunter_engine import BACK_TO_BACK_OFF, BACK_TO_BACK_ON, BACK_TO_BACK_TOGGLE
+
+ChainSolution = namedtuple('ChainSolution', [
+    'names',          # Creatures in the giver's filtered pool, one state each
+    'transition',     # (states, states) matrix of next-rumor probabilities
+    'initial',        # Next-rumor probabilities with no previous rumor
+    'stationary',     # Long-run share of rumors per creature
+    'expected_gap',   # Mean rumors from one undesirable rumor to the next
+    'hitting_times',  # Expected rumors until the next undesirable, per state
+])
+
+
+@lru_cache(maxsize=256)
+def _solve(size, bad, back_to_back, reroll, max_rerolls):
+    """Solve the chain for a pool of a given size and undesirable pattern.
+
+    The answer does not depend on which creatures are in the pool, only on
+    how many there are and which of them are undesirable, so this is cached
+    on exactly that.
+    """
+    import numpy as np
+
+    bad = np.array(bad, dtype=bool)
+    if size == 1:
+        transition = np.ones((1, 1))
+        initial = np.ones(1)
+    else:
+        # Draw: uniform over the pool, minus the previous creature when
+        # back-to-back rumors are off for that state
+        if back_to_back == BACK_TO_BACK_ON:
+            exclude = np.zeros(size, dtype=bool)
+        elif back_to_back == BACK_TO_BACK_TOGGLE:
+            exclude = bad.copy()
+        else:
+            exclude = np.ones(size, dtype=bool)
+        draw = np.ones((size, size))
+        draw[exclude, exclude.nonzero()[0]] = 0
+        draw /= draw.sum(axis=1, keepdims=True)
+
+        # Individual reset: an undesirable rumor is redrawn without itself
+        redraw = np.eye(size)
+        redraw[bad] = (1 - np.eye(size)[bad]) / (size - 1)
+        step = np.linalg.matrix_power(redraw, max_rerolls if reroll else 0)
+        transition = draw @ step
+        initial = np.full(size, 1 / size) @ step
+
+    # Stationary distribution: pi (P - I) = 0 with pi summing to one
+    system = transition.T - np.eye(size)
+    system[-1] = 1
+    rhs = np.zeros(size)
+    rhs[-1] = 1
+    stationary = np.linalg.solve(system, rhs)
+
+    good = ~bad
+    hitting_times = np.full(size, np.inf)
+    expected_gap = np.inf
+    undesirable_share = stationary[bad].sum()
+    if bad.any() and undesirable_share > 0:
+        # Kac's lemma: mean return time to the undesirable set
+        expected_gap = 1 / undesirable_share
+        # Rumors until an undesirable one: h = 1 + P[:, good] h[good]
+        if good.any():
+            from_good = np.linalg.solve(np.eye(good.sum()) - transition[np.ix_(good, good)],
+                                        np.ones(good.sum()))
+            hitting_times = 1 + transition[:, good] @ from_good
+        else:
+            hitting_times = np.ones(size)
+
+    for array in (transition, initial, stationary, hitting_times):
+        array.setflags(write=False)
+    return transition, initial, stationary, expected_gap, hitting_times
+
+
+def _next_row(bad, previous, back_to_back, reroll, max_rerolls):
+    """One row of the transition matrix, or the initial distribution when
+    previous is None, without building the matrix.
+
+    Same draw and rerolls as _solve, applied to a single row vector, so
+    it costs O(size) per reroll however large the pool is.
+    """
+    import numpy as np
+
+    bad = np.array(bad, dtype=bool)
+    size = len(bad)
+    row = np.ones(size)
+    if size == 1:
+        return row
+    if previous is not None and (back_to_back == BACK_TO_BACK_OFF or
+                                 (back_to_back == BACK_TO_BACK_TOGGLE and bad[previous])):
+        row[previous] = 0
+    row /= row.sum()
+    for _ in range(max_rerolls if reroll else 0):
+        # An undesirable draw is redrawn uniformly over the rest of the pool
+        moved = row * bad
+        row = row - moved + (moved.sum() - moved) / (size - 1)
+    return row
+
+
+class RumorChain:
+    """Exact Markov chain for rumor assignments from one giver.
+
+    The state is the last creature assigned; the blocks held by other
+    givers and the back-to-back setting are fixed for a configuration and
+    filter the pool, exactly as in RumorSimulator.  Each new rumor is a
+    uniform draw over the filtered pool, so the chain is small and dense and
+    is solved directly with NumPy.  Solutions are cached per configuration,
+    which makes recomputing on every assignment change cheap.
+
+    Leaving block state out of the chain's state is a deliberate
+    simplification.  Blocks change only when the player chooses to take
+    or cancel another giver's rumor, not as a random step, so a block
+    change is a new configuration rather than a transition.  States over
+    (last creature, blocks) would multiply the chain by every combination
+    of the other givers' rumors without changing these answers.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def solve(self, giver, level, regions, blocks=None, undesirable=(),
+              back_to_back=BACK_TO_BACK_OFF, reroll=False, max_rerolls=3, quests=None):
+        """Solve the chain for one giver and configuration, or None if the
+        giver has nothing to assign"""
+        index = self.engine.index
+        pool = self.engine.pool(giver, level, regions, blocks or {}, quests)
+        if not pool:
+            return None
+        names = [index.names[i] for i in pool]
+        undesirable = set(undesirable)
+        bad = tuple(name in undesirable for name in names)
+        solution = _solve(len(pool), bad, back_to_back, reroll, max_rerolls)
+        return ChainSolution(names, *solution)
+
+    def next_probabilities(self, giver, level, regions, blocks=None, undesirable=(),
+                           back_to_back=BACK_TO_BACK_OFF, reroll=False, max_rerolls=3,
+                           quests=None):
+        """Chance of each creature being the giver's next rumor.
+
+        The giver's own entry in blocks is taken as its previous rumor.
+        Only that row of the chain is computed, so this stays linear in the
+        pool size where solve() is cubic.
+        """
+        blocks = blocks or {}
+        pool = self.engine.pool(giver, level, regions, blocks, quests)
+        if not pool:
+            return {}
+        index = self.engine.index
+        names = [index.names[i] for i in pool]
+        undesirable = set(undesirable)
+        bad = [name in undesirable for name in names]
+        previous = blocks.get(giver)
+        previous = names.index(previous) if previous in names else None
+        row = _next_row(bad, previous, back_to_back, reroll, max_rerolls)
+        return dict(zip(names, row.tolist()))
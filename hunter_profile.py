@@ -0,0 +1,235 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+# HunterApp methods that Tk calls directly, traced in --profile mode
+PROFILED_HANDLERS = ['find_monsters', 'get_new_assignment', 'make_active', 'complete_assignment',
+                     'clear_assignment', 'on_level_change', 'on_quest_change']
+RING_SIZE = 2000
+REFRESH_MS = 1000
+
+TraceEvent = namedtuple('TraceEvent', [
+    'name',       # Handler or span name, with the giver for per-giver handlers
+    'start',      # perf_counter() at entry, in seconds
+    'wall_ms',    # Time in the handler itself
+    'redraw_ms',  # Time to process the idle redraws it caused; 0 for nested calls
+    'alloc_kb',   # Net change in traced Python memory
+    'peak_kb',    # Highest traced memory above the entry level
+    'depth',      # 0 for a callback Tk made, 1+ for calls from other handlers
+])
+
+
+class Profiler:
+    """Latency trace of the app's Tk callbacks, kept in a ring buffer.
+
+    Nothing is wrapped unless a Profiler is passed to HunterApp, so a
+    normal launch pays nothing.  When on, tracemalloc runs for allocation
+    deltas (which slows allocation-heavy code somewhat), and after each
+    outermost callback the idle redraws it scheduled are flushed and timed
+    with update_idletasks().
+    """
+
+    def __init__(self, trace_path=None, capacity=RING_SIZE):
+        self.trace_path = trace_path
+        self.events = deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.root = None
+        self.window = None
+        self.stats_sources = {}
+        self._depth = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, redraw=False):
+        """Record the wall time and allocations of a block"""
+        outermost = self._depth == 0
+        before, _ = tracemalloc.get_traced_memory()
+        if outermost:
+            tracemalloc.reset_peak()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            self._depth -= 1
+            current, peak = tracemalloc.get_traced_memory()
+            redraw_time = 0.0
+            if redraw and outermost and self.root is not None:
+                redraw_start = time.perf_counter()
+                self.root.update_idletasks()
+                redraw_time = time.perf_counter() - redraw_start
+            self.events.append(TraceEvent(name, start, wall * 1000, redraw_time * 1000,
+                                          (current - before) / 1024,
+                                          max(peak - before, 0) / 1024, self._depth))
+
+    def wrap(self, name, handler):
+        @functools.wraps(handler)
+        def traced(*args, **kwargs):
+            label = f"{name}({args[0]})" if args and isinstance(args[0], str) else name
+            with self.span(label, redraw=True):
+                return handler(*args, **kwargs)
+        return traced
+
+    def instrument(self, app, names=PROFILED_HANDLERS):
+        """Replace handlers on an app instance with traced versions.
+
+        Must run before the widgets are built, since Tk keeps the bound
+        methods it is given.
+        """
+        for name in names:
+            setattr(app, name, self.wrap(name, getattr(app, name)))
+
+    def add_stats(self, name, source):
+        """Show the namedtuple source() returns, such as a cache's info(),
+        in the diagnostics window and saved traces"""
+        self.stats_sources[name] = source
+
+    def stats(self):
+        """(name, {field: value}) for every stats source, read now"""
+        return [(name, source()._asdict()) for name, source in self.stats_sources.items()]
+
+    def snapshot(self):
+        return list(self.events)
+
+    def clear(self):
+        self.events.clear()
+
+    def summary(self):
+        """(name, calls, median, p95, max wall ms, mean redraw ms) per handler"""
+        by_name = {}
+        for event in self.snapshot():
+            by_name.setdefault(event.name.split('(')[0], []).append(event)
+        rows = []
+        for name, events in sorted(by_name.items()):
+            walls = sorted(event.wall_ms for event in events)
+            rows.append((name, len(walls), walls[len(walls) // 2],
+                         walls[min(len(walls) - 1, int(len(walls) * 0.95))], walls[-1],
+                         sum(event.redraw_ms for event in events) / len(events)))
+        return rows
+
+    def chrome_trace(self):
+        """The buffer as a Chrome trace (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        trace = []
+        for event in self.snapshot():
+            ts = (event.start - self.origin) * 1e6
+            trace.append({'name': event.name, 'cat': 'handler', 'ph': 'X', 'pid': pid, 'tid': 1,
+                          'ts': ts, 'dur': event.wall_ms * 1000,
+                          'args': {'alloc_kb': round(event.alloc_kb, 1),
+                                   'peak_kb': round(event.peak_kb, 1)}})
+            if event.redraw_ms:
+                trace.append({'name': 'redraw', 'cat': 'tk', 'ph': 'X', 'pid': pid, 'tid': 1,
+                              'ts': ts + event.wall_ms * 1000, 'dur': event.redraw_ms * 1000,
+                              'args': {'handler': event.name}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms', 'otherData': dict(self.stats())}
+
+    def dump(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        """Write the trace to the path given on the command line, if any"""
+        if self.trace_path:
+            self.dump(self.trace_path)
+
+    def attach(self, root):
+        """Use root for redraw timing and open the diagnostics window;
+        F12 reopens it once closed"""
+        self.root = root
+        root.bind('<F12>', lambda event: self.show(), add='+')
+        self.show()
+
+    def show(self):
+        if self.window is not None and self.window.top.winfo_exists():
+            self.window.top.lift()
+            return
+        self.window = DiagnosticsWindow(self.root, self)
+
+
+def format_stats(name, values):
+    """One line for a stats source, such as Results cache: hits 3, misses 1"""
+    return f"{name}: " + ", ".join(f"{field} {value}" for field, value in values.items())
+
+
+class DiagnosticsWindow:
+    """Per-handler latency summary and the latest events, refreshed live"""
+
+    def __init__(self, root, profiler):
+        import tkinter as tk
+        from tkinter import ttk
+
+        self.profiler = profiler
+        self.top = tk.Toplevel(root)
+        self.top.title("Hunter Diagnostics")
+
+        columns = ('calls', 'median', 'p95', 'max', 'redraw')
+        self.summary = ttk.Treeview(self.top, columns=columns, height=8)
+        self.summary.heading('#0', text="Handler")
+        for column, text in zip(columns, ("Calls", "Median ms", "p95 ms", "Max ms", "Redraw ms")):
+            self.summary.heading(column, text=text)
+            self.summary.column(column, width=80, anchor='e')
+        self.summary.grid(row=0, column=0, columnspan=3, sticky='nsew', padx=5, pady=5)
+
+        columns = ('wall', 'redraw', 'alloc', 'peak')
+        self.recent = ttk.Treeview(self.top, columns=columns, height=12)
+        self.recent.heading('#0', text="Recent events")
+        for column, text in zip(columns, ("Wall ms", "Redraw ms", "Alloc KB", "Peak KB")):
+            self.recent.heading(column, text=text)
+            self.recent.column(column, width=80, anchor='e')
+        self.recent.grid(row=1, column=0, columnspan=3, sticky='nsew', padx=5, pady=5)
+
+        self.stats = tk.StringVar()
+        ttk.Label(self.top, textvariable=self.stats, justify='left').grid(
+            row=2, column=0, columnspan=3, sticky='w', padx=5)
+
+        ttk.Button(self.top, text="Save Trace...", command=self.save).grid(row=3, column=0, pady=5)
+        ttk.Button(self.top, text="Clear", command=self.clear).grid(row=3, column=1, pady=5)
+        ttk.Button(self.top, text="Close", command=self.top.destroy).grid(row=3, column=2, pady=5)
+        self.top.grid_columnconfigure(0, weight=1)
+        self.top.grid_rowconfigure(1, weight=1)
+
+        self.shown = None
+        self.refresh()
+
+    def refresh(self):
+        if not self.top.winfo_exists():
+            return
+        events = self.profiler.snapshot()
+        # Only rebuild the tables when something was recorded
+        if (len(events), events[-1] if events else None) != self.shown:
+            self.shown = (len(events), events[-1] if events else None)
+            self.summary.delete(*self.summary.get_children())
+            for name, calls, median, p95, worst, redraw in self.profiler.summary():
+                self.summary.insert('', 'end', text=name, values=(
+                    calls, f"{median:.2f}", f"{p95:.2f}", f"{worst:.2f}", f"{redraw:.2f}"))
+            self.recent.delete(*self.recent.get_children())
+            for event in reversed(events[-50:]):
+                self.recent.insert('', 'end', text='  ' * event.depth + event.name, values=(
+                    f"{event.wall_ms:.2f}", f"{event.redraw_ms:.2f}",
+                    f"{event.alloc_kb:+.1f}", f"{event.peak_kb:.1f}"))
+        self.stats.set("\n".join(format_stats(name, values)
+                                  for name, values in self.profiler.stats()))
+        self.top.after(REFRESH_MS, self.refresh)
+
+    def save(self):
+        from tkinter import filedialog
+
+        path = filedialog.asksaveasfilename(parent=self.top, defaultextension='.json',
+                                            initialfile='hunter_trace.json',
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path:
+            self.profiler.dump(path)
+
+    def clear(self):
+        self.profiler.clear()
+        self.shown = None
+        self.summary.delete(*self.summary.get_children())
+        self.recent.delete(*self.recent.get_children())
@@ -0,0 +1,160 @@
+from collections import namedtuple
+
+import numpy as np
+
+from hunter_engine import BACK_TO_BACK_OFF, BACK_TO_BACK_ON, BACK_TO_BACK_TOGGLE
+
+SimulationResult = namedtuple('SimulationResult', [
+    'giver',          # Assigning giver
+    'names',          # Creatures in the giver's filtered pool
+    'probabilities',  # Share of completed rumors per creature
+    'half_widths',    # 95% confidence half-width per probability
+    'trials',         # Assignment sequences simulated
+    'assignments',    # Rumors completed across all trials
+    'reroll_rate',    # Individual rerolls per completed rumor
+    'converged',      # Whether every half-width reached the tolerance
+])
+
+
+class RumorSimulator:
+    """Monte Carlo simulation of rumor assignments, following rumours.txt.
+
+    A giver assigns uniformly from its pool (from the query engine), minus
+    creatures currently held by other givers as blocks.  With back-to-back
+    rumors disabled the previous creature is excluded from the next draw.
+    Undesirable creatures can optionally be rerolled with an individual
+    reset, which redraws excluding the rerolled creature.  A complete reset
+    with Gilman clears every block, which is the same as simulating with no
+    blocks.
+
+    Many trials are advanced together as NumPy arrays.  Trials run in
+    batches, each with its own child of a seeded SeedSequence, until the
+    95% confidence interval of every creature's share is within tolerance.
+    """
+
+    def __init__(self, engine, seed=0):
+        self.engine = engine
+        self.seed = seed
+
+    def simulate(self, giver, level, regions, blocks=None, undesirable=(),
+                 back_to_back=BACK_TO_BACK_OFF, reroll=False, max_rerolls=3,
+                 sequence_length=20, batch_trials=100_000, max_batches=50,
+                 min_batches=4, tolerance=1e-3, quests=None):
+        """Simulate assignment sequences from one giver.
+
+        Args:
+            giver: the assigning giver
+            level, regions: player level and selected regions
+            blocks: dict of giver -> creature held as a block
+            undesirable: creature names the player does not want
+            back_to_back: BACK_TO_BACK_OFF, BACK_TO_BACK_ON or BACK_TO_BACK_TOGGLE
+            reroll: reroll undesirable rumors with an individual reset
+            max_rerolls: rerolls tried per assignment before accepting it
+            sequence_length: rumors completed per trial
+            batch_trials: trials advanced together per batch
+            max_batches, min_batches: bounds on the number of batches
+            tolerance: target 95% confidence half-width for each share
+            quests: completed quests, or None for all of them
+
+        Returns:
+            SimulationResult
+        """
+        index = self.engine.index
+        pool = self.engine.pool(giver, level, regions, blocks or {}, quests)
+        names = [index.names[i] for i in pool]
+        size = len(pool)
+        if size == 0:
+            return SimulationResult(giver, names, np.zeros(0), np.zeros(0),
+                                    0, 0, 0.0, True)
+
+        undesirable = set(undesirable)
+        bad = np.array([name in undesirable for name in names], dtype=bool)
+        giver_number = list(self.engine.rumor_givers).index(giver)
+        root = np.random.SeedSequence([self.seed, giver_number, level, size])
+        batch_shares = []
+        counts = np.zeros(size, dtype=np.int64)
+        rerolls = 0
+        converged = False
+
+        for batch_seed in root.spawn(max_batches):
+            rng = np.random.default_rng(batch_seed)
+            batch_counts, batch_rerolls = self._run_batch(
+                rng, size, bad, back_to_back, reroll, max_rerolls,
+                sequence_length, batch_trials)
+            counts += batch_counts
+            rerolls += batch_rerolls
+            batch_shares.append(batch_counts / batch_counts.sum())
+
+            # Batch means give honest intervals despite the correlation
+            # between draws within one sequence
+            if len(batch_shares) >= min_batches:
+                half_widths = self._half_widths(batch_shares)
+                if half_widths.max() <= tolerance:
+                    converged = True
+                    break
+
+        half_widths = self._half_widths(batch_shares)
+        trials = len(batch_shares) * batch_trials
+        assignments = int(counts.sum())
+        return SimulationResult(giver, names, counts / assignments, half_widths,
+                                trials, assignments, rerolls / assignments, converged)
+
+    def simulate_all(self, level, regions, blocks=None, **kwargs):
+        """Simulate every giver the player has the level for.
+
+        Each giver is simulated with the blocks held by the other givers.
+        """
+        return {giver: self.simulate(giver, level, regions, blocks, **kwargs)
+                for giver, req_level in self.engine.rumor_givers.items()
+                if level >= req_level}
+
+    @staticmethod
+    def _half_widths(batch_shares):
+        shares = np.array(batch_shares)
+        if len(shares) < 2:
+            return np.full(shares.shape[1], np.inf)
+        return 1.96 * shares.std(axis=0, ddof=1) / np.sqrt(len(shares))
+
+    @staticmethod
+    def _draw_excluding(rng, size, exclude):
+        """Uniform pool positions, skipping exclude where it is >= 0"""
+        has_exclusion = exclude >= 0
+        if size == 1:
+            # Nothing else to draw; the only creature is repeated
+            return np.zeros(len(exclude), dtype=np.int64)
+        draw = rng.integers(0, size - has_exclusion)
+        draw += has_exclusion & (draw >= exclude)
+        return draw
+
+    def _run_batch(self, rng, size, bad, back_to_back, reroll, max_rerolls,
+                   sequence_length, trials):
+        counts = np.zeros(size, dtype=np.int64)
+        rerolls = 0
+        previous = np.full(trials, -1, dtype=np.int64)
+
+        for _ in range(sequence_length):
+            if back_to_back == BACK_TO_BACK_ON:
+                exclude = np.full(trials, -1, dtype=np.int64)
+            elif back_to_back == BACK_TO_BACK_TOGGLE:
+                # Repeats are only switched on after a desirable rumor
+                repeat_ok = (previous >= 0) & ~bad[np.maximum(previous, 0)]
+                exclude = np.where(repeat_ok, -1, previous)
+            else:
+                exclude = previous
+            draw = self._draw_excluding(rng, size, exclude)
+
+            if reroll:
+                for _ in range(max_rerolls):
+                    unwanted = bad[draw]
+                    n_unwanted = int(unwanted.sum())
+                    if not n_unwanted:
+                        break
+                    rerolls += n_unwanted
+                    # The rerolled rumor is excluded from the new draw
+                    redraw = self._draw_excluding(rng, size, draw[unwanted])
+                    draw[unwanted] = redraw
+
+            counts += np.bincount(draw, minlength=size)
+            previous = draw
+
+        return counts, rerolls
@@ -0,0 +1,253 @@
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from hunter_index import HunterIndex, file_hash
+
+TABLE_FILE = 'hunter_table.bin'
+TABLE_MAGIC = b'HTBL'
+TABLE_VERSION = 1
+# magic, version, CSV sha256, min level, max level, buckets, toggleable
+# regions, fixed regions, givers, unique masks, bytes per mask
+TABLE_HEADER = struct.Struct('<4sH32sHHHHHHII')
+
+
+def cell_typecode(n_masks):
+    """Smallest array typecode that can index n_masks unique masks"""
+    return 'H' if n_masks <= 0xFFFF else 'I'
+
+
+def table_path_for(csv_path):
+    """Location of the availability table that belongs to a CSV file"""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), TABLE_FILE)
+
+
+class AvailabilityTable:
+    """Precomputed available-creature masks for every (level, region subset,
+    giver) cell.
+
+    Levels are grouped into buckets between the breakpoints where the answer
+    can change (creature and giver levels), and identical masks are stored
+    once, so a lookup is a couple of list indexes.
+    """
+
+    def __init__(self, digest, min_level, max_level, level_buckets, regions,
+                 fixed_regions, givers, masks, cells):
+        self.digest = digest
+        self.min_level = min_level
+        self.max_level = max_level
+        self.level_buckets = list(level_buckets)
+        self.regions = list(regions)
+        self.fixed_regions = list(fixed_regions)
+        self.givers = list(givers)
+        self.masks = list(masks)
+        self.cells = cells
+        self.region_bits = {region: 1 << i for i, region in enumerate(self.regions)}
+        self.giver_ids = {giver: i for i, giver in enumerate(self.givers)}
+        self._subsets = 1 << len(self.regions)
+
+    @classmethod
+    def build(cls, engine, fixed_regions, min_level, max_level, digest=b'\0' * 32):
+        """Materialize every cell by querying the engine"""
+        index = engine.index
+        regions = [r for r in index.regions if r not in fixed_regions]
+        givers = list(engine.rumor_givers)
+
+        # The answer only changes at creature or giver levels
+        breakpoints = sorted(set(index.levels) | set(engine.rumor_givers.values()))
+        level_buckets = [bisect_right(breakpoints, level)
+                         for level in range(min_level, max_level + 1)]
+        bucket_levels = {}
+        for level in range(min_level, max_level + 1):
+            bucket_levels.setdefault(level_buckets[level - min_level], level)
+
+        mask_ids = {}
+        cells = array('I')
+        for bucket in sorted(bucket_levels):
+            level = bucket_levels[bucket]
+            for giver in givers:
+                for subset in range(1 << len(regions)):
+                    selected = list(fixed_regions) + [
+                        r for i, r in enumerate(regions) if subset >> i & 1]
+                    mask = engine.available_mask(giver, level, selected)
+                    cells.append(mask_ids.setdefault(mask, len(mask_ids)))
+
+        # Renumber buckets densely, in the order they were emitted
+        dense = {bucket: i for i, bucket in enumerate(sorted(bucket_levels))}
+        level_buckets = [dense[b] for b in level_buckets]
+        return cls(digest, min_level, max_level, level_buckets, regions,
+                   fixed_regions, givers, list(mask_ids), cells)
+
+    def patched(self, engine, from_level, digest):
+        """A copy of the table with the level buckets at and above
+        from_level recomputed from the engine, for data whose changes only
+        touch creatures of that level or higher.
+
+        The engine must have the same creature and giver levels as the
+        data the table was built from, so the buckets still line up.
+        """
+        per_bucket = len(self.givers) * self._subsets
+        n_buckets = len(self.cells) // per_bucket
+        if from_level > self.max_level:
+            first = n_buckets
+        else:
+            first = self.level_buckets[max(from_level, self.min_level) - self.min_level]
+        bucket_levels = {}
+        for level in range(self.min_level, self.max_level + 1):
+            bucket_levels.setdefault(self.level_buckets[level - self.min_level], level)
+
+        # Masks are renumbered so ones no longer used are dropped
+        mask_ids = {}
+        cells = array('I')
+        for cell in self.cells[:first * per_bucket]:
+            cells.append(mask_ids.setdefault(self.masks[cell], len(mask_ids)))
+        for bucket in range(first, n_buckets):
+            level = bucket_levels[bucket]
+            for giver in self.givers:
+                for subset in range(self._subsets):
+                    selected = list(self.fixed_regions) + [
+                        r for i, r in enumerate(self.regions) if subset >> i & 1]
+                    mask = engine.available_mask(giver, level, selected)
+                    cells.append(mask_ids.setdefault(mask, len(mask_ids)))
+        return AvailabilityTable(digest, self.min_level, self.max_level, self.level_buckets,
+                                 self.regions, self.fixed_regions, self.givers,
+                                 list(mask_ids), cells)
+
+    def lookup(self, giver, level, regions):
+        """Mask for one cell, or None if the query is outside the table"""
+        if not self.min_level <= level <= self.max_level:
+            return None
+        giver_id = self.giver_ids.get(giver)
+        if giver_id is None:
+            return None
+        subset = 0
+        fixed = 0
+        for region in regions:
+            bit = self.region_bits.get(region)
+            if bit is not None:
+                subset |= bit
+            elif region in self.fixed_regions:
+                fixed += 1
+            else:
+                return None
+        if fixed != len(self.fixed_regions):
+            return None
+        bucket = self.level_buckets[level - self.min_level]
+        cell = (bucket * len(self.givers) + giver_id) * self._subsets + subset
+        return self.masks[self.cells[cell]]
+
+    @classmethod
+    def read(cls, path, digest):
+        """Read a table file, or return None if it is missing or was built
+        from a CSV with a different hash"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return cls._parse(memoryview(data), digest)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    @classmethod
+    def _parse(cls, view, digest):
+        (magic, version, stored_digest, min_level, max_level, n_buckets, n_regions,
+         n_fixed, n_givers, n_masks, mask_bytes) = TABLE_HEADER.unpack_from(view)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or stored_digest != digest:
+            return None
+        offset = TABLE_HEADER.size
+
+        strings = []
+        for _ in range(n_regions + n_fixed + n_givers):
+            (length,) = struct.unpack_from('<H', view, offset)
+            offset += 2
+            strings.append(str(view[offset:offset + length], 'utf-8'))
+            offset += length
+
+        n_levels = max_level - min_level + 1
+        level_buckets = list(view[offset:offset + n_levels])
+        offset += n_levels
+
+        masks = []
+        for _ in range(n_masks):
+            masks.append(int.from_bytes(view[offset:offset + mask_bytes], 'little'))
+            offset += mask_bytes
+
+        cells = array(cell_typecode(n_masks))
+        cells.frombytes(view[offset:])
+        if sys.byteorder != 'little':
+            cells.byteswap()
+        if len(cells) != n_buckets * n_givers * (1 << n_regions):
+            raise ValueError("Truncated availability table")
+
+        return cls(stored_digest, min_level, max_level, level_buckets,
+                   strings[:n_regions], strings[n_regions:n_regions + n_fixed],
+                   strings[n_regions + n_fixed:], masks, cells)
+
+    def write(self, path):
+        """Write the table to a binary file"""
+        mask_bytes = max((max(self.masks, default=0).bit_length() + 7) // 8, 1)
+        n_buckets = max(self.level_buckets) + 1
+        parts = [TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, self.digest,
+                                   self.min_level, self.max_level, n_buckets,
+                                   len(self.regions), len(self.fixed_regions),
+                                   len(self.givers), len(self.masks), mask_bytes)]
+        for text in self.regions + self.fixed_regions + self.givers:
+            data = text.encode('utf-8')
+            parts.append(struct.pack('<H', len(data)) + data)
+        parts.append(bytes(self.level_buckets))
+        for mask in self.masks:
+            parts.append(mask.to_bytes(mask_bytes, 'little'))
+        cells = array(cell_typecode(len(self.masks)), self.cells)
+        if sys.byteorder != 'little':
+            cells.byteswap()
+        parts.append(cells.tobytes())
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, path)
+
+
+def build_table(csv_path, out_path=None, force=False):
+    """Regenerate the availability table for a CSV file if it is stale.
+
+    Returns True if the table was written.
+    """
+    from hunter_engine import ALWAYS_ON_REGIONS, MAX_LEVEL, MIN_LEVEL, HunterQueryEngine
+
+    out_path = out_path or table_path_for(csv_path)
+    digest = file_hash(csv_path)
+    if not force and AvailabilityTable.read(out_path, digest) is not None:
+        return False
+
+    engine = HunterQueryEngine(HunterIndex.from_csv(csv_path))
+    table = AvailabilityTable.build(engine, ALWAYS_ON_REGIONS, MIN_LEVEL, MAX_LEVEL, digest)
+    table.write(out_path)
+    return True
+
+
+def update_table(csv_path, index, old_digest, from_level, out_path=None):
+    """Bring the table for a CSV up to date after its rows changed only at
+    from_level and above, recomputing just those level buckets.
+
+    index must be the index of the new CSV, with the same creatures and
+    levels as the old one.  Falls back to build_table when there is no
+    table for old_digest.  Returns True if the table was written.
+    """
+    from hunter_engine import HunterQueryEngine
+
+    out_path = out_path or table_path_for(csv_path)
+    table = AvailabilityTable.read(out_path, old_digest)
+    if table is None:
+        return build_table(csv_path, out_path)
+    table = table.patched(HunterQueryEngine(index), from_level, file_hash(csv_path))
+    table.write(out_path)
+    return True
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'hunter_data.csv'
+    out_path = sys.argv[2] if len(sys.argv) > 2 else None
+    if build_table(csv_path, out_path, force=True):
+        print(f"Wrote {out_path or table_path_for(csv_path)}")
@@ -0,0 +1,180 @@
+from collections import defaultdict, deque
+
+
+def line_changes(old, new):
+    """Spans of old to replace with spans of new, as (i1, i2, j1, j2).
+
+    Lines are matched by identity: after trimming the common prefix and
+    suffix, each old line is paired with its next occurrence in new past
+    the previous pair, found through a dict of positions.  That is linear
+    in the number of lines, unlike a longest-matching-block diff, at the
+    cost of not always finding the smallest patch when lines move.
+    """
+    start = 0
+    end_old, end_new = len(old), len(new)
+    while start < min(end_old, end_new) and old[start] == new[start]:
+        start += 1
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+
+    positions = defaultdict(deque)
+    for j in range(start, end_new):
+        positions[new[j]].append(j)
+
+    changes = []
+    i1 = j1 = start
+    for i in range(start, end_old):
+        candidates = positions.get(old[i])
+        while candidates and candidates[0] < j1:
+            candidates.popleft()
+        if not candidates:
+            continue
+        j = candidates.popleft()
+        if i > i1 or j > j1:
+            changes.append((i1, i, j1, j))
+        i1, j1 = i + 1, j + 1
+    if end_old > i1 or end_new > j1:
+        changes.append((i1, end_old, j1, end_new))
+    return changes
+
+
+class ResultsView:
+    """View model that drives the results Text widget.
+
+    The results are a list of (text, tag) lines.  update() diffs the new
+    lines against the ones on screen and only deletes and inserts the lines
+    that changed, so flipping one creature to "(Currently Assigned)" is a
+    single-line patch rather than a full redraw.
+
+    Result sets longer than virtual_threshold lines are virtualized: only
+    the lines in view are materialized in the widget, and the scrollbar
+    and mouse wheel move a window over the view model instead.
+    """
+
+    def __init__(self, text, scrollbar, virtual_threshold=2000):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.virtual_threshold = virtual_threshold
+        self.lines = []   # Every line of the current results
+        self.shown = []   # The lines materialized in the widget
+        self.offset = 0   # First shown line when virtualized
+        self.virtual = False
+
+        text.tag_configure('giver', foreground='navy')
+        text.tag_configure('assigned', foreground='gray50')
+        text.tag_configure('notice', foreground='gray35')
+        text.config(state='disabled')
+
+        scrollbar.configure(command=self.yview)
+        text.configure(yscrollcommand=self._on_text_scroll)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            text.bind(sequence, self._on_wheel, add='+')
+
+    def update(self, lines):
+        """Show a new set of lines, patching only what changed"""
+        self.lines = list(lines)
+        virtual = len(self.lines) > self.virtual_threshold
+        if virtual != self.virtual:
+            self.virtual = virtual
+            self.offset = 0
+        if virtual:
+            self._show_window()
+        else:
+            self._show(self.lines)
+
+    def clear(self):
+        """Remove all results"""
+        self.update([])
+
+    def _page_size(self):
+        return max(int(self.text.cget('height')), 1)
+
+    def _show_window(self):
+        """Materialize the lines in view and update the scrollbar to match"""
+        page = self._page_size()
+        total = len(self.lines)
+        self.offset = max(0, min(self.offset, total - page))
+        self._show(self.lines[self.offset:self.offset + page])
+        if total:
+            self.scrollbar.set(self.offset / total, min(self.offset + page, total) / total)
+
+    def _show(self, new):
+        """Apply the difference between the shown lines and new lines"""
+        text = self.text
+        changes = line_changes(self.shown, new)
+        if not changes:
+            return
+
+        text.config(state='normal')
+        # Work bottom-up so earlier line numbers stay valid
+        for i1, i2, j1, j2 in reversed(changes):
+            if i2 > i1:
+                text.delete(f"{i1 + 1}.0", f"{i2 + 1}.0")
+            if j2 > j1:
+                chunks = []
+                for line, tag in new[j1:j2]:
+                    chunks.extend((line + "\n", tag or ()))
+                text.insert(f"{i1 + 1}.0", *chunks)
+        text.config(state='disabled')
+        self.shown = list(new)
+
+    def yview(self, *args):
+        """Scrollbar command; moves the window over the lines when virtualized"""
+        if not self.virtual:
+            return self.text.yview(*args)
+        page = self._page_size()
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.lines))
+        elif args[0] == 'scroll':
+            step = page if args[2] == 'pages' else 1
+            self.offset += int(args[1]) * step
+        self._show_window()
+
+    def _on_text_scroll(self, first, last):
+        if not self.virtual:
+            self.scrollbar.set(first, last)
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4:
+            units = -3
+        elif event.num == 5:
+            units = 3
+        else:
+            units = -3 if event.delta > 0 else 3
+        self.offset += units
+        self._show_window()
+        return 'break'
+
+
+class UpdateScheduler:
+    """Coalesces UI updates into one flush per Tk idle cycle.
+
+    Handlers call mark() with the keys of whatever they made stale.  The
+    first mark schedules a flush with after_idle; later marks in the same
+    cycle only add keys, so the flush callback runs once with the union of
+    everything that changed.
+    """
+
+    def __init__(self, widget, flush):
+        self.widget = widget
+        self.flush_callback = flush
+        self.dirty = set()
+        self._pending = None
+
+    def mark(self, *keys):
+        """Flag keys as dirty and make sure a flush is scheduled"""
+        self.dirty.update(keys)
+        if self._pending is None and self.dirty:
+            self._pending = self.widget.after_idle(self.flush)
+
+    def flush(self):
+        """Run the flush callback now with everything marked so far"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        dirty, self.dirty = self.dirty, set()
+        if dirty:
+            self.flush_callback(dirty)
@@ -0,0 +1,284 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# The OCR name matcher lives with the icon extractor
+SCRAPYARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Scrapyard')
+if SCRAPYARD_DIR not in sys.path:
+    sys.path.append(SCRAPYARD_DIR)
+
+from name_matcher import NameMatcher
+
+# Where the rumour dialog sits in a game capture, as (x, y, width, height)
+# fractions of the screenshot; override with HUNTER_WATCH_ROI="x,y,w,h"
+DEFAULT_ROI = (0.0, 0.72, 0.40, 0.28)
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+POLL_INTERVAL = 0.5
+MIN_NAME_SCORE = 0.85
+
+# NPC named in the dialog for each giver column
+GIVER_NPCS = {
+    'Novice': 'gilman',
+    'Adept(cervus)': 'cervus',
+    'Adept(ornus)': 'ornus',
+    'Expert(aco)': 'aco',
+    'Expert(teco)': 'teco',
+    'Master(wolf)': 'wolf',
+}
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+EVENT_HEADER = struct.Struct('iIII')
+
+Detection = namedtuple('Detection', [
+    'path',      # Screenshot the detection came from
+    'giver',     # Giver column, e.g. 'Adept(cervus)'
+    'creature',  # Creature name as in the index
+])
+
+
+def parse_roi(value):
+    """ROI from an "x,y,w,h" string of fractions, or None if malformed"""
+    try:
+        roi = tuple(float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    return roi if len(roi) == 4 else None
+
+
+def _is_image(name):
+    return name.lower().endswith(IMAGE_SUFFIXES)
+
+
+class DirectoryWatcher:
+    """Reports image files written into a directory.
+
+    Uses inotify on Linux, so an idle session costs nothing; elsewhere, or
+    if inotify is unavailable, the directory is polled and files are
+    compared by size and modification time.  Files already present at
+    start are not reported.
+    """
+
+    def __init__(self, directory, poll_interval=POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._fd = self._open_inotify() if sys.platform.startswith('linux') else None
+        self._seen = None if self._fd is not None else self._scan()
+
+    def _open_inotify(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK)
+            if fd < 0:
+                return None
+            if libc.inotify_add_watch(fd, os.fsencode(self.directory),
+                                      IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def _scan(self):
+        seen = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if _is_image(entry.name):
+                        stat = entry.stat()
+                        seen[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return seen
+
+    def changes(self, timeout):
+        """Paths written since the last call, waiting up to timeout seconds"""
+        if self._fd is not None:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                return []
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return []
+            paths = []
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                offset += length
+                if _is_image(name):
+                    paths.append(os.path.join(self.directory, name))
+            return list(dict.fromkeys(paths))
+
+        time.sleep(min(timeout, self.poll_interval))
+        current = self._scan()
+        changed = [path for path, state in current.items() if self._seen.get(path) != state]
+        self._seen = current
+        return sorted(changed, key=lambda path: current[path][0])
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class DialogRecognizer:
+    """Finds the giver and the creature named in rumour dialog text.
+
+    Creature names go through the icon extractor's NameMatcher, with its
+    exact scan and misread fallback; givers are found by their NPC's name.
+    """
+
+    def __init__(self, creature_names, givers=None):
+        self.matcher = NameMatcher({name: () for name in creature_names}, {},
+                                   min_score=MIN_NAME_SCORE)
+        givers = GIVER_NPCS if givers is None else givers
+        self.givers = [(re.compile(rf'\b{re.escape(npc)}\b'), giver) for giver, npc in givers.items()]
+
+    def recognize(self, text):
+        """(giver, creature) named in the text; either may be None"""
+        text = ' '.join(text.lower().split())
+        giver = next((giver for pattern, giver in self.givers if pattern.search(text)), None)
+        return giver, self.matcher.match(text).creature
+
+
+class ScreenshotWatcher:
+    """Follows a screenshot directory and reports rumour assignments.
+
+    Each new capture is decoded at reduced size, cropped to the dialog
+    region and the crop hashed; frames whose crop matches the previous one
+    are dropped there, before a full-size decode or any OCR.  Changed crops
+    are decoded in full and read with tesseract and, when both a giver and a
+    creature are recognized, passed to on_detection from the watcher's
+    own thread.  Captures that fail to process are counted and passed to
+    on_skip, if given, with the error.
+    """
+
+    def __init__(self, directory, recognizer, on_detection, roi=None,
+                 poll_interval=POLL_INTERVAL, on_skip=None):
+        self.directory = directory
+        self.recognizer = recognizer
+        self.on_detection = on_detection
+        self.on_skip = on_skip
+        self.roi = roi or parse_roi(os.environ.get('HUNTER_WATCH_ROI')) or DEFAULT_ROI
+        self.poll_interval = poll_interval
+        self.last_hash = None
+        self.stats = {'frames': 0, 'unchanged': 0, 'ocr': 0, 'detections': 0, 'skipped': 0,
+                      'last_ms': 0.0, 'unchanged_ms': 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def crop(self, path, reduced=False):
+        """Grayscale dialog region of a capture, or None if unreadable.
+
+        A reduced crop is decoded at 1/4 scale, which JPEG decoders do
+        without ever producing the full-size image.
+        """
+        import cv2
+
+        flag = cv2.IMREAD_REDUCED_GRAYSCALE_4 if reduced else cv2.IMREAD_GRAYSCALE
+        image = cv2.imread(path, flag)
+        if image is None:
+            return None
+        height, width = image.shape
+        x, y, w, h = self.roi
+        top, left = int(y * height), int(x * width)
+        return image[top:top + max(int(h * height), 1), left:left + max(int(w * width), 1)]
+
+    @staticmethod
+    def crop_hash(crop):
+        # 4 bits per pixel, so compression noise doesn't count as a change
+        return hashlib.blake2b((crop >> 4).tobytes(), digest_size=16).digest()
+
+    def read_text(self, crop):
+        import cv2
+        import pytesseract
+
+        _, binary = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return pytesseract.image_to_string(binary, config='--psm 6')
+
+    def process(self, path):
+        """Handle one capture; returns its Detection, or None"""
+        start = time.perf_counter()
+        small = self.crop(path, reduced=True)
+        if small is None or small.size == 0:
+            return None
+        self.stats['frames'] += 1
+        digest = self.crop_hash(small)
+        if digest == self.last_hash:
+            self.stats['unchanged'] += 1
+            self.stats['last_ms'] = (time.perf_counter() - start) * 1000
+            self.stats['unchanged_ms'] += self.stats['last_ms']
+            return None
+        self.last_hash = digest
+
+        crop = self.crop(path)
+        if crop is None:
+            return None
+        self.stats['ocr'] += 1
+        giver, creature = self.recognizer.recognize(self.read_text(crop))
+        self.stats['last_ms'] = (time.perf_counter() - start) * 1000
+        if giver is None or creature is None:
+            return None
+        self.stats['detections'] += 1
+        detection = Detection(path, giver, creature)
+        self.on_detection(detection)
+        return detection
+
+    def run(self):
+        watcher = DirectoryWatcher(self.directory, self.poll_interval)
+        try:
+            while not self._stop.is_set():
+                for path in watcher.changes(self.poll_interval):
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self.process(path)
+                    except Exception as e:
+                        # A bad capture must not end the session's watching
+                        self.stats['skipped'] += 1
+                        if self.on_skip is not None:
+                            self.on_skip(path, e)
+        finally:
+            watcher.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='screenshot-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.poll_interval + 1)
+
+
+if __name__ == "__main__":
+    from hunter_index import HunterIndex
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else '.'
+    index = HunterIndex.load(sys.argv[2] if len(sys.argv) > 2 else 'hunter_data.csv')
+    watcher = ScreenshotWatcher(directory, DialogRecognizer(index.names),
+                                lambda d: print(f"{d.giver}: {d.creature}  ({d.path})"),
+                                on_skip=lambda path, e: print(f"Skipped {path}: {e}"))
+    print(f"Watching {directory} for rumour dialogs, Ctrl+C to stop")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,431 @@
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from hunter_index import cache_dir
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+WIKI_BASE_URL = 'https://oldschool.runescape.wiki/'
+# Bump when the extraction changes, so cached pages are parsed again
+PARSER_VERSION = 2
+PAGE_SUFFIXES = ('.html', '.htm')
+
+# Header words that identify each column of the rumour table
+GIVER_HEADERS = [('gilman', 'novice'), ('cervus',), ('ornus',), ('aco',), ('teco',),
+                 ('wolf', 'master')]
+REFERENCE = re.compile(r'\[\d+\]')
+
+WikiRows = namedtuple('WikiRows', [
+    'rumours',    # Raw rows in the rumours.csv layout, from rumour tables
+    'creatures',  # [name, level, locations, method] rows from creature tables
+])
+
+Cell = namedtuple('Cell', [
+    'text',     # Visible text, with line breaks as spaces
+    'links',    # (href, text) of each link
+    'images',   # (src, alt) of each image
+    'header',   # Whether this is a th cell
+    'colspan',
+    'rowspan',
+])
+
+
+def _span(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _clean(text):
+    return ' '.join(text.split())
+
+
+class _TableParser(HTMLParser):
+    """Streaming html.parser fallback that collects the rows of every table"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._stack = []   # Tables being parsed, innermost last
+        self._row = None
+        self._cell = None
+        self._link = None
+        self._skip = 0     # Depth inside script/style
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag == 'table':
+            self._stack.append([])
+        elif not self._stack:
+            return
+        elif tag == 'tr':
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = {'text': [], 'links': [], 'images': [], 'header': tag == 'th',
+                          'colspan': _span(attrs.get('colspan')),
+                          'rowspan': _span(attrs.get('rowspan'))}
+        elif self._cell is None:
+            return
+        elif tag == 'a' and attrs.get('href'):
+            self._link = [attrs['href'], []]
+        elif tag == 'img':
+            self._cell['images'].append((attrs.get('src') or '', attrs.get('alt') or ''))
+        elif tag == 'br':
+            self._cell['text'].append(' ')
+            if self._link is not None:
+                self._link[1].append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(self._skip - 1, 0)
+        elif tag == 'a' and self._link is not None and self._cell is not None:
+            self._cell['links'].append((self._link[0], _clean(''.join(self._link[1]))))
+            self._link = None
+        elif tag in ('td', 'th') and self._cell is not None:
+            cell = self._cell
+            self._row.append(Cell(_clean(''.join(cell['text'])), cell['links'], cell['images'],
+                                  cell['header'], cell['colspan'], cell['rowspan']))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            self._stack[-1].append(self._row)
+            self._row = None
+        elif tag == 'table' and self._stack:
+            self.tables.append(self._stack.pop())
+
+    def handle_data(self, data):
+        if self._cell is not None and not self._skip:
+            self._cell['text'].append(data)
+            if self._link is not None:
+                self._link[1].append(data)
+
+
+def _lxml_tables(data):
+    """Rows of every table, parsed with lxml's C parser"""
+    doc = lxml_html.fromstring(data)
+    for element in doc.iter('script', 'style'):
+        element.drop_tree()
+    for br in doc.iter('br'):
+        br.tail = ' ' + (br.tail or '')
+    tables = []
+    for table in doc.iter('table'):
+        rows = []
+        for tr in table.iter('tr'):
+            if next(tr.iterancestors('table')) is not table:
+                continue  # Row of a nested table
+            row = []
+            for cell in tr:
+                if cell.tag not in ('td', 'th'):
+                    continue
+                links = [(a.get('href'), _clean(a.text_content()))
+                         for a in cell.iter('a') if a.get('href')]
+                images = [(img.get('src') or '', img.get('alt') or '') for img in cell.iter('img')]
+                row.append(Cell(_clean(cell.text_content()), links, images, cell.tag == 'th',
+                                _span(cell.get('colspan')), _span(cell.get('rowspan'))))
+            rows.append(row)
+        tables.append(rows)
+    return tables
+
+
+def parse_tables(data):
+    """Rows of Cells for every table in an HTML document"""
+    if lxml_html is not None:
+        return _lxml_tables(data)
+    parser = _TableParser()
+    text = data.decode('utf-8', errors='replace')
+    # Feed in chunks; html.parser is incremental
+    for start in range(0, len(text), 64 * 1024):
+        parser.feed(text[start:start + 64 * 1024])
+    parser.close()
+    return parser.tables
+
+
+def _grid(rows):
+    """Expand colspan and rowspan so every row has one Cell per column"""
+    grid = []
+    pending = {}  # column -> (cell, rows left)
+    for row in rows:
+        out = []
+        cells = iter(row)
+        col = 0
+        while True:
+            if col in pending:
+                cell, left = pending.pop(col)
+                if left > 1:
+                    pending[col] = (cell, left - 1)
+                out.append(cell)
+                col += 1
+                continue
+            cell = next(cells, None)
+            if cell is None:
+                break
+            for _ in range(cell.colspan):
+                if cell.rowspan > 1:
+                    pending[col] = (cell, cell.rowspan - 1)
+                out.append(cell)
+                col += 1
+        grid.append(out)
+    return grid
+
+
+def _column_roles(header):
+    """Map column index -> role for a rumour table header, or None if the
+    table is not the rumour table"""
+    roles = {}
+    for col, cell in enumerate(header):
+        text = cell.text.lower() or ' '.join(alt for _, alt in cell.images).lower()
+        for giver, words in enumerate(GIVER_HEADERS):
+            if any(word in text for word in words):
+                roles[col] = f'giver{giver}'
+                break
+        else:
+            for role in ('level', 'creature', 'location', 'method', 'note'):
+                if role in text and role not in roles.values():
+                    roles[col] = role
+                    break
+    givers = {role for role in roles.values() if role.startswith('giver')}
+    if len(givers) != len(GIVER_HEADERS) or 'level' not in roles.values():
+        return None
+    return roles
+
+
+def _creature_roles(header):
+    """Map column index -> role for a creature table header, or None if the
+    table is not a creature table.  Rumour tables are left to rumour_rows."""
+    if _column_roles(header) is not None:
+        return None
+    roles = {}
+    for col, cell in enumerate(header):
+        text = cell.text.lower()
+        for role, words in (('creature', ('creature', 'name')), ('level', ('level',)),
+                            ('location', ('location', 'area')),
+                            ('method', ('method', 'trap', 'technique'))):
+            if any(word in text for word in words) and role not in roles.values():
+                roles[col] = role
+                break
+    if not {'creature', 'level', 'location'} <= set(roles.values()):
+        return None
+    return {role: col for col, role in roles.items()}
+
+
+def creature_rows(tables):
+    """[name, level, locations, method] rows from the creature tables of a
+    page, such as the Hunter training tables.  Unlike the rumour table,
+    these list every location a creature is found in."""
+    rows = []
+    for table in tables:
+        grid = _grid(table)
+        headers = [i for i, row in enumerate(grid) if row and all(c.header for c in row)]
+        if not headers:
+            continue
+        by_role = _creature_roles(grid[headers[0]])
+        if by_role is None:
+            continue
+        for row in grid[headers[0] + 1:]:
+            if not row or all(cell.header for cell in row) or len(row) <= max(by_role.values()):
+                continue
+            creature = row[by_role['creature']]
+            names = [text for _, text in creature.links if text]
+            name = REFERENCE.sub('', names[0] if names else creature.text).strip()
+            level = REFERENCE.sub('', row[by_role['level']].text).strip()
+            if not name or not level[:1].isdigit():
+                continue
+            location = row[by_role['location']]
+            locations = [text for _, text in location.links if text] or \
+                [part.strip() for part in REFERENCE.sub('', location.text).split(',')]
+            method = row[by_role['method']] if 'method' in by_role else None
+            method = REFERENCE.sub('', method.text).strip() if method else ''
+            rows.append([name, level, [loc for loc in dict.fromkeys(locations) if loc],
+                         method])
+    return rows
+
+
+def page_rows(tables, base_url=WIKI_BASE_URL):
+    """Rumour and creature rows from the tables of one page"""
+    return WikiRows(rumour_rows(tables, base_url), creature_rows(tables))
+
+
+def rumour_rows(tables, base_url=WIKI_BASE_URL):
+    """Raw rows in the rumours.csv layout from the rumour tables of a page"""
+    rows = []
+    for table in tables:
+        grid = _grid(table)
+        headers = [i for i, row in enumerate(grid) if row and all(c.header for c in row)]
+        if not headers:
+            continue
+        roles = _column_roles(grid[headers[0]])
+        if roles is None:
+            continue
+        by_role = {}
+        for col, role in roles.items():
+            by_role.setdefault(role, col)
+        for row in grid[headers[0] + 1:]:
+            if not row or all(cell.header for cell in row):
+                continue
+            rows.append(_rumour_cells(row, by_role, base_url))
+    return [row for row in rows if row[3]]
+
+
+def _rumour_cells(row, by_role, base_url):
+    def cell(role):
+        col = by_role.get(role)
+        return row[col] if col is not None and col < len(row) else Cell('', [], [], False, 1, 1)
+
+    def url(href):
+        return urljoin(base_url, href) if href else ''
+
+    def text_links(c):
+        return [(href, text) for href, text in c.links if text]
+
+    creature = cell('creature')
+    name_links = text_links(creature)
+    name = name_links[0][1] if name_links else creature.text
+    notes = REFERENCE.findall(' '.join(c.text for c in row))
+    name = REFERENCE.sub('', name).strip()
+    icon = creature.images[0][0] if creature.images else ''
+
+    locations = text_links(cell('location'))[:2]
+    locations += [('', '')] * (2 - len(locations))
+
+    method = cell('method')
+    method_links = text_links(method)
+    method_text = REFERENCE.sub('', method_links[0][1] if method_links else method.text).strip()
+
+    flags = []
+    for giver in range(len(GIVER_HEADERS)):
+        c = cell(f'giver{giver}')
+        value = c.text or ' '.join(alt for _, alt in c.images)
+        flags.append('Yes' if value.strip().lower().startswith(('yes', '✓', 'y')) else 'No')
+
+    cells = [REFERENCE.sub('', cell('level').text).strip(), url(icon),
+             url(name_links[0][0]) if name_links else '', name]
+    for href, text in locations:
+        cells += [url(href), text]
+    cells += [url(method_links[0][0]) if method_links else '',
+              url(method.images[0][0]) if method.images else '', method_text]
+    cells += flags
+    cells.append(' '.join(notes))
+    return cells
+
+
+def parse_page(path, base_url=WIKI_BASE_URL):
+    """Rumour and creature rows of one saved page"""
+    with open(path, 'rb') as f:
+        return page_rows(parse_tables(f.read()), base_url)
+
+
+def _page_key(data):
+    return hashlib.sha256(data + f'{PARSER_VERSION}'.encode('utf-8')).hexdigest()
+
+
+class WikiPageCache:
+    """Rows extracted from saved pages, cached by page content hash"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(cache_dir(), 'wiki')
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), encoding='utf-8') as f:
+                return WikiRows(*json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, key, rows):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            pass  # Only costs a re-parse next time
+
+
+def _parse_data(data):
+    return page_rows(parse_tables(data))
+
+
+def parse_pages(paths, cache=None, workers=None):
+    """WikiRows from many saved pages, each list in page order.
+
+    Pages whose content hash is in the cache are not parsed again; the
+    rest are parsed in parallel in a process pool.
+    """
+    cache = cache or WikiPageCache()
+    results = {}
+    todo = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        key = _page_key(data)
+        rows = cache.get(key)
+        if rows is None:
+            todo[path] = (key, data)
+        else:
+            results[path] = rows
+
+    if len(todo) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = executor.map(_parse_data, [data for _, data in todo.values()])
+            parsed = list(parsed)
+    else:
+        parsed = [_parse_data(data) for _, data in todo.values()]
+    for (path, (key, _)), rows in zip(todo.items(), parsed):
+        cache.put(key, rows)
+        results[path] = rows
+
+    return WikiRows([row for path in paths for row in results[path].rumours],
+                    [row for path in paths for row in results[path].creatures])
+
+
+def saved_pages(page_dir):
+    """Saved HTML pages in a directory, in name order"""
+    return sorted(os.path.join(page_dir, name) for name in os.listdir(page_dir)
+                  if name.lower().endswith(PAGE_SUFFIXES))
+
+
+def build_dataset(page_dir, out_path='hunter_data.csv', workers=None, refresh=True):
+    """Rebuild hunter_data.csv from a directory of saved wiki pages.
+
+    The first row seen for each creature wins, so the rumour list page
+    takes precedence over copies of the table on other pages.  The rumour
+    table names at most two locations per creature; every location the
+    creature tables list for it is added to those.
+    """
+    from hunter_ingest import ingest_rows, normalize_name
+
+    pages = parse_pages(saved_pages(page_dir), workers=workers)
+    rows = {}
+    for cells in pages.rumours:
+        rows.setdefault(' '.join(cells[3].split()), cells)
+    locations = {}
+    for name, _, found, _ in pages.creatures:
+        locations.setdefault(normalize_name(name), {}).update(dict.fromkeys(found))
+    return ingest_rows(rows.values(), out_path, refresh,
+                       {name: list(found) for name, found in locations.items()})
+
+
+if __name__ == "__main__":
+    page_dir = sys.argv[1] if len(sys.argv) > 1 else 'wiki_pages'
+    out = sys.argv[2] if len(sys.argv) > 2 else 'hunter_data.csv'
+    result = build_dataset(page_dir, out)
+    for warning in result.warnings:
+        print(f"Warning: {warning}")
+    print(f"{len(result.added)} added, {len(result.changed)} changed, "
+          f"{len(result.removed)} removed, {result.unchanged} unchanged")
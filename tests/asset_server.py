@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import threading
+
+from aiohttp import web
+
+
+class AssetServer:
+    """Local stand-in for the wiki, for AssetFetcher tests.
+
+    Serves in-memory files by path with a strong ETag, answers
+    If-None-Match with 304 and Range requests (guarded by If-Range) with
+    206.  cut_after makes the next response drop the connection after
+    that many body bytes, like a download interrupted midway.  Every
+    request's method, path, headers and status are kept in requests.
+    Runs on its own event loop in a thread, since the fetcher starts its own.
+    """
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.requests = []
+        self.cut_after = None
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = None
+
+    @staticmethod
+    def etag(data):
+        return f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+
+    async def _handle(self, request):
+        record = {'path': request.path, 'headers': dict(request.headers)}
+        self.requests.append(record)
+        data = self.files.get(request.path)
+        if data is None:
+            record['status'] = 404
+            raise web.HTTPNotFound()
+        etag = self.etag(data)
+        if request.headers.get('If-None-Match') == etag:
+            record['status'] = 304
+            return web.Response(status=304, headers={'ETag': etag})
+
+        start = 0
+        status = 200
+        if_range = request.headers.get('If-Range')
+        if request.http_range.start is not None and (if_range is None or if_range == etag):
+            start = request.http_range.start
+            status = 206
+        body = data[start:]
+        record['status'] = status
+
+        response = web.StreamResponse(status=status, headers={'ETag': etag})
+        response.content_length = len(body)
+        if status == 206:
+            response.headers['Content-Range'] = f'bytes {start}-{len(data) - 1}/{len(data)}'
+        await response.prepare(request)
+        cut, self.cut_after = self.cut_after, None
+        if cut is not None:
+            await response.write(body[:cut])
+            request.transport.close()
+            return response
+        await response.write(body)
+        await response.write_eof()
+        return response
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(timeout=10)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
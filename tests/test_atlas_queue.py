@@ -0,0 +1,109 @@
+import os
+import time
+from multiprocessing import Pool
+from types import SimpleNamespace
+
+import pytest
+
+from hunter_atlas import LEASE_SECONDS, NO_BLOCK, AtlasQueue, BlockAtlas
+
+SHARD = SimpleNamespace(name='q0-0')
+INPUT_HASH = 'ab' * 32
+
+
+def _age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def _try_claim(work_dir):
+    return AtlasQueue(work_dir).claim(SHARD, INPUT_HASH) is not None
+
+
+def test_claim_is_exclusive(tmp_path):
+    first = AtlasQueue(tmp_path)
+    second = AtlasQueue(tmp_path)
+    assert first.claim(SHARD, INPUT_HASH) is not None
+    assert second.claim(SHARD, INPUT_HASH) is None
+
+
+def test_claim_is_exclusive_across_processes(tmp_path):
+    with Pool(8) as pool:
+        won = pool.map(_try_claim, [str(tmp_path)] * 8)
+    assert won.count(True) == 1
+
+
+def test_broken_lease_keeps_new_owners_claim(tmp_path):
+    slow = AtlasQueue(tmp_path)
+    fast = AtlasQueue(tmp_path)
+    slow_claim = slow.claim(SHARD, INPUT_HASH)
+    _age(slow_claim[0], LEASE_SECONDS + 1)
+
+    fast_claim = fast.claim(SHARD, INPUT_HASH)
+    assert fast_claim is not None and fast_claim[0] == slow_claim[0]
+
+    # The slow worker finishes first; it must not drop the new claim
+    slow.complete(SHARD, INPUT_HASH, {1: [{}, 0.5]}, slow_claim)
+    assert os.path.exists(fast_claim[0])
+    assert slow.claim(SHARD, INPUT_HASH) is None
+
+    fast.complete(SHARD, INPUT_HASH, {1: [{}, 0.5]}, fast_claim)
+    assert not os.path.exists(fast_claim[0])
+    assert fast.read_result(SHARD, INPUT_HASH) == {1: [{}, 0.5]}
+
+
+def test_release_tolerates_missing_claim(tmp_path):
+    queue = AtlasQueue(tmp_path)
+    claim = queue.claim(SHARD, INPUT_HASH)
+    os.remove(claim[0])
+    queue.complete(SHARD, INPUT_HASH, {}, claim)
+    assert queue.read_result(SHARD, INPUT_HASH) == {}
+
+
+def _engine(creatures):
+    names = [f"Creature {i}" for i in range(creatures)]
+    index = SimpleNamespace(names=names, ids={name: i for i, name in enumerate(names)})
+    return SimpleNamespace(rumor_givers={'Novice': 1, 'Expert': 2}, index=index)
+
+
+def test_atlas_holds_more_than_255_creatures(tmp_path):
+    engine = _engine(1000)
+    results = {(state, giver): {} for state in range(4) for giver in engine.rumor_givers}
+    results[0, 'Novice'] = {2: [{'Expert': 'Creature 999'}, 0.25]}
+    atlas = BlockAtlas.from_results(engine, results, 1, 3, b'd' * 32, b'r' * 32)
+    path = tmp_path / 'atlas.bin'
+    atlas.write(path)
+
+    atlas = BlockAtlas.read(path, b'd' * 32)
+    assert atlas.lookup('Novice', 2) == ({'Expert': 'Creature 999'}, 0.25)
+    assert atlas.lookup('Novice', 3) is None
+    assert BlockAtlas.read(path, b'x' * 32) is None
+
+
+def test_atlas_rejects_too_many_creatures():
+    with pytest.raises(ValueError):
+        BlockAtlas.from_results(_engine(NO_BLOCK + 1), {}, 1, 1, b'd' * 32, b'r' * 32)
+
+
+def test_racing_lease_breakers_leave_one_owner(tmp_path, monkeypatch):
+    dead = AtlasQueue(tmp_path)
+    first = AtlasQueue(tmp_path)
+    second = AtlasQueue(tmp_path)
+    path = dead.claim(SHARD, INPUT_HASH)[0]
+    _age(path, LEASE_SECONDS + 1)
+
+    # The second worker has found the claim expired; the first one breaks
+    # it and claims the shard just before the second one's rename
+    rename = os.rename
+    claims = []
+
+    def racing_rename(src, dst):
+        monkeypatch.setattr(os, 'rename', rename)
+        claims.append(first.claim(SHARD, INPUT_HASH))
+        rename(src, dst)
+
+    monkeypatch.setattr(os, 'rename', racing_rename)
+    assert second.claim(SHARD, INPUT_HASH) is None
+    assert claims[0] is not None
+    assert os.listdir(tmp_path / 'claims') == [os.path.basename(path)]
+    assert first.release(claims[0])
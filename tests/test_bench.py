@@ -0,0 +1,54 @@
+import csv
+
+from bench.results import compare
+from bench.synthetic import REGIONS, generate, read_metadata
+from hunter_engine import RUMOR_GIVERS, HunterQueryEngine
+from hunter_index import HunterIndex
+
+
+def report(*results):
+    return {'version': 1, 'results': list(results)}
+
+
+def result(case, median_ms, creatures=None):
+    return {'case': case, 'creatures': creatures, 'median_ms': median_ms}
+
+
+def test_compare_flags_only_slowdowns_past_the_threshold():
+    baseline = report(result('available', 1.0, 100), result('available', 1.0, 1000),
+                      result('startup', 50.0), result('dropped', 1.0))
+    current = report(result('available', 1.05, 100), result('available', 1.2, 1000),
+                     result('startup', 40.0), result('new case', 1.0),
+                     {'case': 'dropped', 'skipped': 'no data'})
+    rows, regressions = compare(baseline, current)
+    assert [row[0][:2] for row in rows] == [('available', 100), ('available', 1000),
+                                            ('startup', None)]
+    assert regressions == [('available', 1000, None, None)]
+    assert compare(baseline, current, threshold=0.01)[1] == [
+        ('available', 100, None, None), ('available', 1000, None, None)]
+
+
+def test_generate_writes_the_requested_shape(tmp_path):
+    path = tmp_path / 'synthetic.csv'
+    metadata = generate(str(path), creatures=500, regions=12, givers=8, seed=3)
+    with open(path, newline='', encoding='utf-8') as f:
+        header, *rows = list(csv.reader(f))
+
+    assert header[:2] == ['Name', 'Level'] and len(header) == 2 + 12 + 8
+    assert header[2:12] == REGIONS and header[12:14] == ['Region 11', 'Region 12']
+    assert header[14:20] == list(RUMOR_GIVERS)
+    assert len(rows) == 500 and len({row[0] for row in rows}) == 500
+    for row in rows:
+        assert 1 <= row[2:14].count('TRUE') <= 3
+        assert row[14:].count('TRUE') == 1
+    assert read_metadata(str(path)) == metadata
+    assert metadata['regions'] == 12 and len(metadata['rumor_givers']) == 8
+
+    index = HunterIndex.from_csv(str(path), region_count=12)
+    engine = HunterQueryEngine(index, metadata['rumor_givers'])
+    assert len(index.names) == 500 and len(index.regions) == 12
+    assert set(engine.rumor_givers) == set(header[14:])
+
+    again = tmp_path / 'again.csv'
+    generate(str(again), creatures=500, regions=12, givers=8, seed=3)
+    assert again.read_bytes() == path.read_bytes()
@@ -0,0 +1,124 @@
+import os
+import random
+from itertools import product
+
+import pytest
+
+import hunter_blocks
+from hunter_blocks import BlockOptimizer, _search
+from hunter_engine import HunterQueryEngine
+from hunter_index import HunterIndex
+
+DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'hunter_data.csv')
+LEVEL = 95
+ACO = 'Expert(aco)'
+TECO = 'Expert(teco)'
+CHINCHOMPAS = {'Grey Chinchompa', 'Red Chinchompa'}
+
+# Priorities behind the recommended block lists in rumours.txt: the
+# creatures its quest skips avoid come first, then the core of the lists,
+# then the creatures it names for a block freed by a skipped quest
+UNDESIRABLE = {
+    'Grey Chinchompa': 3, 'Red Chinchompa': 3, 'Herbiboar': 3,
+    'Sabre-Toothed Kebbit': 2, 'Sabre-Toothed Kyatt': 2, 'Dark Kebbit': 2,
+    'Tecu Salamander': 1, 'Moonlight Moth': 1, 'Sunlight Moth': 1,
+}
+ALL_QUESTS = None
+SKIP_EAGLES_PEAK = {'Bone Voyage', 'At First Light'}  # At First Light needs it
+SKIP_BONE_VOYAGE = {"Eagles' Peak", 'At First Light'}
+SKIP_BOTH = {'At First Light'}
+
+
+@pytest.fixture(scope='module')
+def optimizer():
+    return BlockOptimizer(HunterQueryEngine(HunterIndex.from_csv(DATA_CSV)), workers=1)
+
+
+def blocked(plan):
+    return set(plan.blocks.values())
+
+
+def test_aco_list_spends_the_block_freed_by_eagles_peak(optimizer):
+    # "Players who skip Eagles' Peak but not Bone Voyage should use Aco's
+    # block list ... and use the extra block space to block either tecu
+    # salamanders or moonlight moths"
+    aco = optimizer.optimize(ACO, LEVEL, UNDESIRABLE, quests=ALL_QUESTS)
+    assert CHINCHOMPAS <= blocked(aco)
+    skipped = optimizer.optimize(ACO, LEVEL, UNDESIRABLE, quests=SKIP_EAGLES_PEAK)
+    assert 'Master(wolf)' not in skipped.blocks
+    assert skipped.blocks['Novice'] in {'Tecu Salamander', 'Moonlight Moth'}
+    assert blocked(skipped) - {skipped.blocks['Novice']} == blocked(aco) - CHINCHOMPAS
+
+
+def test_teco_list_spends_the_block_freed_by_both_skips(optimizer):
+    # "Players who skip Bone Voyage but not Eagles' Peak should use Teco's
+    # block list.  Players who skipped both should use Teco's block list and
+    # use the extra block space to block sunlight moths."
+    teco = optimizer.optimize(TECO, LEVEL, UNDESIRABLE, quests=SKIP_BONE_VOYAGE)
+    assert 'Herbiboar' not in teco.pool and 'Herbiboar' not in blocked(teco)
+    assert 'Sunlight Moth' not in blocked(teco)
+    skipped = optimizer.optimize(TECO, LEVEL, UNDESIRABLE, quests=SKIP_BOTH)
+    assert blocked(skipped) == blocked(teco) - CHINCHOMPAS | {'Sunlight Moth'}
+    assert skipped.undesirable_share == 0
+
+
+def test_blocks_are_in_both_pools(optimizer):
+    engine = optimizer.engine
+    for giver in (ACO, TECO):
+        plan = optimizer.optimize(giver, LEVEL, UNDESIRABLE)
+        assert len(set(plan.blocks.values())) == len(plan.blocks)
+        for blocker, creature in plan.blocks.items():
+            assert creature in engine.available(giver, LEVEL, optimizer.regions)
+            assert creature in engine.available(blocker, LEVEL, optimizer.regions)
+            assert creature not in plan.pool
+
+
+def test_quest_gated_givers_hold_no_blocks(optimizer):
+    # Without At First Light the wolf assigns nothing, so it cannot block
+    pool, blockers, options = optimizer.blocker_options(
+        ACO, LEVEL, {i: 1 for i in range(len(optimizer.engine.index.names))},
+        quests={"Eagles' Peak", 'Bone Voyage'})
+    assert options[blockers.index('Master(wolf)')] == ()
+    plan = optimizer.optimize(ACO, LEVEL, {'Tecu Salamander': 1, 'Moonlight Moth': 1},
+                              quests={'Bone Voyage'})
+    assert 'Master(wolf)' not in plan.blocks
+    assert len(plan.blocks) == 1
+
+
+def test_quest_gated_creatures_need_no_block(optimizer):
+    plan = optimizer.optimize(ACO, LEVEL, CHINCHOMPAS, quests={'Bone Voyage'})
+    assert plan.blocks == {} and plan.blocked_weight == 0
+    assert not CHINCHOMPAS & set(plan.pool)
+
+
+def brute_force(options, weights):
+    best = 0
+    for choice in product(*[opts + (None,) for opts in options]):
+        held = [c for c in choice if c is not None]
+        if len(set(held)) == len(held):
+            best = max(best, sum(weights[c] for c in held))
+    return best
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(500):
+        creatures = rng.randint(1, 8)
+        weights = {c: rng.choice([1, 1, 2, 3, 5]) for c in range(creatures)}
+        options = tuple(tuple(rng.sample(range(creatures), rng.randint(0, creatures)))
+                        for _ in range(rng.randint(1, 5)))
+        weight, choice = _search(options, weights)
+        assert weight == brute_force(options, weights)
+        held = [c for c in choice if c is not None]
+        assert len(set(held)) == len(held)
+        assert all(c is None or c in opts for c, opts in zip(choice, options))
+        assert sum(weights[c] for c in held) == weight
+
+
+def test_process_pool_finds_the_same_plan(optimizer, monkeypatch):
+    serial = optimizer.optimize(TECO, LEVEL, UNDESIRABLE)
+    monkeypatch.setattr(hunter_blocks, 'PARALLEL_THRESHOLD', 0)
+    parallel = BlockOptimizer(optimizer.engine, workers=2).optimize(TECO, LEVEL, UNDESIRABLE)
+    assert parallel.blocked_weight == serial.blocked_weight
+    assert parallel.undesirable_share == serial.undesirable_share
@@ -0,0 +1,188 @@
+import csv
+import os
+import shutil
+import tracemalloc
+from itertools import combinations
+
+import pytest
+
+import hunter_index
+from hunter_engine import (ALWAYS_ON_REGIONS, MAX_LEVEL, MIN_LEVEL, RUMOR_GIVERS, CacheInfo,
+                           HunterQueryEngine, ResultCache)
+from hunter_index import HunterIndex, parse_flag
+from hunter_profile import Profiler, format_stats
+from hunter_table import AvailabilityTable
+
+DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'hunter_data.csv')
+LEVELS = range(MIN_LEVEL, MAX_LEVEL + 1)
+QUESTS = ["Eagles' Peak", 'Bone Voyage', 'At First Light']
+QUEST_SETS = [None] + [set(c) for n in range(len(QUESTS) + 1) for c in combinations(QUESTS, n)]
+
+
+def read_rows(path=DATA_CSV):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        regions = header[2:12]
+        rows = []
+        for cells in reader:
+            rows.append({
+                'name': cells[0],
+                'level': int(cells[1]),
+                'regions': {r for r, v in zip(regions, cells[2:12]) if parse_flag(v)},
+                'givers': {g for g, v in zip(header[12:], cells[12:]) if parse_flag(v)},
+            })
+    return regions, rows
+
+
+def scan(rows, giver, level, regions, quests=None):
+    """The rules from rumours.txt applied to the CSV rows one by one"""
+    if level < RUMOR_GIVERS[giver]:
+        return set()
+    if quests is not None:
+        done = set(quests)
+        if "Eagles' Peak" not in done:
+            done.discard('At First Light')
+        if giver == 'Master(wolf)' and 'At First Light' not in done:
+            return set()
+    regions = set(regions)
+    names = set()
+    for row in rows:
+        if giver in row['givers'] and row['level'] <= level and row['regions'] & regions:
+            if quests is not None:
+                if row['name'] in ('Embertailed Jerboa', 'Grey Chinchompa', 'Red Chinchompa') \
+                        and "Eagles' Peak" not in done:
+                    continue
+                if row['name'] == 'Herbiboar' and 'Bone Voyage' not in done:
+                    continue
+            names.add(row['name'])
+    return names
+
+
+@pytest.fixture(scope='module')
+def engines():
+    index = HunterIndex.from_csv(DATA_CSV)
+    engine = HunterQueryEngine(index)
+    table = AvailabilityTable.build(engine, ALWAYS_ON_REGIONS, MIN_LEVEL, MAX_LEVEL)
+    return engine, HunterQueryEngine(index, table=table)
+
+
+def region_subsets(regions):
+    toggleable = [r for r in regions if r not in ALWAYS_ON_REGIONS]
+    for n in range(len(toggleable) + 1):
+        for subset in combinations(toggleable, n):
+            yield ALWAYS_ON_REGIONS + list(subset)
+
+
+def check_batch(engine, queries, expected, quests=None):
+    givers, levels, region_sets = zip(*queries)
+    result = engine.batch_available(levels, region_sets, [()] * len(queries), givers, quests)
+    for query, row, names in zip(queries, result, expected):
+        assert set(engine.names_of_row(row)) == names, query
+
+
+def test_every_level_and_region_set_matches_a_scan(engines):
+    regions, rows = read_rows()
+    queries, expected = [], []
+    for giver in RUMOR_GIVERS:
+        for level in LEVELS:
+            for selected in region_subsets(regions):
+                names = scan(rows, giver, level, selected)
+                for engine in engines:
+                    assert set(engine.available(giver, level, selected)) == names, \
+                        (giver, level, selected)
+                queries.append((giver, level, selected))
+                expected.append(names)
+    check_batch(engines[0], queries, expected)
+
+
+def test_every_quest_combination_matches_a_scan(engines):
+    regions, rows = read_rows()
+    toggleable = [r for r in regions if r not in ALWAYS_ON_REGIONS]
+    region_sets = ([ALWAYS_ON_REGIONS, regions]
+                   + [ALWAYS_ON_REGIONS + [r] for r in toggleable])
+    for quests in QUEST_SETS:
+        queries, expected = [], []
+        for giver in RUMOR_GIVERS:
+            for level in LEVELS:
+                for selected in region_sets:
+                    names = scan(rows, giver, level, selected, quests)
+                    for engine in engines:
+                        assert set(engine.available(giver, level, selected, quests=quests)) \
+                            == names, (giver, level, selected, quests)
+                    queries.append((giver, level, selected))
+                    expected.append(names)
+        check_batch(engines[0], queries, expected, quests)
+
+
+def test_snapshot_is_reused_until_the_csv_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'hunter_data.csv'
+    shutil.copy(DATA_CSV, path)
+    snapshots = tmp_path / 'cache'
+    snapshots.mkdir()
+    first = HunterIndex.load(str(path), snapshot_dir=str(snapshots))
+
+    parsed = []
+    from_csv = HunterIndex.from_csv.__func__
+    monkeypatch.setattr(HunterIndex, 'from_csv',
+                        classmethod(lambda cls, *a: parsed.append(a) or from_csv(cls, *a)))
+    again = HunterIndex.load(str(path), snapshot_dir=str(snapshots))
+    assert parsed == []
+    assert again.names == first.names
+
+    # Move Dark Kebbit from Kandarin to the Fremenik region
+    text = path.read_text()
+    line = next(l for l in text.splitlines() if l.startswith('Dark Kebbit,'))
+    cells = line.split(',')
+    cells[4], cells[8] = 'FALSE', 'TRUE'
+    path.write_text(text.replace(line, ','.join(cells)))
+    changed = HunterIndex.load(str(path), snapshot_dir=str(snapshots))
+    assert len(parsed) == 1
+    assert 'Dark Kebbit' not in first.names_of(first.region_masks['Fremenik'])
+    assert 'Dark Kebbit' in changed.names_of(changed.region_masks['Fremenik'])
+
+
+def test_snapshot_is_rebuilt_when_the_quest_spec_changes(tmp_path, monkeypatch):
+    snapshots = str(tmp_path)
+    first = HunterIndex.load(DATA_CSV, snapshot_dir=snapshots)
+    assert 'Dark Kebbit' in first.names_of(first.quest_mask(set()))
+
+    monkeypatch.setitem(hunter_index.QUEST_CREATURES, 'Bone Voyage', ['Herbiboar', 'Dark Kebbit'])
+    changed = HunterIndex.load(DATA_CSV, snapshot_dir=snapshots)
+    assert 'Dark Kebbit' not in changed.names_of(changed.quest_mask(set()))
+    assert 'Dark Kebbit' in changed.names_of(changed.quest_mask({'Bone Voyage'}))
+
+
+def test_result_cache_counts_hits_misses_and_evictions():
+    cache = ResultCache(maxsize=2)
+    cache.sync('v1')
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # Now most recently used
+    cache.put('c', 3)           # Evicts b
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.info() == CacheInfo(hits=2, misses=2, maxsize=2, currsize=2, evictions=1)
+
+    cache.sync('v1')
+    assert cache.info().hits == 2
+    cache.sync('v2')
+    assert cache.info() == CacheInfo(0, 0, 2, 0, 0)
+
+
+def test_profiler_reports_cache_counters():
+    tracing = tracemalloc.is_tracing()
+    profiler = Profiler()
+    try:
+        cache = ResultCache(maxsize=4)
+        profiler.add_stats("Results cache", cache.info)
+        cache.get('missing')
+        (name, values), = profiler.stats()
+        assert format_stats(name, values) == \
+            "Results cache: hits 0, misses 1, maxsize 4, currsize 0, evictions 0"
+        assert profiler.chrome_trace()['otherData'] == {"Results cache": values}
+    finally:
+        if not tracing:
+            tracemalloc.stop()
@@ -0,0 +1,119 @@
+import csv
+import os
+
+import pytest
+
+from hunter_engine import ALWAYS_ON_REGIONS, MAX_LEVEL, MIN_LEVEL, HunterQueryEngine
+from hunter_index import HunterIndex, file_hash
+from hunter_ingest import (COL_LOCATIONS, COL_NAME, iter_source_rows, ingest_rows,
+                           normalize_name, patch_index)
+from hunter_table import AvailabilityTable, update_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = list(iter_source_rows(os.path.join(ROOT, 'rumours.csv')))
+
+
+def read_regions(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return {row[0]: {header[c] for c in range(2, 12) if row[c] == 'TRUE'}
+                for row in reader}
+
+
+def write_regions(path, name, regions):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    for row in rows[1:]:
+        if row[0] == name:
+            for col in range(2, 12):
+                row[col] = 'TRUE' if rows[0][col] in regions else 'FALSE'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+
+
+def with_location(name, location):
+    rows = [list(cells) for cells in SOURCE]
+    for cells in rows:
+        if normalize_name(cells[COL_NAME]) == name:
+            cells[COL_LOCATIONS[0]] = location
+            cells[COL_LOCATIONS[1]] = ''
+    return rows
+
+
+@pytest.fixture
+def out(tmp_path):
+    return str(tmp_path / 'hunter_data.csv')
+
+
+def test_counts_added_changed_removed_and_unchanged(out):
+    first = ingest_rows(SOURCE, out, refresh=False)
+    assert len(first.added) == len(SOURCE) and first.written
+    assert (first.changed, first.removed, first.unchanged) == ([], [], 0)
+
+    again = ingest_rows(SOURCE, out, refresh=False)
+    assert (again.added, again.changed, again.removed) == ([], [], [])
+    assert again.unchanged == len(SOURCE) and not again.written
+
+    edited = with_location('Dark Kebbit', 'Weiss')
+    result = ingest_rows(edited[1:], out, refresh=False)
+    assert result.changed == ['Dark Kebbit']
+    assert result.removed == [normalize_name(SOURCE[0][COL_NAME])]
+    assert result.added == [] and result.unchanged == len(SOURCE) - 2
+
+
+def test_duplicate_rows_are_only_a_warning(out):
+    ingest_rows(SOURCE, out, refresh=False)
+    result = ingest_rows(SOURCE + [SOURCE[0]], out, refresh=False)
+    assert not result.written and result.changed == []
+    assert result.warnings == [f"{' '.join(SOURCE[0][COL_NAME].split())}: "
+                               f"duplicate row ignored"]
+
+
+def test_hand_set_regions_survive_and_stale_ones_are_dropped(out):
+    ingest_rows(SOURCE, out, refresh=False)
+    assert read_regions(out)['Dark Kebbit'] == {'Kandarin'}
+    write_regions(out, 'Dark Kebbit', {'Kandarin', 'Wilderness'})
+
+    # Kandarin came from the Feldip Hunter area, which the source drops
+    ingest_rows(with_location('Dark Kebbit', 'Weiss'), out, refresh=False)
+    assert read_regions(out)['Dark Kebbit'] == {'Wilderness', 'Fremenik'}
+
+
+def test_empty_region_columns_are_reported(out):
+    result = ingest_rows(SOURCE, out, refresh=False)
+    # No location in rumours.csv maps to Asgarnia or the Wilderness
+    empty = [w.split(':')[0] for w in result.warnings if 'no creature' in w]
+    assert empty == ['Asgarnia', 'Wilderness']
+
+    write_regions(out, 'Dark Kebbit', {'Kandarin', 'Asgarnia'})
+    ingest_rows(SOURCE, out, refresh=False)
+    edited = [cells for cells in SOURCE if normalize_name(cells[COL_NAME]) != 'Dark Kebbit']
+    result = ingest_rows(edited, out, refresh=False)
+    assert result.warnings == ["Asgarnia: no creature is left in this region"]
+
+
+def test_patched_table_matches_a_full_build(tmp_path, out):
+    ingest_rows(SOURCE, out, refresh=False)
+    old_index = HunterIndex.from_csv(out)
+    old_digest = file_hash(out)
+    AvailabilityTable.build(HunterQueryEngine(old_index), ALWAYS_ON_REGIONS, MIN_LEVEL,
+                            MAX_LEVEL, old_digest).write(str(tmp_path / 'table.bin'))
+
+    ingest_rows(with_location('Dark Kebbit', 'Weiss'), out, refresh=False)
+    with open(out, newline='', encoding='utf-8') as f:
+        rows = sorted(list(csv.reader(f))[1:], key=lambda row: int(row[1]))
+    changed = [row for row in rows if row[0] == 'Dark Kebbit']
+    index = patch_index(old_index, changed, [row[0] for row in rows],
+                        [int(row[1]) for row in rows])
+    assert index is not None
+
+    assert update_table(out, index, old_digest, int(changed[0][1]), str(tmp_path / 'table.bin'))
+    patched = AvailabilityTable.read(str(tmp_path / 'table.bin'), file_hash(out))
+    full = AvailabilityTable.build(HunterQueryEngine(HunterIndex.from_csv(out)),
+                                   ALWAYS_ON_REGIONS, MIN_LEVEL, MAX_LEVEL, file_hash(out))
+    assert patched is not None
+    cells = len(full.cells)
+    assert [patched.masks[patched.cells[i]] for i in range(cells)] == \
+        [full.masks[full.cells[i]] for i in range(cells)]
+    assert sorted(patched.masks) == sorted(full.masks)
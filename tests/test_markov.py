@@ -0,0 +1,71 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from hunter_engine import (ALWAYS_ON_REGIONS, BACK_TO_BACK_OFF, BACK_TO_BACK_ON,
+                           BACK_TO_BACK_TOGGLE, HunterQueryEngine)
+from hunter_index import HunterIndex
+from hunter_markov import RumorChain
+
+DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'hunter_data.csv')
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return HunterQueryEngine(HunterIndex.from_csv(DATA_CSV))
+
+
+def _configs(engine, count, seed=3):
+    rng = random.Random(seed)
+    toggleable = [r for r in engine.index.regions if r not in ALWAYS_ON_REGIONS]
+    while count:
+        giver = rng.choice(list(engine.rumor_givers))
+        level = rng.randint(engine.rumor_givers[giver], 99)
+        regions = ALWAYS_ON_REGIONS + rng.sample(toggleable, rng.randint(0, len(toggleable)))
+        names = engine.available(giver, level, regions)
+        if not names:
+            continue
+        blocks = {other: rng.choice(engine.index.names)
+                  for other in rng.sample(list(engine.rumor_givers), 2)}
+        if rng.random() < 0.7:
+            blocks[giver] = rng.choice(names)  # Previous rumor
+        undesirable = rng.sample(names, rng.randint(0, min(3, len(names))))
+        yield dict(giver=giver, level=level, regions=regions, blocks=blocks,
+                   undesirable=undesirable,
+                   back_to_back=rng.choice([BACK_TO_BACK_OFF, BACK_TO_BACK_ON,
+                                            BACK_TO_BACK_TOGGLE]),
+                   reroll=rng.random() < 0.5, max_rerolls=rng.randint(1, 4))
+        count -= 1
+
+
+def test_next_probabilities_match_the_solved_chain(engine):
+    chain = RumorChain(engine)
+    checked = 0
+    for config in _configs(engine, 300):
+        try:
+            solution = chain.solve(**config)
+        except np.linalg.LinAlgError:
+            continue  # Reducible chain; solve() has no stationary answer
+        previous = config['blocks'].get(config['giver'])
+        if previous in solution.names:
+            expected = solution.transition[solution.names.index(previous)]
+        else:
+            expected = solution.initial
+        odds = chain.next_probabilities(**config)
+        assert list(odds) == solution.names
+        np.testing.assert_allclose(list(odds.values()), expected, rtol=0, atol=1e-12)
+        checked += 1
+    assert checked >= 250
+
+
+def test_next_probabilities_sum_to_one_without_blocked_creatures(engine):
+    chain = RumorChain(engine)
+    config = next(_configs(engine, 1, seed=11))
+    odds = chain.next_probabilities(**config)
+    assert sum(odds.values()) == pytest.approx(1)
+    for holder, task in config['blocks'].items():
+        if holder != config['giver']:
+            assert task not in odds
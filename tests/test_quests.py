@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from hunter_engine import RUMOR_GIVERS, HunterQueryEngine
+from hunter_index import HunterIndex
+
+DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'hunter_data.csv')
+LEVEL = 99
+REGIONS = ['Misthalin/Karamja', 'Kandarin', 'Desert', 'Fremenik', 'Zeah', 'Varlamore']
+ALL_QUESTS = {"Eagles' Peak", 'Bone Voyage', 'At First Light'}
+BOX_TRAP = {'Embertailed Jerboa', 'Grey Chinchompa', 'Red Chinchompa'}
+MASTER = 'Master(wolf)'
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return HunterQueryEngine(HunterIndex.from_csv(DATA_CSV))
+
+
+def unchecked(*quests):
+    return ALL_QUESTS - set(quests)
+
+
+def lost(engine, giver, quests):
+    """Creatures a giver can no longer assign with only these quests done"""
+    before = set(engine.available(giver, LEVEL, REGIONS))
+    return before - set(engine.available(giver, LEVEL, REGIONS, quests=quests))
+
+
+def test_checked_quests_match_no_quest_filter(engine):
+    for giver in RUMOR_GIVERS:
+        assert engine.available(giver, LEVEL, REGIONS, quests=ALL_QUESTS) == \
+            engine.available(giver, LEVEL, REGIONS)
+
+
+def test_eagles_peak_gates_the_box_trap_creatures(engine):
+    gated = set()
+    for giver in RUMOR_GIVERS:
+        if giver != MASTER:  # Also loses At First Light, which needs Eagles' Peak
+            assert lost(engine, giver, unchecked("Eagles' Peak")) <= BOX_TRAP
+        gated |= lost(engine, giver, unchecked("Eagles' Peak"))
+    assert BOX_TRAP <= gated
+
+
+def test_bone_voyage_gates_herbiboar(engine):
+    gated = set()
+    for giver in RUMOR_GIVERS:
+        assert lost(engine, giver, unchecked('Bone Voyage')) <= {'Herbiboar'}
+        gated |= lost(engine, giver, unchecked('Bone Voyage'))
+    assert gated == {'Herbiboar'}
+
+
+def test_at_first_light_gates_the_master(engine):
+    assert engine.available(MASTER, LEVEL, REGIONS)
+    assert engine.available(MASTER, LEVEL, REGIONS, quests=unchecked('At First Light')) == []
+    assert engine.pool(MASTER, LEVEL, REGIONS, {}, unchecked('At First Light')) == []
+    for giver in RUMOR_GIVERS:
+        if giver != MASTER:
+            assert lost(engine, giver, unchecked('At First Light')) == set()
+
+
+def test_at_first_light_needs_eagles_peak(engine):
+    assert engine.available(MASTER, LEVEL, REGIONS, quests=unchecked("Eagles' Peak")) == []
+    assert engine.index.missing_quests(MASTER, unchecked("Eagles' Peak")) == ['At First Light']
+
+
+@pytest.mark.parametrize('quests', [set(), unchecked("Eagles' Peak"), unchecked('Bone Voyage'),
+                                    unchecked('At First Light'), ALL_QUESTS, None])
+def test_batch_available_applies_quests(engine, quests):
+    givers = list(RUMOR_GIVERS)
+    result = engine.batch_available([LEVEL] * len(givers), [REGIONS] * len(givers),
+                                    [()] * len(givers), givers, quests)
+    for giver, row in zip(givers, result):
+        assert engine.names_of_row(row) == engine.available(giver, LEVEL, REGIONS, quests=quests)
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+from tests.asset_server import AssetServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'Scrapyard'))
+from scrape import AssetFetcher, output_names  # noqa: E402
+
+URL = 'https://oldschool.runescape.wiki/images/Polar_kebbit.png'
+PATH = '/images/Polar_kebbit.png'
+DATA = os.urandom(512 * 1024)
+
+
+@pytest.fixture
+def server():
+    server = AssetServer({PATH: DATA}).start()
+    yield server
+    server.stop()
+
+
+def fetcher(server, tmp_path, **kwargs):
+    return AssetFetcher(cache_dir=tmp_path / 'cache', output_dir=tmp_path / 'out',
+                        base_url=server.url, **kwargs)
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    server.cut_after = 200 * 1024
+    first = fetcher(server, tmp_path, retries=1)
+    assert first.fetch_all([URL]) == {URL: None}
+    assert first.stats['failed'] == 1
+    partial = list((tmp_path / 'cache' / 'partial').glob('*.part'))
+    assert len(partial) == 1 and 0 < partial[0].stat().st_size < len(DATA)
+    offset = partial[0].stat().st_size
+
+    second = fetcher(server, tmp_path)
+    path = second.fetch_all([URL])[URL]
+    assert path.read_bytes() == DATA
+    assert (tmp_path / 'out' / 'Polar_kebbit.png').read_bytes() == DATA
+    assert second.stats['resumed'] == 1
+    request = server.requests[-1]
+    assert request['status'] == 206
+    assert request['headers']['Range'] == f'bytes={offset}-'
+    assert request['headers']['If-Range'] == AssetServer.etag(DATA)
+
+
+def test_changed_asset_is_refetched_in_full(server, tmp_path):
+    server.cut_after = 100 * 1024
+    fetcher(server, tmp_path, retries=1).fetch_all([URL])
+    server.files[PATH] = changed = os.urandom(300 * 1024)
+
+    second = fetcher(server, tmp_path)
+    assert second.fetch_all([URL])[URL].read_bytes() == changed
+    assert second.stats['resumed'] == 0
+    assert server.requests[-1]['status'] == 200
+
+
+def test_unchanged_asset_costs_a_304(server, tmp_path):
+    fetcher(server, tmp_path).fetch_all([URL])
+    again = fetcher(server, tmp_path)
+    assert again.fetch_all([URL])[URL].read_bytes() == DATA
+    assert again.stats == {'downloaded': 0, 'resumed': 0, 'not_modified': 1, 'failed': 0}
+    assert server.requests[-1]['status'] == 304
+
+
+def test_clashing_names_get_a_url_hash():
+    thumb = 'https://oldschool.runescape.wiki/images/thumb/Polar_kebbit.png'
+    upper = 'https://oldschool.runescape.wiki/images/POLAR_KEBBIT.png'
+    other = 'https://oldschool.runescape.wiki/images/Dark_kebbit.png'
+    names = output_names([URL, thumb, upper, other])
+    assert names[other] == 'Dark_kebbit.png'
+    assert len({name.lower() for name in names.values()}) == 4
+    assert names[URL].startswith('Polar_kebbit-') and names[URL].endswith('.png')
+    assert output_names([upper, other, thumb, URL]) == names
+
+
+def test_assets_with_the_same_basename_are_both_kept(server, tmp_path):
+    thumb_path = '/images/thumb/Polar_kebbit.png'
+    thumb = 'https://oldschool.runescape.wiki' + thumb_path
+    server.files[thumb_path] = small = os.urandom(1024)
+    results = fetcher(server, tmp_path).fetch_all([URL, thumb])
+    names = output_names([URL, thumb])
+    assert (tmp_path / 'out' / names[URL]).read_bytes() == DATA
+    assert (tmp_path / 'out' / names[thumb]).read_bytes() == small
+    assert results[thumb].read_bytes() == small
@@ -0,0 +1,26 @@
+import random
+
+from hunter_view import line_changes
+
+
+def patch(old, new, changes):
+    lines = list(old)
+    for i1, i2, j1, j2 in reversed(changes):
+        lines[i1:i2] = new[j1:j2]
+    return lines
+
+
+def test_flipping_one_line_is_one_change():
+    old = [(f'Creature {i}', None) for i in range(5000)]
+    new = list(old)
+    new[1234] = ('Creature 1234 (Currently Assigned)', 'assigned')
+    assert line_changes(old, new) == [(1234, 1235, 1234, 1235)]
+    assert line_changes(new, new) == []
+
+
+def test_changes_turn_old_into_new():
+    rng = random.Random(7)
+    for _ in range(2000):
+        old = [(rng.choice('abcd'), None) for _ in range(rng.randint(0, 10))]
+        new = [(rng.choice('abcd'), None) for _ in range(rng.randint(0, 10))]
+        assert patch(old, new, line_changes(old, new)) == new
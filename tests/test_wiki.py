@@ -0,0 +1,90 @@
+import csv
+import os
+import shutil
+
+import pytest
+
+import hunter_wiki
+from hunter_wiki import WikiPageCache, build_dataset, page_rows, parse_pages, parse_tables
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'wiki_page.html')
+WIKI = hunter_wiki.WIKI_BASE_URL
+
+
+@pytest.fixture
+def page():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+def _rows(data, monkeypatch, backend):
+    if backend == 'html.parser':
+        monkeypatch.setattr(hunter_wiki, 'lxml_html', None)
+    elif hunter_wiki.lxml_html is None:
+        pytest.skip("lxml is not installed")
+    return page_rows(parse_tables(data))
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'html.parser'])
+def test_page_rows(page, monkeypatch, backend):
+    rumours, creatures = _rows(page, monkeypatch, backend)
+    assert rumours == [
+        ['46', WIKI + 'images/Polar_kebbit.png', WIKI + 'w/Polar_kebbit', 'Polar kebbit',
+         WIKI + 'w/Rellekka_Hunter_area', 'Rellekka Hunter area', WIKI + 'w/Weiss', 'Weiss',
+         WIKI + 'w/Falconry', WIKI + 'images/Falconry_icon.png', 'Falconry',
+         'Yes', 'No', 'No', 'No', 'No', 'No', '[1]'],
+        ['57', '', WIKI + 'w/Dark_kebbit', 'Dark kebbit',
+         WIKI + 'w/Feldip_Hunter_area', 'Feldip Hunter area', '', '',
+         WIKI + 'w/Falconry', WIKI + 'images/Falconry_icon.png', 'Falconry',
+         'Yes', 'Yes', 'No', 'Yes', 'Yes', 'No', '[1]'],
+    ]
+    assert creatures == [
+        ['Polar kebbit', '46', ['Rellekka Hunter area', 'Weiss', 'Farming Guild'],
+         'Noose wand'],
+        ['Dark kebbit', '57', ['Feldip Hunter area', 'Piscatoris falconry area'], 'Falconry'],
+    ]
+
+
+def test_backends_agree(page, monkeypatch):
+    if hunter_wiki.lxml_html is None:
+        pytest.skip("lxml is not installed")
+    fast = page_rows(parse_tables(page))
+    monkeypatch.setattr(hunter_wiki, 'lxml_html', None)
+    assert page_rows(parse_tables(page)) == fast
+
+
+def test_unchanged_pages_come_from_the_cache(tmp_path, monkeypatch):
+    pages = tmp_path / 'pages'
+    pages.mkdir()
+    shutil.copy(FIXTURE, pages / 'rumours.html')
+    cache = WikiPageCache(str(tmp_path / 'cache'))
+    first = parse_pages([str(pages / 'rumours.html')], cache, workers=1)
+
+    def no_parsing(data):
+        raise AssertionError("cached page parsed again")
+
+    monkeypatch.setattr(hunter_wiki, '_parse_data', no_parsing)
+    assert parse_pages([str(pages / 'rumours.html')], cache, workers=1) == first
+
+    (pages / 'rumours.html').write_bytes((pages / 'rumours.html').read_bytes() + b'\n')
+    with pytest.raises(AssertionError):
+        parse_pages([str(pages / 'rumours.html')], cache, workers=1)
+
+
+def test_build_dataset_adds_creature_table_locations(tmp_path, monkeypatch):
+    monkeypatch.setenv('HUNTER_CACHE_DIR', str(tmp_path / 'cache'))
+    pages = tmp_path / 'pages'
+    pages.mkdir()
+    shutil.copy(FIXTURE, pages / 'rumours.html')
+    out = tmp_path / 'hunter_data.csv'
+    result = build_dataset(str(pages), str(out), workers=1, refresh=False)
+    assert result.added == ['Polar Kebbit', 'Dark Kebbit']
+    assert not [warning for warning in result.warnings if 'unknown location' in warning]
+
+    with open(out, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        regions = {row[0]: {header[c] for c in range(2, 12) if row[c] == 'TRUE'}
+                   for row in reader}
+    # Farming Guild and the falconry area come from the creature table only
+    assert regions == {'Polar Kebbit': {'Fremenik', 'Zeah'}, 'Dark Kebbit': {'Kandarin'}}